@@ -22,6 +22,9 @@ datas = [
    ('Universal-Binaries.dmg', '.'),
 ]
 
+if Path("Universal-Binaries.index.plist").exists():
+   datas.append(('Universal-Binaries.index.plist', '.'))
+
 if Path("laobamacInternalResources.dmg").exists():
    datas.append(('laobamacInternalResources.dmg', '.'))
 
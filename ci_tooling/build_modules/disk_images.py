@@ -2,12 +2,14 @@
 disk_images.py: Fetch and generate disk images (Universal-Binaries.dmg, payloads.dmg)
 """
 
+import tempfile
 import subprocess
 
 from pathlib import Path
 
 from oclp_mod import constants
 from oclp_mod.support import subprocess_wrapper
+from oclp_mod.sys_patch.utilities.payload_index import PatcherSupportPkgIndex
 
 
 
@@ -127,6 +129,49 @@ class GenerateDiskImages:
                 raise Exception(f"{resource} not found")
 
 
+    def _generate_universal_binaries_index(self):
+        """
+        Generate index of Universal-Binaries.dmg's contents
+        Allows the patcher to skip walking the mounted disk image at runtime
+
+        Index is keyed by the disk image's SHA-256, regenerated whenever the disk image changes
+        The patcher only compares the cheaper fingerprint also stored in the index
+        """
+
+        index_path = "./Universal-Binaries.index.plist"
+        if Path(index_path).exists():
+            if self.reset_dmg_cache is False and PatcherSupportPkgIndex.load(index_path, "", "./Universal-Binaries.dmg", verify_dmg_hash=True) is not None:
+                print("- Universal-Binaries.index.plist already exists and matches Universal-Binaries.dmg, skipping creation")
+                return
+
+            print("- Removing old Universal-Binaries.index.plist")
+            subprocess_wrapper.run_and_verify(
+                ["/bin/rm", "-f", index_path],
+                stdout=subprocess.PIPE, stderr=subprocess.PIPE
+            )
+
+        print("Generating Universal-Binaries index...")
+        with tempfile.TemporaryDirectory() as mount_point:
+            subprocess_wrapper.run_and_verify([
+                "/usr/bin/hdiutil", "attach", "-noverify", "./Universal-Binaries.dmg",
+                "-mountpoint", mount_point,
+                "-nobrowse",
+                "-readonly",
+                "-passphrase", "password"
+            ], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+
+            try:
+                index = PatcherSupportPkgIndex.generate(mount_point, include_hashes=True)
+            finally:
+                subprocess_wrapper.run_and_verify(
+                    ["/usr/bin/hdiutil", "detach", mount_point, "-force"],
+                    stdout=subprocess.PIPE, stderr=subprocess.PIPE
+                )
+
+        index.write(index_path, "./Universal-Binaries.dmg")
+        print(f"- Indexed {len(index.entries)} entries")
+
+
     def generate(self) -> None:
         """
         Generate disk images
@@ -135,3 +180,4 @@ class GenerateDiskImages:
         self._delete_extra_binaries()
         self._generate_payloads_dmg()
         self._download_resources()
+        self._generate_universal_binaries_index()
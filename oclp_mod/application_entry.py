@@ -6,13 +6,13 @@ import os
 import sys
 import time
 import logging
-import threading
 
 from pathlib import Path
 
-from . import constants
+# Imported first, so import times of everything below are traced
+from .support import startup_trace
 
-from .wx_gui import gui_entry
+from . import constants
 
 from .detections import (
     device_probe,
@@ -25,7 +25,8 @@ from .support import (
     reroute_payloads,
     commit_info,
     logging_handler,
-    analytics_handler
+    analytics_handler,
+    startup_scheduler
 )
 
 
@@ -38,10 +39,14 @@ class OpenCoreLegacyPatcher:
         self.constants: constants.Constants = constants.Constants()
 
         logging_handler.InitializeLoggingSupport(self.constants)
+        startup_trace.set_path(self.constants.log_filepath)
 
         self._generate_base_data()
 
         if utilities.check_cli_args() is None:
+            # Only imported for the GUI, CLI paths don't need wxPython
+            with startup_trace.phase("Import wx_gui"):
+                from .wx_gui import gui_entry
             gui_entry.EntryPoint(self.constants).start()
 
 
@@ -59,31 +64,69 @@ class OpenCoreLegacyPatcher:
             logging.warning(f"当前运行目录无效,切换到: {_test_dir}")
 
 
-    def _generate_base_data(self) -> None:
+    def _schedule_base_data(self, scheduler: startup_scheduler.StartupScheduler) -> None:
         """
-        Generate base data required for the patcher to run
+        Register base data generation tasks
         """
+        scheduler.add("OSProbe",               self._probe_os)
+        scheduler.add("Computer.probe",        self._probe_computer)
+        scheduler.add("RoutePayloadDiskImage", lambda: reroute_payloads.RoutePayloadDiskImage(self.constants), background=True)
+        scheduler.add("commit_info",           self._generate_commit_info)
+        scheduler.add("GenerateDefaults",      lambda: defaults.GenerateDefaults(self.computer.real_model, True, self.constants), ["OSProbe", "Computer.probe"])
+        scheduler.add("Analytics",             lambda: analytics_handler.Analytics(self.constants).send_analytics(), ["commit_info", "GenerateDefaults"], background=True)
 
-        self.constants.wxpython_variant = True
 
-        # Ensure we live after parent process dies (ie. LaunchAgent)
-        os.setpgrp()
-
-        # Generate OS data
+    def _probe_os(self) -> None:
+        """
+        Generate OS data
+        """
         os_data = os_probe.OSProbe()
         self.constants.detected_os = os_data.detect_kernel_major()
         self.constants.detected_os_minor = os_data.detect_kernel_minor()
         self.constants.detected_os_build = os_data.detect_os_build()
         self.constants.detected_os_version = os_data.detect_os_version()
 
-        # Generate computer data
+
+    def _probe_computer(self) -> None:
+        """
+        Generate computer data
+        """
+        _probe_start = time.perf_counter()
         self.constants.computer = device_probe.Computer.probe()
         self.computer = self.constants.computer
+        _slowest_probes = sorted(self.computer.probe_timings.items(), key=lambda item: item[1], reverse=True)[:3]
+        logging.info(f"硬件探测耗时 {time.perf_counter() - _probe_start:.2f}s, 最慢: {', '.join(f'{name} {duration:.2f}s' for name, duration in _slowest_probes)}")
         self.constants.booted_oc_disk = utilities.find_disk_off_uuid(utilities.clean_device_path(self.computer.opencore_path))
         if self.constants.computer.firmware_vendor:
             if self.constants.computer.firmware_vendor != "Apple":
                 self.constants.host_is_hackintosh = True
 
+
+    def _generate_commit_info(self) -> None:
+        """
+        Generate commit info
+        """
+        self.constants.commit_info = commit_info.ParseCommitInfo(self.constants.launcher_binary).generate_commit_info()
+        if self.constants.commit_info[0] not in ["Running from source", "Built from source"]:
+            # Now that we have commit info, update nightly link
+            branch = self.constants.commit_info[0]
+            branch = branch.replace("refs/heads/", "")
+            self.constants.installer_pkg_url_nightly = self.constants.installer_pkg_url_nightly.replace("main", branch)
+
+
+    def _generate_base_data(self) -> None:
+        """
+        Generate base data required for the patcher to run
+
+        OS and hardware probing, payload mounting, commit info and analytics
+        run concurrently, see _schedule_base_data() for dependencies
+        """
+
+        self.constants.wxpython_variant = True
+
+        # Ensure we live after parent process dies (ie. LaunchAgent)
+        os.setpgrp()
+
         # Generate environment data
         self.constants.recovery_status = utilities.check_recovery()
         utilities.disable_cls()
@@ -100,21 +143,15 @@ class OpenCoreLegacyPatcher:
         self.constants.launcher_binary = launcher_binary
         self.constants.launcher_script = launcher_script
 
-        # Initialize working directory
-        self.constants.unpack_thread = threading.Thread(target=reroute_payloads.RoutePayloadDiskImage, args=(self.constants,))
-        self.constants.unpack_thread.start()
+        self.scheduler = startup_scheduler.StartupScheduler()
+        self._schedule_base_data(self.scheduler)
+        self.scheduler.start()
 
-        # Generate commit info
-        self.constants.commit_info = commit_info.ParseCommitInfo(self.constants.launcher_binary).generate_commit_info()
-        if self.constants.commit_info[0] not in ["Running from source", "Built from source"]:
-            # Now that we have commit info, update nightly link
-            branch = self.constants.commit_info[0]
-            branch = branch.replace("refs/heads/", "")
-            self.constants.installer_pkg_url_nightly = self.constants.installer_pkg_url_nightly.replace("main", branch)
+        # Initialize working directory
+        self.constants.unpack_thread = self.scheduler.thread("RoutePayloadDiskImage")
 
-        # Generate defaults
-        defaults.GenerateDefaults(self.computer.real_model, True, self.constants)
-        threading.Thread(target=analytics_handler.Analytics(self.constants).send_analytics).start()
+        self.scheduler.result("commit_info")
+        self.scheduler.result("GenerateDefaults")
 
         if utilities.check_cli_args() is None:
             self.constants.cli_mode = False
@@ -129,8 +166,7 @@ class OpenCoreLegacyPatcher:
         ignore_args = ignore_args.pop(0)
 
         if not any(x in sys.argv for x in ignore_args):
-            while self.constants.unpack_thread.is_alive():
-                time.sleep(self.constants.thread_sleep_interval)
+            self.scheduler.wait("RoutePayloadDiskImage")
 
         arguments.arguments(self.constants)
 
@@ -139,6 +139,7 @@ class Constants:
         self.gui_mode:                  bool = False  # Determine whether running in a GUI or TUI
         self.cli_mode:                  bool = True  #  Determine if running in CLI mode
         self.validate:                  bool = False  # Enable validation testing for CI
+        self.profile_build:             bool = False  # Profile OpenCore build phases (duration, file copies, bytes written)
         self.recovery_status:           bool = False  # Detect if booted into RecoveryOS
         self.ignore_updates:            bool = False  # Ignore OCLP updates
         self.wxpython_variant:          bool = False  # Determine if using wxPython variant
@@ -281,6 +282,10 @@ class Constants:
     def payload_local_binaries_root_path_dmg(self):
         return self.original_path / Path("Universal-Binaries.dmg")
 
+    @property
+    def payload_local_binaries_index_path(self):
+        return self.original_path / Path("Universal-Binaries.index.plist")
+
     @property
     def overlay_psp_path_dmg(self):
         return self.original_path / Path("laobamacInternalResources.dmg")
@@ -2,6 +2,8 @@
 pci_data.py: PCI Device IDs for different vendors and devices
 """
 
+from typing import Optional
+
 
 class nvidia_ids:
     # Courteous of envytools as well as MacRumors:
@@ -1461,3 +1463,102 @@ class atheros_ids:
         0x0037,  # AR9485 / AR8111
         0x8600,  # AR958x
     ]
+
+
+# Vendor ID, family and architecture/chipset (device_probe enum member name) of each list above
+PCI_ID_LISTS: list = [
+    (0x10DE, "GPU",      "Curie",                        nvidia_ids.curie_ids),
+    (0x10DE, "GPU",      "Tesla",                        nvidia_ids.tesla_ids),
+    (0x10DE, "GPU",      "Fermi",                        nvidia_ids.fermi_ids),
+    (0x10DE, "GPU",      "Kepler",                       nvidia_ids.kepler_ids),
+    (0x10DE, "GPU",      "Maxwell",                      nvidia_ids.maxwell_ids),
+    (0x10DE, "GPU",      "Pascal",                       nvidia_ids.pascal_ids),
+
+    (0x1002, "GPU",      "R500",                         amd_ids.r500_ids),
+    (0x1002, "GPU",      "Legacy_GCN_7000",              amd_ids.gcn_7000_ids),
+    (0x1002, "GPU",      "Legacy_GCN_8000",              amd_ids.gcn_8000_ids),
+    (0x1002, "GPU",      "Legacy_GCN_9000",              amd_ids.gcn_9000_ids),
+    (0x1002, "GPU",      "TeraScale_1",                  amd_ids.terascale_1_ids),
+    (0x1002, "GPU",      "TeraScale_2",                  amd_ids.terascale_2_ids),
+    (0x1002, "GPU",      "Polaris",                      amd_ids.polaris_ids),
+    (0x1002, "GPU",      "Polaris_Spoof",                amd_ids.polaris_spoof_ids),
+    (0x1002, "GPU",      "Vega",                         amd_ids.vega_ids),
+    (0x1002, "GPU",      "Navi",                         amd_ids.navi_ids),
+
+    (0x8086, "GPU",      "GMA_950",                      intel_ids.gma_950_ids),
+    (0x8086, "GPU",      "GMA_X3100",                    intel_ids.gma_x3100_ids),
+    (0x8086, "GPU",      "Iron_Lake",                    intel_ids.iron_ids),
+    (0x8086, "GPU",      "Sandy_Bridge",                 intel_ids.sandy_ids),
+    (0x8086, "GPU",      "Ivy_Bridge",                   intel_ids.ivy_ids),
+    (0x8086, "GPU",      "Haswell",                      intel_ids.haswell_ids),
+    (0x8086, "GPU",      "Broadwell",                    intel_ids.broadwell_ids),
+    (0x8086, "GPU",      "Skylake",                      intel_ids.skylake_ids),
+    (0x8086, "GPU",      "Kaby_Lake",                    intel_ids.kaby_lake_ids),
+    (0x8086, "GPU",      "Coffee_Lake",                  intel_ids.coffee_lake_ids),
+    (0x8086, "GPU",      "Comet_Lake",                   intel_ids.comet_lake_ids),
+    (0x8086, "GPU",      "Ice_Lake",                     intel_ids.ice_lake_ids),
+
+    (0x8086, "Ethernet", "AppleIntel8254XEthernet",      intel_ids.AppleIntel8254XEthernet),
+    (0x8086, "Ethernet", "AppleIntelI210Ethernet",       intel_ids.AppleIntelI210Ethernet),
+    (0x8086, "Ethernet", "Intel82574L",                  intel_ids.Intel82574L),
+    (0x14E4, "Ethernet", "AppleBCM5701Ethernet",         broadcom_ids.AppleBCM5701Ethernet),
+    (0x1D6A, "Ethernet", "AppleEthernetAquantiaAqtion",  aquantia_ids.AppleEthernetAquantiaAqtion),
+    (0x11AB, "Ethernet", "MarvelYukonEthernet",          marvell_ids.MarvelYukonEthernet),
+    (0x1148, "Ethernet", "MarvelYukonEthernet",          syskonnect_ids.MarvelYukonEthernet),
+
+    (0x14E4, "Wireless", "AppleBCMWLANBusInterfacePCIe", broadcom_ids.AppleBCMWLANBusInterfacePCIe),
+    (0x14E4, "Wireless", "AirportBrcmNIC",               broadcom_ids.AirPortBrcmNIC),
+    (0x14E4, "Wireless", "AirPortBrcmNICThirdParty",     broadcom_ids.AirPortBrcmNICThirdParty),
+    (0x14E4, "Wireless", "AirPortBrcm4360",              broadcom_ids.AirPortBrcm4360),
+    (0x14E4, "Wireless", "AirPortBrcm4331",              broadcom_ids.AirPortBrcm4331),
+    (0x14E4, "Wireless", "AirPortBrcm43224",             broadcom_ids.AppleAirPortBrcm43224),
+    (0x8086, "Wireless", "IntelWirelessIDs",             intelwl_ids.IntelWirelessIDs),
+    (0x168C, "Wireless", "AirPortAtheros40",             atheros_ids.AtherosWifi),
+    (0x10EC, "Wireless", "RealtekRTL88xx",               rtlwl_ids.RealtekWirelessIDs),
+]
+
+
+def _compile_pci_id_table() -> dict:
+    """
+    (vendor ID, device ID) -> (family, architecture/chipset)
+
+    Device IDs are only unique per vendor, hence the vendor ID in the key.
+    If an ID is listed under two architectures, the first listed wins (PCI_ID_LISTS
+    follows the order device_probe used to check them in). Such duplicates are
+    reported by find_pci_id_conflicts() during validation.
+    """
+    table = {}
+    for vendor_id, family, arch, device_ids in PCI_ID_LISTS:
+        for device_id in device_ids:
+            table.setdefault((vendor_id, device_id), (family, arch))
+    return table
+
+
+def find_pci_id_conflicts() -> list:
+    """
+    IDs listed under more than one architecture/chipset
+
+    Returns:
+        list: (vendor ID, device ID, (family, arch) used, (family, arch) ignored) for each duplicate
+    """
+    conflicts = []
+    seen = {}
+    for vendor_id, family, arch, device_ids in PCI_ID_LISTS:
+        for device_id in device_ids:
+            first = seen.setdefault((vendor_id, device_id), (family, arch))
+            if first != (family, arch):
+                conflicts.append((vendor_id, device_id, first, (family, arch)))
+    return conflicts
+
+
+pci_id_table: dict = _compile_pci_id_table()
+
+
+def lookup(vendor_id: int, device_id: int, family: str) -> Optional[str]:
+    """
+    Architecture/chipset of a device in family, None if not listed
+    """
+    entry = pci_id_table.get((vendor_id, device_id))
+    if entry is None or entry[0] != family:
+        return None
+    return entry[1]
@@ -22,6 +22,8 @@ Reference:
   https://github.com/acidanthera/OpenCorePkg/blob/master/Library/OcMacInfoLib/AutoGenerated.c
 """
 
+from typing import Optional, TYPE_CHECKING
+
 from ..detections import device_probe
 
 from . import (
@@ -30,6 +32,9 @@ from . import (
     bluetooth_data
 )
 
+if TYPE_CHECKING:
+    from .smbios_table import SMBIOSTable, SMBIOSModel
+
 
 smbios_dictionary = {
     "MacBook1,1": {
@@ -3233,3 +3238,25 @@ smbios_dictionary = {
         "Stock Storage": [],
     },
 }
+
+
+_table = None
+
+
+def table() -> "SMBIOSTable":
+    """
+    Typed, indexed view of smbios_dictionary, built on first use
+    """
+    global _table
+    if _table is None:
+        # Imported here as creating the record class is comparable in cost to the dictionary itself
+        from .smbios_table import SMBIOSTable
+        _table = SMBIOSTable(smbios_dictionary)
+    return _table
+
+
+def get_model(identifier: str) -> Optional["SMBIOSModel"]:
+    """
+    Typed entry of a model identifier, None if unknown
+    """
+    return table().models.get(identifier)
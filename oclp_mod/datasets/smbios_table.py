@@ -0,0 +1,107 @@
+"""
+smbios_table.py: Typed records and a Board ID index for smbios_data
+
+Usage:
+>>> smbios_data.get_model("MacBookPro11,3").cpu_generation
+7
+>>> smbios_data.table().by_board_id("Mac-2BD1B31983FE1663").identifier
+'MacBookPro11,3'
+"""
+
+import enum
+
+from dataclasses import dataclass
+from typing      import Optional
+
+
+# smbios_dictionary key -> SMBIOSModel field, keys absent from an entry are None
+SMBIOS_MODEL_KEYS: dict = {
+    "Marketing Name":   "marketing_name",
+    "Board ID":         "board_id",
+    "FirmwareFeatures": "firmware_features",
+    "SecureBootModel":  "secure_boot_model",
+    "CPU Generation":   "cpu_generation",
+    "Max OS Supported": "max_os_supported",
+    "Wireless Model":   "wireless_model",
+    "Bluetooth Model":  "bluetooth_model",
+    "Screen Size":      "screen_size",
+    "Ethernet Chipset": "ethernet_chipset",
+    "Socketed GPUs":    "socketed_gpus",
+}
+
+# smbios_dictionary key -> SMBIOSModel field, set if the key is present
+SMBIOS_MODEL_FLAGS: dict = {
+    "UGA Graphics":             "uga_graphics",
+    "nForce Chipset":           "nforce_chipset",
+    "Switchable GPUs":          "switchable_gpus",
+    "Dual DisplayPort Display": "dual_displayport_display",
+    "Legacy iSight":            "legacy_isight",
+}
+
+
+@dataclass(frozen=True, slots=True)
+class SMBIOSModel:
+    """
+    Typed smbios_dictionary entry
+    """
+    identifier:               str
+    marketing_name:           Optional[str]
+    board_id:                 Optional[str]
+    firmware_features:        Optional[str]
+    secure_boot_model:        Optional[str]
+    cpu_generation:           Optional[int]
+    max_os_supported:         Optional[int]
+    wireless_model:           Optional[enum.Enum]
+    bluetooth_model:          Optional[int]
+    screen_size:              Optional[int]
+    ethernet_chipset:         Optional[str]
+    socketed_gpus:            Optional[str]
+    stock_gpus:               tuple
+    stock_storage:            tuple
+    uga_graphics:             bool
+    nforce_chipset:           bool
+    switchable_gpus:          bool
+    dual_displayport_display: bool
+    legacy_isight:            bool
+
+
+    @classmethod
+    def from_entry(cls, identifier: str, entry: dict) -> "SMBIOSModel":
+        fields = {field: entry.get(key) for key, field in SMBIOS_MODEL_KEYS.items()}
+        fields.update({field: key in entry for key, field in SMBIOS_MODEL_FLAGS.items()})
+        return cls(
+            identifier=identifier,
+            stock_gpus=tuple(entry.get("Stock GPUs", [])),
+            stock_storage=tuple(entry.get("Stock Storage", [])),
+            **fields,
+        )
+
+
+class SMBIOSTable:
+    """
+    SMBIOSModel records with a secondary index by Board ID
+
+    Built on first use from smbios_dictionary, see smbios_data.table()
+    """
+
+    def __init__(self, dictionary: dict) -> None:
+        self.models: dict = {}
+
+        self._by_board_id: dict = {}
+
+        for identifier, entry in dictionary.items():
+            model = SMBIOSModel.from_entry(identifier, entry)
+            self.models[identifier] = model
+
+            for board in [model.board_id, model.secure_boot_model]:
+                if board is not None:
+                    # Duplicate boards resolve to the first model listed
+                    self._by_board_id.setdefault(board, model)
+
+
+    def by_board_id(self, board: str) -> Optional[SMBIOSModel]:
+        """
+        Model with a matching Board ID or SecureBootModel
+        """
+        return self._by_board_id.get(board)
+
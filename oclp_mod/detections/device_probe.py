@@ -3,6 +3,8 @@ device_probe.py: Hardware probing
 """
 
 import enum
+import time
+import functools
 import itertools
 import subprocess
 import plistlib
@@ -10,6 +12,7 @@ import hashlib
 import re
 
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 from dataclasses import dataclass, field
 from typing import Any, ClassVar, Optional, Type, Union
 
@@ -23,10 +26,22 @@ from ..datasets import (
 )
 
 
+PROBE_WORKERS: int = 8
+
+
 def class_code_to_bytes(class_code: int) -> bytes:
     return class_code.to_bytes(4, byteorder="little")
 
 
+def _run(args: list, **kwargs) -> subprocess.CompletedProcess:
+    """
+    subprocess.run, served by the ioreg backend when replaying a snapshot
+    """
+    if ioreg.backend is not None and hasattr(ioreg.backend, "run"):
+        return ioreg.backend.run(args)
+    return subprocess.run(args, **kwargs)
+
+
 @dataclass
 class CPU:
     name: str
@@ -152,8 +167,10 @@ class PCIDevice:
         }
 
     @classmethod
-    def from_ioregistry(cls, entry: ioreg.io_registry_entry_t, anti_spoof=False):
-        properties: dict = ioreg.corefoundation_to_native(ioreg.IORegistryEntryCreateCFProperties(entry, None, ioreg.kCFAllocatorDefault, ioreg.kNilOptions)[1])  # type: ignore
+    def from_ioregistry(cls, entry: ioreg.io_registry_entry_t, anti_spoof=False, properties: Optional[dict] = None, path_cache: Optional[dict] = None):
+        # properties and path_cache are provided by PCIDeviceTable, avoiding re-reading the registry
+        if properties is None:
+            properties: dict = ioreg.corefoundation_to_native(ioreg.IORegistryEntryCreateCFProperties(entry, None, ioreg.kCFAllocatorDefault, ioreg.kNilOptions)[1])  # type: ignore
 
         vendor_id = None
         device_id = None
@@ -193,64 +210,97 @@ class PCIDevice:
 
         device.vendor_id_unspoofed = vendor_id_unspoofed
         device.device_id_unspoofed = device_id_unspoofed
-        device.populate_pci_path(entry)
+        device.populate_pci_path(entry, path_cache)
         return device
 
+    @classmethod
+    def from_pci_entry(cls, pci_entry: "PCIRegistryEntry", table: "PCIDeviceTable", **kwargs):
+        return cls.from_ioregistry(pci_entry.entry, properties=pci_entry.properties, path_cache=table.path_cache, **kwargs)
+
     def vendor_detect(self, *, inherits: Optional[Type["PCIDevice"]] = None, classes: Optional[list] = None):
-        for i in classes or itertools.chain.from_iterable([subclass.__subclasses__() for subclass in PCIDevice.__subclasses__()]):
+        for i in classes or PCIDevice._vendor_classes().get(self.vendor_id, []):
             if issubclass(i, inherits or object) and i.detect(self):
                 return i
         return None
 
+    @staticmethod
+    @functools.cache
+    def _vendor_classes() -> dict:
+        """
+        Vendor ID -> vendor classes (ie. NVIDIA, Broadcom), in subclass definition order
+        """
+        vendor_classes = {}
+        for i in itertools.chain.from_iterable([subclass.__subclasses__() for subclass in PCIDevice.__subclasses__()]):
+            vendor_classes.setdefault(getattr(i, "VENDOR_ID", None), []).append(i)
+        return vendor_classes
+
     @classmethod
     def detect(cls, device):
         return device.vendor_id == cls.VENDOR_ID and ((device.class_code in cls.CLASS_CODES) if getattr(cls, "CLASS_CODES", None) else True) and ((device.class_code == cls.CLASS_CODE) if getattr(cls, "CLASS_CODE", None) else True)  # type: ignore  # pylint: disable=no-member
 
-    def populate_pci_path(self, original_entry: ioreg.io_registry_entry_t):
+    def populate_pci_path(self, original_entry: ioreg.io_registry_entry_t, path_cache: Optional[dict] = None):
         # Based off gfxutil logic, seems to work.
-        paths = []
-        entry = original_entry
-        while entry:
-            if ioreg.IOObjectConformsTo(entry, "IOPCIDevice".encode()):
-                # Virtual PCI devices provide a botched IOService path (us.electronic.kext.vusb)
-                # We only care about physical devices, so skip them
-                try:
-                    # Extract location string and handle possible non-numeric prefixes
-                    location_str = ioreg.io_name_t_to_str(ioreg.IORegistryEntryGetLocationInPlane(entry, "IOService".encode(), None)[1])
-                    location_parts = location_str.split(",")
-                    
-                    location_hex = []
-                    for i in location_parts + ["0"]:
-                        i_clean = i.strip()
-                        # Try to extract numeric part from end of string
-                        match = re.search(r'(\d+)$', i_clean)
-                        if match:
-                            # Use the numeric part found
-                            location_hex.append(hex(int(match.group(1))))
-                        elif i_clean and i_clean.isdigit():
-                            # Already a plain number
-                            location_hex.append(hex(int(i_clean)))
-                        else:
-                            # Cannot parse, use default 0
-                            location_hex.append("0x0")
-                    
-                    paths.append(f"Pci({location_hex[0]},{location_hex[1]})")
-                except ValueError:
-                    break
-            elif ioreg.IOObjectConformsTo(entry, "IOACPIPlatformDevice".encode()):
-                paths.append(f"PciRoot({hex(int(ioreg.corefoundation_to_native(ioreg.IORegistryEntryCreateCFProperty(entry, '_UID', ioreg.kCFAllocatorDefault, ioreg.kNilOptions)) or 0))})")  # type: ignore
-                break
-            elif ioreg.IOObjectConformsTo(entry, "IOPCIBridge".encode()):
-                pass
-            else:
-                # There's something in between that's not PCI! Abort
-                paths = []
-                break
-            parent = ioreg.IORegistryEntryGetParentEntry(entry, "IOService".encode(), None)[1]
-            if entry != original_entry:
-                ioreg.IOObjectRelease(entry)
-            entry = parent
-        self.pci_path = "/".join(reversed(paths))
+        paths = _pci_path_components(original_entry, path_cache if path_cache is not None else {})
+        self.pci_path = "/".join(reversed(paths or []))
+
+
+def _pci_path_components(entry: ioreg.io_registry_entry_t, path_cache: dict) -> Optional[list]:
+    """
+    Device path components from entry up to its PciRoot, None if a non-PCI entry is in between
+
+    Components are memoized per registry entry in path_cache, so devices sharing bridges only walk them once
+    """
+    entry_id = ioreg.IORegistryEntryGetRegistryEntryID(entry, None)[1]
+    if entry_id in path_cache:
+        return path_cache[entry_id]
+
+    paths = []
+    walk_parent = True
+    if ioreg.IOObjectConformsTo(entry, "IOPCIDevice".encode()):
+        # Virtual PCI devices provide a botched IOService path (us.electronic.kext.vusb)
+        # We only care about physical devices, so skip them
+        try:
+            # Extract location string and handle possible non-numeric prefixes
+            location_str = ioreg.io_name_t_to_str(ioreg.IORegistryEntryGetLocationInPlane(entry, "IOService".encode(), None)[1])
+            location_parts = location_str.split(",")
+
+            location_hex = []
+            for i in location_parts + ["0"]:
+                i_clean = i.strip()
+                # Try to extract numeric part from end of string
+                match = re.search(r'(\d+)$', i_clean)
+                if match:
+                    # Use the numeric part found
+                    location_hex.append(hex(int(match.group(1))))
+                elif i_clean and i_clean.isdigit():
+                    # Already a plain number
+                    location_hex.append(hex(int(i_clean)))
+                else:
+                    # Cannot parse, use default 0
+                    location_hex.append("0x0")
+
+            paths.append(f"Pci({location_hex[0]},{location_hex[1]})")
+        except ValueError:
+            walk_parent = False
+    elif ioreg.IOObjectConformsTo(entry, "IOACPIPlatformDevice".encode()):
+        paths.append(f"PciRoot({hex(int(ioreg.corefoundation_to_native(ioreg.IORegistryEntryCreateCFProperty(entry, '_UID', ioreg.kCFAllocatorDefault, ioreg.kNilOptions)) or 0))})")  # type: ignore
+        walk_parent = False
+    elif ioreg.IOObjectConformsTo(entry, "IOPCIBridge".encode()):
+        pass
+    else:
+        # There's something in between that's not PCI! Abort
+        path_cache[entry_id] = None
+        return None
+
+    if walk_parent:
+        parent = ioreg.IORegistryEntryGetParentEntry(entry, "IOService".encode(), None)[1]
+        if parent:
+            parent_paths = _pci_path_components(parent, path_cache)
+            ioreg.IOObjectRelease(parent)
+            paths = None if parent_paths is None else paths + parent_paths
+
+    path_cache[entry_id] = paths
+    return paths
 
 
 @dataclass
@@ -275,8 +325,8 @@ class WirelessCard(PCIDevice):
         self.detect_chipset()
 
     @classmethod
-    def from_ioregistry(cls, entry: ioreg.io_registry_entry_t, anti_spoof=True):
-        device = super().from_ioregistry(entry, anti_spoof=anti_spoof)
+    def from_ioregistry(cls, entry: ioreg.io_registry_entry_t, anti_spoof=True, **kwargs):
+        device = super().from_ioregistry(entry, anti_spoof=anti_spoof, **kwargs)
 
         matching_dict = {
             "IOParentMatch": ioreg.corefoundation_to_native(ioreg.IORegistryEntryIDMatching(ioreg.IORegistryEntryGetRegistryEntryID(entry, None)[1])),
@@ -307,8 +357,8 @@ class NVMeController(PCIDevice):
     # parent_aspm: Optional[int] = None
 
     @classmethod
-    def from_ioregistry(cls, entry: ioreg.io_registry_entry_t, anti_spoof=True):
-        device = super().from_ioregistry(entry, anti_spoof=anti_spoof)
+    def from_ioregistry(cls, entry: ioreg.io_registry_entry_t, anti_spoof=True, **kwargs):
+        device = super().from_ioregistry(entry, anti_spoof=anti_spoof, **kwargs)
 
         device.aspm: Union[int, bytes] = ioreg.corefoundation_to_native(ioreg.IORegistryEntryCreateCFProperty(entry, "pci-aspm-default", ioreg.kCFAllocatorDefault, ioreg.kNilOptions)) or 0  # type: ignore
         if isinstance(device.aspm, bytes):
@@ -378,21 +428,7 @@ class NVIDIA(GPU):
     arch: Archs = field(init=False)
 
     def detect_arch(self):
-        # G80/G80GL
-        if self.device_id in pci_data.nvidia_ids.curie_ids:
-            self.arch = NVIDIA.Archs.Curie
-        elif self.device_id in pci_data.nvidia_ids.tesla_ids:
-            self.arch = NVIDIA.Archs.Tesla
-        elif self.device_id in pci_data.nvidia_ids.fermi_ids:
-            self.arch = NVIDIA.Archs.Fermi
-        elif self.device_id in pci_data.nvidia_ids.kepler_ids:
-            self.arch = NVIDIA.Archs.Kepler
-        elif self.device_id in pci_data.nvidia_ids.maxwell_ids:
-            self.arch = NVIDIA.Archs.Maxwell
-        elif self.device_id in pci_data.nvidia_ids.pascal_ids:
-            self.arch = NVIDIA.Archs.Pascal
-        else:
-            self.arch = NVIDIA.Archs.Unknown
+        self.arch = NVIDIA.Archs[pci_data.lookup(self.VENDOR_ID, self.device_id, "GPU") or "Unknown"]
 
 @dataclass
 class NVIDIAEthernet(EthernetController):
@@ -428,28 +464,7 @@ class AMD(GPU):
     arch: Archs = field(init=False)
 
     def detect_arch(self):
-        if self.device_id in pci_data.amd_ids.r500_ids:
-            self.arch = AMD.Archs.R500
-        elif self.device_id in pci_data.amd_ids.gcn_7000_ids:
-            self.arch = AMD.Archs.Legacy_GCN_7000
-        elif self.device_id in pci_data.amd_ids.gcn_8000_ids:
-            self.arch = AMD.Archs.Legacy_GCN_8000
-        elif self.device_id in pci_data.amd_ids.gcn_9000_ids:
-            self.arch = AMD.Archs.Legacy_GCN_9000
-        elif self.device_id in pci_data.amd_ids.terascale_1_ids:
-            self.arch = AMD.Archs.TeraScale_1
-        elif self.device_id in pci_data.amd_ids.terascale_2_ids:
-            self.arch = AMD.Archs.TeraScale_2
-        elif self.device_id in pci_data.amd_ids.polaris_ids:
-            self.arch = AMD.Archs.Polaris
-        elif self.device_id in pci_data.amd_ids.polaris_spoof_ids:
-            self.arch = AMD.Archs.Polaris_Spoof
-        elif self.device_id in pci_data.amd_ids.vega_ids:
-            self.arch = AMD.Archs.Vega
-        elif self.device_id in pci_data.amd_ids.navi_ids:
-            self.arch = AMD.Archs.Navi
-        else:
-            self.arch = AMD.Archs.Unknown
+        self.arch = AMD.Archs[pci_data.lookup(self.VENDOR_ID, self.device_id, "GPU") or "Unknown"]
 
 
 @dataclass
@@ -475,32 +490,7 @@ class Intel(GPU):
     arch: Archs = field(init=False)
 
     def detect_arch(self):
-        if self.device_id in pci_data.intel_ids.gma_950_ids:
-            self.arch = Intel.Archs.GMA_950
-        elif self.device_id in pci_data.intel_ids.gma_x3100_ids:
-            self.arch = Intel.Archs.GMA_X3100
-        elif self.device_id in pci_data.intel_ids.iron_ids:
-            self.arch = Intel.Archs.Iron_Lake
-        elif self.device_id in pci_data.intel_ids.sandy_ids:
-            self.arch = Intel.Archs.Sandy_Bridge
-        elif self.device_id in pci_data.intel_ids.ivy_ids:
-            self.arch = Intel.Archs.Ivy_Bridge
-        elif self.device_id in pci_data.intel_ids.haswell_ids:
-            self.arch = Intel.Archs.Haswell
-        elif self.device_id in pci_data.intel_ids.broadwell_ids:
-            self.arch = Intel.Archs.Broadwell
-        elif self.device_id in pci_data.intel_ids.skylake_ids:
-            self.arch = Intel.Archs.Skylake
-        elif self.device_id in pci_data.intel_ids.kaby_lake_ids:
-            self.arch = Intel.Archs.Kaby_Lake
-        elif self.device_id in pci_data.intel_ids.coffee_lake_ids:
-            self.arch = Intel.Archs.Coffee_Lake
-        elif self.device_id in pci_data.intel_ids.comet_lake_ids:
-            self.arch = Intel.Archs.Comet_Lake
-        elif self.device_id in pci_data.intel_ids.ice_lake_ids:
-            self.arch = Intel.Archs.Ice_Lake
-        else:
-            self.arch = Intel.Archs.Unknown
+        self.arch = Intel.Archs[pci_data.lookup(self.VENDOR_ID, self.device_id, "GPU") or "Unknown"]
 
 @dataclass
 class IntelEthernet(EthernetController):
@@ -515,14 +505,7 @@ class IntelEthernet(EthernetController):
     chipset: Chipsets = field(init=False)
 
     def detect_chipset(self):
-        if self.device_id in pci_data.intel_ids.AppleIntel8254XEthernet:
-            self.chipset = IntelEthernet.Chipsets.AppleIntel8254XEthernet
-        elif self.device_id in pci_data.intel_ids.AppleIntelI210Ethernet:
-            self.chipset = IntelEthernet.Chipsets.AppleIntelI210Ethernet
-        elif self.device_id in pci_data.intel_ids.Intel82574L:
-            self.chipset = IntelEthernet.Chipsets.Intel82574L
-        else:
-            self.chipset = IntelEthernet.Chipsets.Unknown
+        self.chipset = IntelEthernet.Chipsets[pci_data.lookup(self.VENDOR_ID, self.device_id, "Ethernet") or "Unknown"]
 
 @dataclass
 class Broadcom(WirelessCard):
@@ -541,20 +524,7 @@ class Broadcom(WirelessCard):
     chipset: Chipsets = field(init=False)
 
     def detect_chipset(self):
-        if self.device_id in pci_data.broadcom_ids.AppleBCMWLANBusInterfacePCIe:
-            self.chipset = Broadcom.Chipsets.AppleBCMWLANBusInterfacePCIe
-        elif self.device_id in pci_data.broadcom_ids.AirPortBrcmNIC:
-            self.chipset = Broadcom.Chipsets.AirportBrcmNIC
-        elif self.device_id in pci_data.broadcom_ids.AirPortBrcmNICThirdParty:
-            self.chipset = Broadcom.Chipsets.AirPortBrcmNICThirdParty
-        elif self.device_id in pci_data.broadcom_ids.AirPortBrcm4360:
-            self.chipset = Broadcom.Chipsets.AirPortBrcm4360
-        elif self.device_id in pci_data.broadcom_ids.AirPortBrcm4331:
-            self.chipset = Broadcom.Chipsets.AirPortBrcm4331
-        elif self.device_id in pci_data.broadcom_ids.AppleAirPortBrcm43224:
-            self.chipset = Broadcom.Chipsets.AirPortBrcm43224
-        else:
-            self.chipset = Broadcom.Chipsets.Unknown
+        self.chipset = Broadcom.Chipsets[pci_data.lookup(self.VENDOR_ID, self.device_id, "Wireless") or "Unknown"]
 
 @dataclass
 class IntelWirelessCard(WirelessCard):
@@ -567,10 +537,7 @@ class IntelWirelessCard(WirelessCard):
     chipset: Chipsets = field(init=False)
 
     def detect_chipset(self):
-        if self.device_id in pci_data.intelwl_ids.IntelWirelessIDs:
-            self.chipset = IntelWirelessCard.Chipsets.IntelWirelessIDs
-        else:
-            self.chipset = IntelWirelessCard.Chipsets.Unknown
+        self.chipset = IntelWirelessCard.Chipsets[pci_data.lookup(self.VENDOR_ID, self.device_id, "Wireless") or "Unknown"]
 
 @dataclass
 class BroadcomEthernet(EthernetController):
@@ -583,10 +550,7 @@ class BroadcomEthernet(EthernetController):
     chipset: Chipsets = field(init=False)
 
     def detect_chipset(self):
-        if self.device_id in pci_data.broadcom_ids.AppleBCM5701Ethernet:
-            self.chipset = BroadcomEthernet.Chipsets.AppleBCM5701Ethernet
-        else:
-            self.chipset = BroadcomEthernet.Chipsets.Unknown
+        self.chipset = BroadcomEthernet.Chipsets[pci_data.lookup(self.VENDOR_ID, self.device_id, "Ethernet") or "Unknown"]
 
 @dataclass
 class Atheros(WirelessCard):
@@ -601,10 +565,7 @@ class Atheros(WirelessCard):
     chipset: Chipsets = field(init=False)
 
     def detect_chipset(self):
-        if self.device_id in pci_data.atheros_ids.AtherosWifi:
-            self.chipset = Atheros.Chipsets.AirPortAtheros40
-        else:
-            self.chipset = Atheros.Chipsets.Unknown
+        self.chipset = Atheros.Chipsets[pci_data.lookup(self.VENDOR_ID, self.device_id, "Wireless") or "Unknown"]
 
 @dataclass
 class Realtek(WirelessCard):
@@ -619,10 +580,7 @@ class Realtek(WirelessCard):
     chipset: Chipsets = field(init=False)
 
     def detect_chipset(self):
-        if self.device_id in pci_data.rtlwl_ids.RealtekWirelessIDs:
-            self.chipset = Realtek.Chipsets.RealtekRTL88xx
-        else:
-            self.chipset = Realtek.Chipsets.Unknown
+        self.chipset = Realtek.Chipsets[pci_data.lookup(self.VENDOR_ID, self.device_id, "Wireless") or "Unknown"]
 
 @dataclass
 class IntelHDAController(HDAController):
@@ -635,10 +593,7 @@ class IntelHDAController(HDAController):
     chipset: Chipsets = field(init=False)
 
     def detect_chipset(self):
-        if self.device_id in pci_data.intelaudio_ids.IntelAudioIDs:
-            self.chipset = IntelHDAController.Chipsets.IntelAudioIDs
-        else:
-            self.chipset = IntelHDAController.Chipsets.Unknown
+        self.chipset = IntelHDAController.Chipsets[pci_data.lookup(self.VENDOR_ID, self.device_id, "Audio") or "Unknown"]
 
 @dataclass
 class Aquantia(EthernetController):
@@ -652,10 +607,7 @@ class Aquantia(EthernetController):
     chipset: Chipsets = field(init=False)
 
     def detect_chipset(self):
-        if self.device_id in pci_data.aquantia_ids.AppleEthernetAquantiaAqtion:
-            self.chipset = Aquantia.Chipsets.AppleEthernetAquantiaAqtion
-        else:
-            self.chipset = Aquantia.Chipsets.Unknown
+        self.chipset = Aquantia.Chipsets[pci_data.lookup(self.VENDOR_ID, self.device_id, "Ethernet") or "Unknown"]
 
 @dataclass
 class Marvell(EthernetController):
@@ -668,10 +620,7 @@ class Marvell(EthernetController):
     chipset: Chipsets = field(init=False)
 
     def detect_chipset(self):
-        if self.device_id in pci_data.marvell_ids.MarvelYukonEthernet:
-            self.chipset = Marvell.Chipsets.MarvelYukonEthernet
-        else:
-            self.chipset = Marvell.Chipsets.Unknown
+        self.chipset = Marvell.Chipsets[pci_data.lookup(self.VENDOR_ID, self.device_id, "Ethernet") or "Unknown"]
 
 @dataclass
 class SysKonnect(EthernetController):
@@ -684,10 +633,83 @@ class SysKonnect(EthernetController):
     chipset: Chipsets = field(init=False)
 
     def detect_chipset(self):
-        if self.device_id in pci_data.syskonnect_ids.MarvelYukonEthernet:
-            self.chipset = SysKonnect.Chipsets.MarvelYukonEthernet
-        else:
-            self.chipset = SysKonnect.Chipsets.Unknown
+        self.chipset = SysKonnect.Chipsets[pci_data.lookup(self.VENDOR_ID, self.device_id, "Ethernet") or "Unknown"]
+
+
+@dataclass
+class PCIRegistryEntry:
+    entry:      ioreg.io_registry_entry_t
+    name:       str
+    properties: dict
+    position:   int  # Registry enumeration order
+
+
+class PCIDeviceTable:
+    """
+    IOPCIDevice entries enumerated once per probe session
+
+    Entries are indexed by class code, vendor, name and ACPI path, replacing per-probe
+    IOServiceGetMatchingServices walks. Device path components are memoized per
+    registry entry in path_cache.
+    """
+
+    def __init__(self) -> None:
+        self.entries:    list[PCIRegistryEntry] = []
+        self.path_cache: dict = {}
+
+        self._by_class_code: dict = {}
+        self._by_vendor:     dict = {}
+        self._by_name:       dict = {}
+        self._by_acpi_path:  dict = {}
+
+        for entry in ioreg.ioiterator_to_list(ioreg.IOServiceGetMatchingServices(ioreg.kIOMasterPortDefault, {"IOProviderClass": "IOPCIDevice"}, None)[1]):
+            properties = ioreg.corefoundation_to_native(ioreg.IORegistryEntryCreateCFProperties(entry, None, ioreg.kCFAllocatorDefault, ioreg.kNilOptions)[1]) or {}
+            pci_entry = PCIRegistryEntry(entry, ioreg.io_name_t_to_str(ioreg.IORegistryEntryGetName(entry, None)[1]), properties, len(self.entries))
+            self.entries.append(pci_entry)
+
+            # Keyed the same way as IOPropertyMatch compares class-code
+            self._by_class_code.setdefault(bytes(properties.get("class-code", b"")), []).append(pci_entry)
+            if "vendor-id" in properties:
+                self._by_vendor.setdefault(int.from_bytes(properties["vendor-id"][:4], byteorder="little"), []).append(pci_entry)
+            for name in [pci_entry.name, properties.get("IOName")]:
+                if isinstance(name, bytes):
+                    name = name.strip(b"\0").decode()
+                if name:
+                    self._by_name.setdefault(name, pci_entry)
+            if "acpi-path" in properties:
+                self._by_acpi_path[properties["acpi-path"]] = pci_entry
+
+
+    def with_class_codes(self, class_codes: list[int]) -> list[PCIRegistryEntry]:
+        """
+        Entries matching any of the class codes, in registry order
+        """
+        if len(class_codes) == 1:
+            return list(self._by_class_code.get(class_code_to_bytes(class_codes[0]), []))
+        matched = [pci_entry for class_code in class_codes for pci_entry in self._by_class_code.get(class_code_to_bytes(class_code), [])]
+        return sorted(matched, key=lambda pci_entry: pci_entry.position)
+
+
+    def with_vendor(self, vendor_id: int) -> list[PCIRegistryEntry]:
+        return list(self._by_vendor.get(vendor_id, []))
+
+
+    def named(self, name: str) -> Optional[PCIRegistryEntry]:
+        return self._by_name.get(name)
+
+
+    def at_acpi_path(self, acpi_path: str) -> Optional[PCIRegistryEntry]:
+        return self._by_acpi_path.get(acpi_path)
+
+
+    def release(self) -> None:
+        for pci_entry in self.entries:
+            ioreg.IOObjectRelease(pci_entry.entry)
+        self.entries = []
+        self._by_class_code = {}
+        self._by_vendor = {}
+        self._by_name = {}
+        self._by_acpi_path = {}
 
 
 @dataclass
@@ -727,31 +749,80 @@ class Computer:
     oclp_sys_signed: Optional[bool] = False
     firmware_vendor: Optional[str] = None
     rosetta_active: Optional[bool] = False
+    probe_timings: dict = field(default_factory=dict, repr=False, compare=False)  # Probe name -> seconds taken
+    _pci_device_table: Optional[PCIDeviceTable] = field(default=None, repr=False, compare=False)
+
+    # Probes run by probe(), in serial order, alongside the probes whose results they consume
+    # Each probe only writes its own attributes, so independent probes can run concurrently
+    PROBES: ClassVar[dict] = {
+        "pci_probe":                  [],
+        "gpu_probe":                  ["pci_probe"],
+        "dgpu_probe":                 ["pci_probe"],
+        "igpu_probe":                 ["pci_probe"],
+        "wifi_probe":                 ["pci_probe"],
+        "storage_probe":              ["pci_probe"],
+        "usb_controller_probe":       ["pci_probe"],
+        "sdxc_controller_probe":      ["pci_probe"],
+        "ethernet_probe":             ["pci_probe"],
+        "smbios_probe":               [],
+        "usb_device_probe":           [],
+        "cpu_probe":                  [],
+        "bluetooth_probe":            ["usb_device_probe"],
+        "topcase_probe":              ["usb_device_probe"],
+        "t1_probe":                   ["usb_device_probe"],
+        "ambient_light_sensor_probe": [],
+        "pcie_webcam_probe":          [],
+        "sata_disk_probe":            [],
+        "oclp_sys_patch_probe":       [],
+        "check_rosetta":              [],
+    }
 
     @staticmethod
-    def probe():
+    def probe(concurrent: bool = True):
         computer = Computer()
-        computer.gpu_probe()
-        computer.dgpu_probe()
-        computer.igpu_probe()
-        computer.wifi_probe()
-        computer.storage_probe()
-        computer.usb_controller_probe()
-        computer.sdxc_controller_probe()
-        computer.ethernet_probe()
-        computer.smbios_probe()
-        computer.usb_device_probe()
-        computer.cpu_probe()
-        computer.bluetooth_probe()
-        computer.topcase_probe()
-        computer.t1_probe()
-        computer.ambient_light_sensor_probe()
-        computer.pcie_webcam_probe()
-        computer.sata_disk_probe()
-        computer.oclp_sys_patch_probe()
-        computer.check_rosetta()
+        if concurrent is False:
+            for name in Computer.PROBES:
+                computer._run_probe(name)
+            computer._release_pci_device_table()
+            return computer
+
+        pending   = dict(Computer.PROBES)
+        running   = {}
+        completed = set()
+        with ThreadPoolExecutor(max_workers=PROBE_WORKERS) as executor:
+            while pending or running:
+                for name, dependencies in list(pending.items()):
+                    if all(dependency in completed for dependency in dependencies):
+                        running[executor.submit(computer._run_probe, name)] = name
+                        pending.pop(name)
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    future.result()
+                    completed.add(running.pop(future))
+        computer._release_pci_device_table()
         return computer
 
+    def _run_probe(self, name: str) -> None:
+        start = time.perf_counter()
+        getattr(self, name)()
+        self.probe_timings[name] = time.perf_counter() - start
+
+    def pci_probe(self) -> None:
+        self.pci_device_table()
+
+    def pci_device_table(self) -> PCIDeviceTable:
+        """
+        IOPCIDevice entries shared by the PCI probes, enumerated on first use
+        """
+        if self._pci_device_table is None:
+            self._pci_device_table = PCIDeviceTable()
+        return self._pci_device_table
+
+    def _release_pci_device_table(self) -> None:
+        if self._pci_device_table is not None:
+            self._pci_device_table.release()
+            self._pci_device_table = None
+
 
     def usb_device_probe(self):
         devices = ioreg.ioiterator_to_list(
@@ -768,56 +839,42 @@ class Computer:
 
 
     def gpu_probe(self):
-        # Chain together two iterators: one for class code 03:00:00, the other for class code 03:80:00
-        devices = ioreg.ioiterator_to_list(
-            ioreg.IOServiceGetMatchingServices(
-                ioreg.kIOMasterPortDefault, GPU.class_code_matching_dict(), None
-            )[1]
-        )
-
-        for device in devices:
-            vendor: Type[GPU] = PCIDevice.from_ioregistry(device).vendor_detect(inherits=GPU)  # type: ignore
+        # Class codes 03:00:00 and 03:80:00
+        table = self.pci_device_table()
+        for pci_entry in table.with_class_codes(GPU.CLASS_CODES):
+            vendor: Type[GPU] = PCIDevice.from_pci_entry(pci_entry, table).vendor_detect(inherits=GPU)  # type: ignore
             if vendor:
-                self.gpus.append(vendor.from_ioregistry(device))  # type: ignore
-            ioreg.IOObjectRelease(device)
+                self.gpus.append(vendor.from_pci_entry(pci_entry, table))  # type: ignore
 
     def dgpu_probe(self):
-        device = next(ioreg.ioiterator_to_list(ioreg.IOServiceGetMatchingServices(ioreg.kIOMasterPortDefault, ioreg.IOServiceNameMatching("GFX0".encode()), None)[1]), None)
-        if not device:
+        table = self.pci_device_table()
+        pci_entry = table.named("GFX0")
+        if not pci_entry:
             # No devices
             return
 
-        vendor: Type[GPU] = PCIDevice.from_ioregistry(device).vendor_detect(inherits=GPU)  # type: ignore
+        vendor: Type[GPU] = PCIDevice.from_pci_entry(pci_entry, table).vendor_detect(inherits=GPU)  # type: ignore
         if vendor:
-            self.dgpu = vendor.from_ioregistry(device)  # type: ignore
-        ioreg.IOObjectRelease(device)
+            self.dgpu = vendor.from_pci_entry(pci_entry, table)  # type: ignore
 
     def igpu_probe(self):
-        device = next(ioreg.ioiterator_to_list(ioreg.IOServiceGetMatchingServices(ioreg.kIOMasterPortDefault, ioreg.IOServiceNameMatching("IGPU".encode()), None)[1]), None)
-        if not device:
+        table = self.pci_device_table()
+        pci_entry = table.named("IGPU")
+        if not pci_entry:
             # No devices
             return
 
-        vendor: Type[GPU] = PCIDevice.from_ioregistry(device).vendor_detect(inherits=GPU)  # type: ignore
+        vendor: Type[GPU] = PCIDevice.from_pci_entry(pci_entry, table).vendor_detect(inherits=GPU)  # type: ignore
         if vendor:
-            self.igpu = vendor.from_ioregistry(device)  # type: ignore
-        ioreg.IOObjectRelease(device)
+            self.igpu = vendor.from_pci_entry(pci_entry, table)  # type: ignore
 
     def wifi_probe(self):
-        devices = ioreg.ioiterator_to_list(
-            ioreg.IOServiceGetMatchingServices(
-                ioreg.kIOMasterPortDefault,
-                WirelessCard.class_code_matching_dict(),
-                None,
-            )[1]
-        )
-
-        for device in devices:
-            vendor: Type[WirelessCard] = PCIDevice.from_ioregistry(device, anti_spoof=True).vendor_detect(inherits=WirelessCard)  # type: ignore
+        table = self.pci_device_table()
+        for pci_entry in table.with_class_codes(WirelessCard.CLASS_CODES):
+            vendor: Type[WirelessCard] = PCIDevice.from_pci_entry(pci_entry, table, anti_spoof=True).vendor_detect(inherits=WirelessCard)  # type: ignore
             if vendor:
-                self.wifi = vendor.from_ioregistry(device, anti_spoof=True)  # type: ignore
+                self.wifi = vendor.from_pci_entry(pci_entry, table, anti_spoof=True)  # type: ignore
                 break
-            ioreg.IOObjectRelease(device)
 
     def ambient_light_sensor_probe(self):
         device = next(ioreg.ioiterator_to_list(ioreg.IOServiceGetMatchingServices(ioreg.kIOMasterPortDefault, ioreg.IOServiceNameMatching("ALS0".encode()), None)[1]), None)
@@ -833,116 +890,34 @@ class Computer:
             ioreg.IOObjectRelease(device)
 
     def sdxc_controller_probe(self):
-        sdxc_controllers = ioreg.ioiterator_to_list(
-            ioreg.IOServiceGetMatchingServices(
-                ioreg.kIOMasterPortDefault,
-                SDXCController.class_code_matching_dict(),
-                None,
-            )[1]
-        )
-
-        for device in sdxc_controllers:
-            self.sdxc_controller.append(SDXCController.from_ioregistry(device))
-            ioreg.IOObjectRelease(device)
+        table = self.pci_device_table()
+        for pci_entry in table.with_class_codes(SDXCController.CLASS_CODES):
+            self.sdxc_controller.append(SDXCController.from_pci_entry(pci_entry, table))
 
     def usb_controller_probe(self):
-        xhci_controllers = ioreg.ioiterator_to_list(
-            ioreg.IOServiceGetMatchingServices(
-                ioreg.kIOMasterPortDefault,
-                XHCIController.class_code_matching_dict(),
-                None,
-            )[1]
-        )
-        ehci_controllers = ioreg.ioiterator_to_list(
-            ioreg.IOServiceGetMatchingServices(
-                ioreg.kIOMasterPortDefault,
-                EHCIController.class_code_matching_dict(),
-                None,
-            )[1]
-        )
-        ohci_controllers  = ioreg.ioiterator_to_list(
-            ioreg.IOServiceGetMatchingServices(
-                ioreg.kIOMasterPortDefault,
-                OHCIController.class_code_matching_dict(),
-                None,
-            )[1]
-        )
-
-        uhci_controllers  = ioreg.ioiterator_to_list(
-            ioreg.IOServiceGetMatchingServices(
-                ioreg.kIOMasterPortDefault,
-                UHCIController.class_code_matching_dict(),
-                None,
-            )[1]
-        )
-        for device in xhci_controllers:
-            self.usb_controllers.append(XHCIController.from_ioregistry(device))
-            ioreg.IOObjectRelease(device)
-        for device in ehci_controllers:
-            self.usb_controllers.append(EHCIController.from_ioregistry(device))
-            ioreg.IOObjectRelease(device)
-        for device in ohci_controllers:
-            self.usb_controllers.append(OHCIController.from_ioregistry(device))
-            ioreg.IOObjectRelease(device)
-        for device in uhci_controllers:
-            self.usb_controllers.append(UHCIController.from_ioregistry(device))
-            ioreg.IOObjectRelease(device)
+        table = self.pci_device_table()
+        for controller in [XHCIController, EHCIController, OHCIController, UHCIController]:
+            for pci_entry in table.with_class_codes(controller.CLASS_CODES):
+                self.usb_controllers.append(controller.from_pci_entry(pci_entry, table))
 
     def ethernet_probe(self):
-        ethernet_controllers = ioreg.ioiterator_to_list(
-            ioreg.IOServiceGetMatchingServices(
-                ioreg.kIOMasterPortDefault,
-                EthernetController.class_code_matching_dict(),
-                None,
-            )[1]
-        )
-
-        for device in ethernet_controllers:
-            vendor: Type[EthernetController] = PCIDevice.from_ioregistry(device).vendor_detect(inherits=EthernetController)  # type: ignore
+        table = self.pci_device_table()
+        for pci_entry in table.with_class_codes(EthernetController.CLASS_CODES):
+            vendor: Type[EthernetController] = PCIDevice.from_pci_entry(pci_entry, table).vendor_detect(inherits=EthernetController)  # type: ignore
             if vendor:
-                self.ethernet.append(vendor.from_ioregistry(device))  # type: ignore
-            ioreg.IOObjectRelease(device)
+                self.ethernet.append(vendor.from_pci_entry(pci_entry, table))  # type: ignore
 
     def storage_probe(self):
-        sata_controllers = ioreg.ioiterator_to_list(
-            ioreg.IOServiceGetMatchingServices(
-                ioreg.kIOMasterPortDefault,
-                SATAController.class_code_matching_dict(),
-                None,
-            )[1]
-        )
-        sas_controllers = ioreg.ioiterator_to_list(
-            ioreg.IOServiceGetMatchingServices(
-                ioreg.kIOMasterPortDefault,
-                SASController.class_code_matching_dict(),
-                None,
-            )[1]
-        )
-
-        nvme_controllers = ioreg.ioiterator_to_list(
-            ioreg.IOServiceGetMatchingServices(
-                ioreg.kIOMasterPortDefault,
-                NVMeController.class_code_matching_dict(),
-                None,
-            )[1]
-        )
-        for device in sata_controllers:
-            self.storage.append(SATAController.from_ioregistry(device))
-            ioreg.IOObjectRelease(device)
-
-        for device in sas_controllers:
-            self.storage.append(SASController.from_ioregistry(device))
-            ioreg.IOObjectRelease(device)
-
-        for device in nvme_controllers:
-            self.storage.append(NVMeController.from_ioregistry(device))
-            ioreg.IOObjectRelease(device)
+        table = self.pci_device_table()
+        for controller in [SATAController, SASController, NVMeController]:
+            for pci_entry in table.with_class_codes(controller.CLASS_CODES):
+                self.storage.append(controller.from_pci_entry(pci_entry, table))
 
     def smbios_probe(self):
         # Reported model
         entry = next(ioreg.ioiterator_to_list(ioreg.IOServiceGetMatchingServices(ioreg.kIOMasterPortDefault, ioreg.IOServiceMatching("IOPlatformExpertDevice".encode()), None)[1]))
         self.reported_model = ioreg.corefoundation_to_native(ioreg.IORegistryEntryCreateCFProperty(entry, "model", ioreg.kCFAllocatorDefault, ioreg.kNilOptions)).strip(b"\0").decode()  # type: ignore
-        translated = subprocess.run(["/usr/sbin/sysctl", "-in", "sysctl.proc_translated"], stdout=subprocess.PIPE).stdout.decode()
+        translated = _run(["/usr/sbin/sysctl", "-in", "sysctl.proc_translated"], stdout=subprocess.PIPE).stdout.decode()
         if translated:
             board = "target-type"
         else:
@@ -974,14 +949,14 @@ class Computer:
 
     def cpu_probe(self):
         self.cpu = CPU(
-            subprocess.run(["/usr/sbin/sysctl", "machdep.cpu.brand_string"], stdout=subprocess.PIPE).stdout.decode().partition(": ")[2].strip(),
-            subprocess.run(["/usr/sbin/sysctl", "machdep.cpu.features"], stdout=subprocess.PIPE).stdout.decode().partition(": ")[2].strip().split(" "),
+            _run(["/usr/sbin/sysctl", "machdep.cpu.brand_string"], stdout=subprocess.PIPE).stdout.decode().partition(": ")[2].strip(),
+            _run(["/usr/sbin/sysctl", "machdep.cpu.features"], stdout=subprocess.PIPE).stdout.decode().partition(": ")[2].strip().split(" "),
             self.cpu_get_leafs(),
         )
 
     def cpu_get_leafs(self):
         leafs = []
-        result = subprocess.run(["/usr/sbin/sysctl", "machdep.cpu.leaf7_features"], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        result = _run(["/usr/sbin/sysctl", "machdep.cpu.leaf7_features"], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
         if result.returncode == 0:
             return result.stdout.decode().partition(": ")[2].strip().split(" ")
         return leafs
@@ -1059,7 +1034,7 @@ class Computer:
     def sata_disk_probe(self):
         # Get all SATA Controllers/Disks from 'system_profiler SPSerialATADataType'
         # Determine whether SATA SSD is present and Apple-made
-        sp_sata_data = plistlib.loads(subprocess.run(["/usr/sbin/system_profiler", "SPSerialATADataType", "-xml"], stdout=subprocess.PIPE).stdout.decode().strip().encode())
+        sp_sata_data = plistlib.loads(_run(["/usr/sbin/system_profiler", "SPSerialATADataType", "-xml"], stdout=subprocess.PIPE).stdout.decode().strip().encode())
         for root in sp_sata_data:
             for ahci_controller in root["_items"]:
                 # Each AHCI controller will have its own entry
@@ -1095,7 +1070,7 @@ class Computer:
                 self.oclp_sys_signed = sys_plist["Custom Signature"]
 
     def check_rosetta(self):
-        result = subprocess.run(["/usr/sbin/sysctl", "-in", "sysctl.proc_translated"], stdout=subprocess.PIPE).stdout.decode()
+        result = _run(["/usr/sbin/sysctl", "-in", "sysctl.proc_translated"], stdout=subprocess.PIPE).stdout.decode()
         if "1" in result:
             self.rosetta_active = True
         else:
@@ -1,15 +1,24 @@
 """
 ioreg.py: PyObjc Handling for IOKit
+
+Calls can be routed through an alternative backend with set_backend(),
+ie. ioreg_snapshot.IORegistryReplay to serve a recorded snapshot off-Mac.
 """
 
 from typing import NewType, Union
-import objc
 
-from CoreFoundation import CFRelease, kCFAllocatorDefault  # type: ignore # pylint: disable=no-name-in-module
-from Foundation import NSBundle  # type: ignore # pylint: disable=no-name-in-module
-from PyObjCTools import Conversion
+try:
+    import objc
+
+    from CoreFoundation import CFRelease, kCFAllocatorDefault  # type: ignore # pylint: disable=no-name-in-module
+    from Foundation import NSBundle  # type: ignore # pylint: disable=no-name-in-module
+    from PyObjCTools import Conversion
 
-IOKit_bundle = NSBundle.bundleWithIdentifier_("com.apple.framework.IOKit")
+    IOKit_bundle = NSBundle.bundleWithIdentifier_("com.apple.framework.IOKit")
+except ImportError:
+    # Non-macOS host, only usable with a replay backend
+    objc = None
+    kCFAllocatorDefault = None
 
 # pylint: disable=invalid-name
 io_name_t_ref_out = b"[128c]"  # io_name_t is char[128]
@@ -71,7 +80,7 @@ CFAllocatorType = type(kCFAllocatorDefault)
 
 NULL = 0
 
-kIOMasterPortDefault: mach_port_t
+kIOMasterPortDefault: mach_port_t = NULL
 kNilOptions: IOOptionBits = NULL
 
 # IOKitLib.h
@@ -201,8 +210,9 @@ def IORegistryEntryFromPath(mainPort: mach_port_t, path: io_string_t) -> io_regi
     raise NotImplementedError
 
 
-objc.loadBundleFunctions(IOKit_bundle, globals(), functions)  # type: ignore # pylint: disable=no-member
-objc.loadBundleVariables(IOKit_bundle, globals(), variables)  # type: ignore # pylint: disable=no-member
+if objc is not None:
+    objc.loadBundleFunctions(IOKit_bundle, globals(), functions)  # type: ignore # pylint: disable=no-member
+    objc.loadBundleVariables(IOKit_bundle, globals(), variables)  # type: ignore # pylint: disable=no-member
 
 
 def ioiterator_to_list(iterator: io_iterator_t):
@@ -241,3 +251,36 @@ def get_class_inheritance(io_object):
         CFRelease(cls)
         cls = IOObjectCopySuperclassForClass(cls)
     return classes
+
+
+# Functions replaced when a backend is set, CoreFoundation helpers included as replayed values are already native
+BACKEND_FUNCTIONS = [name for name, _ in functions] + [
+    "corefoundation_to_native",
+    "native_to_corefoundation",
+    "get_class_inheritance",
+]
+
+backend = None
+_iokit_functions = {name: globals()[name] for name in BACKEND_FUNCTIONS}
+
+
+def _unsupported_backend_function(name: str):
+    def _unsupported(*args, **kwargs):
+        raise NotImplementedError(f"{name} is not supported by {type(backend).__name__}")
+    return _unsupported
+
+
+def set_backend(new_backend=None) -> None:
+    """
+    Route IOKit calls through new_backend, or restore IOKit if None
+
+    Backends implement any of BACKEND_FUNCTIONS as methods with matching signatures,
+    unimplemented functions raise NotImplementedError
+    """
+    global backend
+    backend = new_backend
+    for name in BACKEND_FUNCTIONS:
+        if new_backend is None:
+            globals()[name] = _iokit_functions[name]
+        else:
+            globals()[name] = getattr(new_backend, name, _unsupported_backend_function(name))
@@ -0,0 +1,316 @@
+"""
+ioreg_snapshot.py: Record and replay IORegistry snapshots for device_probe
+
+IORegistrySnapshot.record() captures the IOService entries device_probe queries
+(PCI and USB devices, platform expert, wireless interfaces, ACPI devices) along
+with their parent chains, the NVRAM/firmware entries read through
+IODeviceTree paths, and the output of the commands device_probe runs.
+
+IORegistryReplay serves ioreg calls from a snapshot, allowing Computer.probe()
+to run on any OS.
+
+Usage:
+>>> IORegistrySnapshot.record().write("MacBookPro11,3.plist")  # On macOS
+
+>>> with IORegistryReplay(IORegistrySnapshot.load("MacBookPro11,3.plist")):
+...     computer = device_probe.Computer.probe()
+"""
+
+import plistlib
+import subprocess
+
+from pathlib import Path
+
+from . import ioreg
+
+from ..support import utilities
+
+
+SNAPSHOT_VERSION: int = 1
+
+# Matching dictionaries queried by device_probe, excluding those scoped to a recorded entry (ie. IOParentMatch)
+RECORDED_MATCHES: list = [
+    {"IOProviderClass": "IOPCIDevice"},
+    {"IOProviderClass": "IOUSBDevice"},
+    {"IOProviderClass": "IO80211Interface"},
+    {"IOProviderClass": "IOPlatformExpertDevice"},
+    {"IONameMatch": "ALS0"},
+    {"IONameMatch": "CMRA"},
+]
+
+RECORDED_PATHS: list = [
+    "IODeviceTree:/options",
+    "IODeviceTree:/rom",
+    "IODeviceTree:/efi",
+]
+
+RECORDED_COMMANDS: list = [
+    ["/usr/sbin/sysctl", "-in", "sysctl.proc_translated"],
+    ["/usr/sbin/sysctl", "machdep.cpu.brand_string"],
+    ["/usr/sbin/sysctl", "machdep.cpu.features"],
+    ["/usr/sbin/sysctl", "machdep.cpu.leaf7_features"],
+    ["/usr/sbin/system_profiler", "SPSerialATADataType", "-xml"],
+]
+
+
+class IORegistrySnapshot:
+    """
+    Recorded IORegistry entries
+
+    Parameters:
+        entries  (dict): Registry entry ID -> {Name, Classes, Location, Parent, Properties}
+        matches  (dict): Matching dictionary key -> registry entry IDs returned, in IOKit order
+        paths    (dict): IORegistry path -> registry entry ID
+        commands (dict): Space joined command -> {ReturnCode, Output}
+    """
+
+    def __init__(self, entries: dict, matches: dict = None, paths: dict = None, commands: dict = None) -> None:
+        self.entries:  dict = entries
+        self.matches:  dict = matches  or {}
+        self.paths:    dict = paths    or {}
+        self.commands: dict = commands or {}
+
+
+    @staticmethod
+    def matching_key(matching: dict) -> str:
+        return repr(sorted(matching.items()))
+
+
+    @classmethod
+    def record(cls) -> "IORegistrySnapshot":
+        """
+        Record the host's IORegistry, requires IOKit
+        """
+        snapshot = cls({})
+
+        for matching in RECORDED_MATCHES:
+            matched = []
+            for entry in ioreg.ioiterator_to_list(ioreg.IOServiceGetMatchingServices(ioreg.kIOMasterPortDefault, matching, None)[1]):
+                matched.append(snapshot._record_entry(entry))
+                ioreg.IOObjectRelease(entry)
+            snapshot.matches[cls.matching_key(matching)] = matched
+
+        for path in RECORDED_PATHS:
+            entry = ioreg.IORegistryEntryFromPath(ioreg.kIOMasterPortDefault, path.encode())
+            if not entry:
+                continue
+            snapshot.paths[path] = snapshot._record_entry(entry, with_parents=False)
+            ioreg.IOObjectRelease(entry)
+
+        for args in RECORDED_COMMANDS:
+            if not Path(args[0]).exists():
+                continue
+            result = subprocess.run(args, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+            snapshot.commands[" ".join(args)] = {"ReturnCode": result.returncode, "Output": result.stdout}
+
+        return snapshot
+
+
+    def _record_entry(self, entry: ioreg.io_registry_entry_t, with_parents: bool = True) -> int:
+        """
+        Record an entry and its IOService parent chain
+
+        Returns:
+            int: Registry entry ID
+        """
+        entry_id = ioreg.IORegistryEntryGetRegistryEntryID(entry, None)[1]
+        if entry_id in self.entries:
+            return entry_id
+
+        properties = ioreg.corefoundation_to_native(ioreg.IORegistryEntryCreateCFProperties(entry, None, ioreg.kCFAllocatorDefault, ioreg.kNilOptions)[1]) or {}
+        result, location = ioreg.IORegistryEntryGetLocationInPlane(entry, "IOService".encode(), None)
+
+        self.entries[entry_id] = {
+            "Name":       ioreg.io_name_t_to_str(ioreg.IORegistryEntryGetName(entry, None)[1]),
+            "Classes":    [str(cls) for cls in ioreg.get_class_inheritance(entry)],
+            "Location":   ioreg.io_name_t_to_str(location) if result == 0 else "",
+            "Properties": self._serializable(properties),
+        }
+
+        if with_parents:
+            result, parent = ioreg.IORegistryEntryGetParentEntry(entry, "IOService".encode(), None)
+            if result == 0 and parent:
+                self.entries[entry_id]["Parent"] = self._record_entry(parent)
+                ioreg.IOObjectRelease(parent)
+
+        return entry_id
+
+
+    @staticmethod
+    def _serializable(properties: dict) -> dict:
+        """
+        Drop properties that can't be stored in a plist (ie. None, non-string keys)
+        """
+        serializable = {}
+        for key, value in properties.items():
+            if not isinstance(key, str):
+                continue
+            try:
+                plistlib.dumps({key: value}, fmt=plistlib.FMT_BINARY)
+            except (TypeError, ValueError, OverflowError):
+                continue
+            serializable[key] = value
+        return serializable
+
+
+    @classmethod
+    def load(cls, path: str) -> "IORegistrySnapshot":
+        data = plistlib.load(open(path, "rb"))
+        if data.get("Version") != SNAPSHOT_VERSION:
+            raise Exception(f"Unsupported IORegistry snapshot version: {data.get('Version')}")
+
+        # Plist keys are strings, registry entry IDs are restored as integers
+        entries = {int(entry_id): entry for entry_id, entry in data["Entries"].items()}
+        return cls(entries, data.get("Matches", {}), data.get("Paths", {}), data.get("Commands", {}))
+
+
+    def write(self, path: str) -> None:
+        data = {
+            "Version":  SNAPSHOT_VERSION,
+            "Entries":  {str(entry_id): entry for entry_id, entry in self.entries.items()},
+            "Matches":  self.matches,
+            "Paths":    self.paths,
+            "Commands": self.commands,
+        }
+        with open(path, "wb") as f:
+            plistlib.dump(data, f, fmt=plistlib.FMT_BINARY)
+
+
+class IORegistryReplay:
+    """
+    ioreg backend serving calls from an IORegistrySnapshot
+
+    Objects are represented by their registry entry ID, iterators by Python iterators.
+    Usable as a context manager, which sets and restores the ioreg backend.
+    """
+
+    # pylint: disable=invalid-name
+
+    def __init__(self, snapshot: IORegistrySnapshot) -> None:
+        self.snapshot = snapshot
+
+
+    def __enter__(self) -> "IORegistryReplay":
+        ioreg.set_backend(self)
+        # NVRAM values are cached by utilities, discard those read from the previous backend
+        utilities.system_query_cache.invalidate()
+        return self
+
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        ioreg.set_backend(None)
+        utilities.system_query_cache.invalidate()
+
+
+    def run(self, args: list) -> subprocess.CompletedProcess:
+        """
+        Recorded command output, unrecorded commands fail
+        """
+        command = self.snapshot.commands.get(" ".join(str(arg) for arg in args))
+        if command is None:
+            return subprocess.CompletedProcess(args, 1, b"", b"")
+        return subprocess.CompletedProcess(args, command["ReturnCode"], command["Output"], b"")
+
+
+    def _ancestors(self, entry_id: int):
+        entry_id = self.snapshot.entries[entry_id].get("Parent")
+        while entry_id:
+            yield entry_id
+            entry_id = self.snapshot.entries[entry_id].get("Parent")
+
+
+    def _matches(self, entry_id: int, matching: dict) -> bool:
+        """
+        Subset of IOKit matching used by device_probe
+        """
+        entry = self.snapshot.entries[entry_id]
+        if "IOProviderClass" in matching and matching["IOProviderClass"] not in entry["Classes"]:
+            return False
+        if "IONameMatch" in matching and matching["IONameMatch"] not in [entry["Name"], entry["Properties"].get("IOName")]:
+            return False
+        if "IORegistryEntryID" in matching and matching["IORegistryEntryID"] != entry_id:
+            return False
+        if "IOPropertyMatch" in matching:
+            property_matches = matching["IOPropertyMatch"]
+            if isinstance(property_matches, dict):
+                property_matches = [property_matches]
+            if not any(all(entry["Properties"].get(key) == value for key, value in property_match.items()) for property_match in property_matches):
+                return False
+        if "IOParentMatch" in matching:
+            if not any(self._matches(parent_id, matching["IOParentMatch"]) for parent_id in self._ancestors(entry_id)):
+                return False
+        return True
+
+
+    def IOServiceMatching(self, name: bytes) -> dict:
+        return {"IOProviderClass": name.decode()}
+
+
+    def IOServiceNameMatching(self, name: bytes) -> dict:
+        return {"IONameMatch": name.decode()}
+
+
+    def IORegistryEntryIDMatching(self, entryID: int) -> dict:
+        return {"IORegistryEntryID": entryID}
+
+
+    def IOServiceGetMatchingServices(self, masterPort: int, matching: dict, existing: None) -> tuple:
+        # Prefer results recorded for the same query, as IOKit matching has compatibility rules not replicated here
+        matching_key = IORegistrySnapshot.matching_key(matching)
+        if matching_key in self.snapshot.matches:
+            return 0, iter(self.snapshot.matches[matching_key])
+        return 0, iter([entry_id for entry_id in sorted(self.snapshot.entries) if self._matches(entry_id, matching)])
+
+
+    def IOIteratorNext(self, iterator) -> int:
+        return next(iterator, 0)
+
+
+    def IOObjectRelease(self, object: int) -> int:
+        return 0
+
+
+    def IORegistryEntryFromPath(self, mainPort: int, path: bytes) -> int:
+        return self.snapshot.paths.get(path.decode(), 0)
+
+
+    def IORegistryEntryCreateCFProperties(self, entry: int, properties: None, allocator, options: int) -> tuple:
+        return 0, dict(self.snapshot.entries[entry]["Properties"])
+
+
+    def IORegistryEntryCreateCFProperty(self, entry: int, key: str, allocator, options: int):
+        if entry not in self.snapshot.entries:
+            return None
+        return self.snapshot.entries[entry]["Properties"].get(key)
+
+
+    def IORegistryEntryGetName(self, entry: int, name: None) -> tuple:
+        return 0, self.snapshot.entries[entry]["Name"].encode()
+
+
+    def IORegistryEntryGetLocationInPlane(self, entry: int, plane: bytes, location: None) -> tuple:
+        return 0, self.snapshot.entries[entry]["Location"].encode()
+
+
+    def IORegistryEntryGetParentEntry(self, entry: int, plane: bytes, parent: None) -> tuple:
+        return 0, self.snapshot.entries[entry].get("Parent", 0)
+
+
+    def IORegistryEntryGetRegistryEntryID(self, entry: int, entryID: None) -> tuple:
+        return 0, entry
+
+
+    def IOObjectConformsTo(self, object: int, className: bytes) -> int:
+        return int(className.decode() in self.snapshot.entries[object]["Classes"])
+
+
+    def get_class_inheritance(self, io_object: int) -> list:
+        return list(self.snapshot.entries[io_object]["Classes"])
+
+
+    def corefoundation_to_native(self, collection):
+        return collection
+
+
+    def native_to_corefoundation(self, native):
+        return native
@@ -83,15 +83,14 @@ class BuildBluetooth:
         Fall back to pre-built assumptions
         """
 
-        if not self.model in smbios_data.smbios_dictionary:
-            return
-        if not "Bluetooth Model" in smbios_data.smbios_dictionary[self.model]:
+        model = smbios_data.get_model(self.model)
+        if model is None or model.bluetooth_model is None:
             return
 
-        if smbios_data.smbios_dictionary[self.model]["Bluetooth Model"] <= bluetooth_data.bluetooth_data.BRCM20702_v1.value:
+        if model.bluetooth_model <= bluetooth_data.bluetooth_data.BRCM20702_v1.value:
             logging.info("- 为 macOS Monterey 修复旧版蓝牙")
             support.BuildSupport(self.model, self.constants, self.config).enable_kext("BlueToolFixup.kext", self.constants.bluetool_version, self.constants.bluetool_path)
-            if smbios_data.smbios_dictionary[self.model]["Bluetooth Model"] <= bluetooth_data.bluetooth_data.BRCM2070.value:
+            if model.bluetooth_model <= bluetooth_data.bluetooth_data.BRCM2070.value:
                 self.config["NVRAM"]["Add"]["7C436110-AB2A-4BBB-A880-FE41995C9F82"]["boot-args"] += " -btlfxallowanyaddr"
                 self._bluetooth_firmware_incompatibility_workaround()
                 support.BuildSupport(self.model, self.constants, self.config).enable_kext("Bluetooth-Spoof.kext", self.constants.btspoof_version, self.constants.btspoof_path)
\ No newline at end of file
@@ -6,7 +6,6 @@ import copy
 import pickle
 import shutil
 import logging
-import zipfile
 import plistlib
 
 from pathlib import Path
@@ -28,7 +27,10 @@ from . import (
     storage,
     smbios,
     security,
-    misc
+    misc,
+    template_cache,
+    config_validator,
+    build_profiler
 )
 
 
@@ -48,6 +50,8 @@ class BuildOpenCore:
         self.model: str = model
         self.config: dict = None
         self.constants: constants.Constants = global_constants
+        self.profiler: build_profiler.BuildProfiler = build_profiler.BuildProfiler(enabled=global_constants.profile_build)
+        self.config_errors: list = [] # config_validator.ConfigValidationError
 
         self._build_opencore()
 
@@ -60,7 +64,8 @@ class BuildOpenCore:
         utilities.cls()
         logging.info(f"正在构建配置 {'针对外部' if self.constants.custom_model else '针对模型'}: {self.model}")
 
-        self._generate_base()
+        with self.profiler.phase("_generate_base"):
+            self._generate_base()
         self._set_revision()
 
         # Set Lilu and co.
@@ -82,7 +87,8 @@ class BuildOpenCore:
             security.BuildSecurity,
             misc.BuildMiscellaneous
         ]:
-            function(self.model, self.constants, self.config)
+            with self.profiler.phase(function.__name__):
+                function(self.model, self.constants, self.config)
 
         # Work-around ocvalidate
         if self.constants.validate is False:
@@ -110,13 +116,10 @@ class BuildOpenCore:
 
         logging.info("")
         logging.info(f"- 添加 OpenCore v{self.constants.opencore_version} {'DEBUG' if self.constants.opencore_debug is True else 'RELEASE'}")
-        shutil.copy(self.constants.opencore_zip_source, self.constants.build_path)
-        zipfile.ZipFile(self.constants.opencore_zip_copied).extractall(self.constants.build_path)
-
-        # Setup config.plist for editing
+        # Extracted package and parsed config.plist are cached across builds
         logging.info("- 添加 config.plist 以供 OpenCore 使用")
-        shutil.copy(self.constants.plist_template, self.constants.oc_folder)
-        self.config = plistlib.load(Path(self.constants.plist_path).open("rb"))
+        self.config = template_cache.OpenCoreTemplateCache.clone(self.constants, self.constants.opencore_release_folder)
+        support.BuildSupport.index_config(self.config)
 
 
     def _set_revision(self) -> None:
@@ -146,6 +149,21 @@ class BuildOpenCore:
         plistlib.dump(self.config, Path(self.constants.plist_path).open("wb"), sort_keys=True)
 
 
+    def _validate_config(self) -> None:
+        """
+        Validate config.plist in-process, issues are logged and kept in config_errors
+        """
+
+        with self.profiler.phase("config_validation"):
+            self.config_errors = config_validator.OpenCoreConfigValidator.for_constants(self.constants).validate(self.config)
+
+        if not self.config_errors:
+            return
+        logging.info("- 配置验证发现问题:")
+        for error in self.config_errors:
+            logging.info(f"  - {error}")
+
+
     def _build_opencore(self) -> None:
         """
         Kick off the build process
@@ -158,15 +176,28 @@ class BuildOpenCore:
         """
 
         # Generate OpenCore Configuration
-        self._build_efi()
-        if self.constants.allow_oc_everywhere is False or self.constants.allow_native_spoofs is True or (self.constants.custom_serial_number != "" and self.constants.custom_board_serial_number != ""):
-            smbios.BuildSMBIOS(self.model, self.constants, self.config).set_smbios()
-        support.BuildSupport(self.model, self.constants, self.config).cleanup()
-        self._save_config()
+        try:
+            self._build_efi()
+            if self.constants.allow_oc_everywhere is False or self.constants.allow_native_spoofs is True or (self.constants.custom_serial_number != "" and self.constants.custom_board_serial_number != ""):
+                with self.profiler.phase("set_smbios"):
+                    smbios.BuildSMBIOS(self.model, self.constants, self.config).set_smbios()
+        finally:
+            if self.config is not None:
+                support.BuildSupport.release_config_index(self.config)
+        with self.profiler.phase("cleanup"):
+            support.BuildSupport(self.model, self.constants, self.config).cleanup()
+        with self.profiler.phase("_save_config"):
+            self._save_config()
+        self._validate_config()
 
         # Post-build handling
-        support.BuildSupport(self.model, self.constants, self.config).sign_files()
-        support.BuildSupport(self.model, self.constants, self.config).validate_pathing()
+        with self.profiler.phase("sign_files"):
+            support.BuildSupport(self.model, self.constants, self.config).sign_files()
+        with self.profiler.phase("validate_pathing"):
+            support.BuildSupport(self.model, self.constants, self.config).validate_pathing()
+
+        if self.profiler.enabled is True:
+            self.profiler.log_summary()
 
         logging.info("")
         logging.info(f"您的 {self.model} 的 OpenCore EFI 已构建完成，位于:")
@@ -0,0 +1,196 @@
+"""
+build_profiler.py: Per-phase profiling of BuildOpenCore
+
+Phases are always timed. When enabled (--profile_build), file copies and bytes
+written are also counted, through audit hooks rather than wrapping shutil:
+- shutil.copyfile events count copies (shutil.copy, copy2 and copytree all go through copyfile)
+- open events in a write mode record the file, its size is summed when the phase ends
+
+Only events raised on the thread entering the phase are counted, as the GUI
+builds on a worker thread while other threads may be writing (ie. logs).
+
+Usage:
+>>> profiler = BuildProfiler(enabled=True)
+>>> with profiler.phase("_save_config"):
+...     plistlib.dump(config, Path(plist_path).open("wb"))
+>>> profiler.log_summary()
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import threading
+import contextlib
+
+
+_active = threading.local() # Phase being profiled on this thread
+_audit_hook_installed: bool = False
+_audit_hook_lock = threading.Lock()
+
+WRITE_MODE_CHARACTERS: str = "wax+"
+WRITE_FLAGS:           int = os.O_WRONLY | os.O_RDWR | os.O_APPEND | os.O_CREAT
+
+
+def _audit_hook(event: str, args: tuple) -> None:
+    """
+    Audit hooks can't be removed, hence a no-op unless a phase is being profiled on this thread
+    """
+    phase = getattr(_active, "phase", None)
+    if phase is None:
+        return
+
+    if event == "shutil.copyfile":
+        phase.file_copies += 1
+    elif event == "open":
+        path, mode, flags = args
+        if not isinstance(path, (str, bytes, os.PathLike)):
+            # File descriptors
+            return
+        if mode is None:
+            if not flags & WRITE_FLAGS:
+                return
+        elif not any(character in mode for character in WRITE_MODE_CHARACTERS):
+            return
+        phase.written.add(os.fsdecode(path))
+
+
+def _install_audit_hook() -> None:
+    global _audit_hook_installed
+    with _audit_hook_lock:
+        if _audit_hook_installed is False:
+            sys.addaudithook(_audit_hook)
+            _audit_hook_installed = True
+
+
+class _ProfiledPhase:
+
+    def __init__(self) -> None:
+        self.file_copies: int = 0
+        self.written:     set = set()
+
+
+    def bytes_written(self) -> int:
+        total = 0
+        for path in self.written:
+            try:
+                total += os.stat(path).st_size
+            except OSError:
+                # Removed later in the phase (ie. zips extracted then deleted)
+                continue
+        return total
+
+
+class BuildProfiler:
+    """
+    Records duration, file copies and bytes written per build phase
+
+    Parameters:
+        enabled (bool): Count file copies and bytes written, durations are always recorded
+    """
+
+    def __init__(self, enabled: bool = False) -> None:
+        self.enabled: bool = enabled
+        self.phases:  dict = {} # Phase name -> {"Duration", "FileCopies", "BytesWritten"}
+
+        if self.enabled is True:
+            _install_audit_hook()
+
+
+    @contextlib.contextmanager
+    def phase(self, name: str):
+        """
+        Profile a build phase, nested phases aren't counted towards their parent
+        """
+        profiled = _ProfiledPhase()
+        previous = getattr(_active, "phase", None)
+        if self.enabled is True:
+            _active.phase = profiled
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - start
+            if self.enabled is True:
+                _active.phase = previous
+
+            entry = self.phases.setdefault(name, {"Duration": 0, "FileCopies": 0, "BytesWritten": 0})
+            entry["Duration"] += duration
+            if self.enabled is True:
+                entry["FileCopies"]   += profiled.file_copies
+                entry["BytesWritten"] += profiled.bytes_written()
+
+
+    @property
+    def timings(self) -> dict:
+        """
+        Phase name -> seconds
+        """
+        return {name: entry["Duration"] for name, entry in self.phases.items()}
+
+
+    def report(self) -> dict:
+        """
+        Structured report, as logged and aggregated by the validation harness
+        """
+        phases = {name: {**entry, "Duration": round(entry["Duration"], 6)} for name, entry in self.phases.items()}
+        return {
+            "Builds": 1,
+            "Phases": phases,
+            "Total":  self._total(phases),
+        }
+
+
+    @staticmethod
+    def _total(phases: dict) -> dict:
+        return {
+            key: sum(entry[key] for entry in phases.values())
+            for key in ["Duration", "FileCopies", "BytesWritten"]
+        }
+
+
+    @classmethod
+    def aggregate(cls, reports: list) -> dict:
+        """
+        Merge reports from several builds (ie. validation workers)
+        """
+        phases = {}
+        for report in reports:
+            for name, entry in report["Phases"].items():
+                merged = phases.setdefault(name, {"Duration": 0, "FileCopies": 0, "BytesWritten": 0})
+                for key in merged:
+                    merged[key] += entry[key]
+        for entry in phases.values():
+            entry["Duration"] = round(entry["Duration"], 6)
+
+        return {
+            "Builds": sum(report["Builds"] for report in reports),
+            "Phases": phases,
+            "Total":  cls._total(phases),
+        }
+
+
+    @staticmethod
+    def summary(report: dict) -> list:
+        """
+        Human readable report, slowest phase first
+        """
+        lines = [f"{'阶段':<28} {'耗时':>9} {'复制文件':>8} {'写入字节':>12}"]
+        for name, entry in sorted(report["Phases"].items(), key=lambda item: item[1]["Duration"], reverse=True):
+            lines.append(f"{name:<30} {entry['Duration'] * 1000:>9.1f}ms {entry['FileCopies']:>12} {entry['BytesWritten']:>16,}")
+        total = report["Total"]
+        lines.append(f"{'总计':<28} {total['Duration'] * 1000:>9.1f}ms {total['FileCopies']:>12} {total['BytesWritten']:>16,}")
+        return lines
+
+
+    def log_summary(self) -> None:
+        """
+        Log the human readable summary, followed by the report as JSON
+        """
+        report = self.report()
+        logging.info("- 构建性能分析:")
+        for line in self.summary(report):
+            logging.info(f"  {line}")
+        logging.info(f"- 构建性能分析 (JSON): {json.dumps(report, sort_keys=True)}")
@@ -0,0 +1,322 @@
+"""
+config_validator.py: In-process validation of generated OpenCore configurations
+
+Checks a config.plist against a schema derived from the bundled OpenCore
+config.plist template (itself based on OpenCore's Sample.plist), along with a
+subset of ocvalidate's rules: value enums, patch lengths, file extensions,
+duplicate entries and kext load order.
+
+Errors are returned with the key path of the offending value, using
+ocvalidate's notation (ie. Kernel->Add[3]->BundlePath).
+
+Usage:
+>>> errors = OpenCoreConfigValidator.for_constants(constants).validate(config)
+>>> for error in errors:
+...     print(error)
+"""
+
+import re
+
+from dataclasses import dataclass
+
+from .. import constants
+
+from .template_cache import OpenCoreTemplateCache
+
+
+ANY: dict = {"Type": None}
+
+# Arrays empty in the template, element schemas per Sample.plist
+ARRAY_ITEM_SCHEMAS: dict = {
+    "ACPI->Delete": {
+        "All": bool, "Comment": str, "Enabled": bool, "OemTableId": bytes, "TableLength": int, "TableSignature": bytes,
+    },
+    "Booter->MmioWhitelist": {
+        "Address": int, "Comment": str, "Enabled": bool,
+    },
+    "Kernel->Force": {
+        "Arch": str, "BundlePath": str, "Comment": str, "Enabled": bool, "ExecutablePath": str,
+        "Identifier": str, "MaxKernel": str, "MinKernel": str, "PlistPath": str,
+    },
+    "Misc->Entries": {
+        "Arguments": str, "Auxiliary": bool, "Comment": str, "Enabled": bool, "Flavour": str,
+        "FullNvramAccess": bool, "Name": str, "Path": str, "TextMode": bool,
+    },
+    "Misc->BlessOverride": str,
+    "UEFI->ReservedMemory": {
+        "Address": int, "Comment": str, "Enabled": bool, "Size": int, "Type": str,
+    },
+    "UEFI->Unload": str,
+}
+
+# Dictionaries keyed by device path or GUID, rather than fixed keys
+MAP_SCHEMAS: dict = {
+    "DeviceProperties->Add":    {"Type": dict, "Values": {"Type": dict, "Values": ANY}},
+    "DeviceProperties->Delete": {"Type": dict, "Values": {"Type": list, "Items": {"Type": str}}},
+    "NVRAM->Add":               {"Type": dict, "Values": {"Type": dict, "Values": ANY}},
+    "NVRAM->Delete":            {"Type": dict, "Values": {"Type": list, "Items": {"Type": str}}},
+    "NVRAM->LegacySchema":      {"Type": dict, "Values": {"Type": list, "Items": {"Type": str}}},
+}
+
+ENUMS: dict = {
+    "Kernel->Scheme->KernelArch":               ["Auto", "i386", "i386-user32", "x86_64"],
+    "Kernel->Scheme->KernelCache":              ["Auto", "Cacheless", "Mkext", "Prelinked"],
+    "Misc->Boot->HibernateMode":                ["None", "Auto", "RTC", "NVRAM"],
+    "Misc->Boot->PickerMode":                   ["Builtin", "External", "Apple"],
+    "Misc->Security->DmgLoading":               ["Disabled", "Signed", "Any"],
+    "Misc->Security->Vault":                    ["Optional", "Basic", "Secure"],
+    "Misc->Security->SecureBootModel":          [
+        "Default", "Disabled", "j137", "j680", "j132", "j174", "j140k", "j780", "j213",
+        "j140a", "j152f", "j160", "j230k", "j214k", "j223", "j215", "j185", "j185f", "x86legacy",
+    ],
+    "PlatformInfo->UpdateSMBIOSMode":           ["TryOverwrite", "Create", "Overwrite", "Custom"],
+    "PlatformInfo->Generic->SystemMemoryStatus": ["Auto", "Upgradable", "Soldered"],
+    "UEFI->Audio->PlayChime":                   ["Auto", "Enabled", "Disabled"],
+    "UEFI->Output->TextRenderer":               ["BuiltinGraphics", "BuiltinText", "SystemGraphics", "SystemText", "SystemGeneric"],
+}
+
+ARCHITECTURES: list = ["Any", "i386", "x86_64"]
+
+# Kexts that must be loaded after another kext, per ocvalidate
+KEXT_PRECEDENCE: dict = {
+    "AirportBrcmFixup.kext":      "Lilu.kext",
+    "AppleALC.kext":              "Lilu.kext",
+    "BlueToolFixup.kext":         "Lilu.kext",
+    "BrightnessKeys.kext":        "Lilu.kext",
+    "CPUFriend.kext":             "Lilu.kext",
+    "CPUFriendDataProvider.kext": "CPUFriend.kext",
+    "CpuTscSync.kext":            "Lilu.kext",
+    "CryptexFixup.kext":          "Lilu.kext",
+    "DebugEnhancer.kext":         "Lilu.kext",
+    "FeatureUnlock.kext":         "Lilu.kext",
+    "HibernationFixup.kext":      "Lilu.kext",
+    "NVMeFix.kext":               "Lilu.kext",
+    "RestrictEvents.kext":        "Lilu.kext",
+    "VirtualSMC.kext":            "Lilu.kext",
+    "WhateverGreen.kext":         "Lilu.kext",
+}
+
+# Entry arrays: path key, expected extensions
+FILE_ENTRIES: dict = {
+    "ACPI->Add":     ("Path",       (".aml", ".bin")),
+    "Kernel->Add":   ("BundlePath", (".kext",)),
+    "Misc->Tools":   ("Path",       (".efi",)),
+    "UEFI->Drivers": ("Path",       (".efi",)),
+}
+
+PATCH_ENTRIES: list = ["ACPI->Patch", "Booter->Patch", "Kernel->Patch"]
+
+GUID_PATTERN:        re.Pattern = re.compile(r"^[0-9A-F]{8}-[0-9A-F]{4}-[0-9A-F]{4}-[0-9A-F]{4}-[0-9A-F]{12}$", re.IGNORECASE)
+DEVICE_PATH_PATTERN: re.Pattern = re.compile(r"^PciRoot\(0x[0-9A-F]+\)(/Pci\(0x[0-9A-F]+,0x[0-9A-F]+\))*$", re.IGNORECASE)
+KERNEL_PATTERN:      re.Pattern = re.compile(r"^(\d+(\.\d+){0,2})?$")
+
+
+@dataclass(frozen=True)
+class ConfigValidationError:
+    path:    str
+    message: str
+
+    def __str__(self) -> str:
+        return f"{self.path}: {self.message}"
+
+
+def derive_schema(value, path: str = "") -> dict:
+    """
+    Derive a schema from a config.plist template
+
+    Dictionaries have fixed keys, arrays take the union of their elements' keys
+    """
+    if path in MAP_SCHEMAS:
+        return MAP_SCHEMAS[path]
+
+    if isinstance(value, dict):
+        return {"Type": dict, "Keys": {key: derive_schema(item, f"{path}->{key}" if path else key) for key, item in value.items() if not key.startswith("#")}}
+
+    if isinstance(value, list):
+        if path in ARRAY_ITEM_SCHEMAS:
+            item_schema = ARRAY_ITEM_SCHEMAS[path]
+            if isinstance(item_schema, dict):
+                return {"Type": list, "Items": {"Type": dict, "Keys": {key: {"Type": item_type} for key, item_type in item_schema.items()}}}
+            return {"Type": list, "Items": {"Type": item_schema}}
+        if not value:
+            return {"Type": list, "Items": ANY}
+        if isinstance(value[0], dict):
+            keys = {}
+            for item in value:
+                for key, item_value in item.items():
+                    keys.setdefault(key, derive_schema(item_value, f"{path}[]->{key}"))
+            return {"Type": list, "Items": {"Type": dict, "Keys": keys}}
+        return {"Type": list, "Items": derive_schema(value[0], f"{path}[]")}
+
+    return {"Type": type(value)}
+
+
+class OpenCoreConfigValidator:
+    """
+    Validates OpenCore configurations against a template derived schema
+
+    Parameters:
+        template (dict): Parsed config.plist template
+    """
+
+    _validators: dict = {} # Template cache digest -> OpenCoreConfigValidator
+
+
+    def __init__(self, template: dict) -> None:
+        self.schema: dict = derive_schema(template)
+
+
+    @classmethod
+    def for_constants(cls, global_constants: constants.Constants) -> "OpenCoreConfigValidator":
+        """
+        Validator for the template the constants select, derived once per template
+        """
+        digest = OpenCoreTemplateCache.digest(global_constants)
+        if digest not in cls._validators:
+            cls._validators[digest] = cls(OpenCoreTemplateCache.get(global_constants).template)
+        return cls._validators[digest]
+
+
+    def validate(self, config: dict) -> list:
+        """
+        Returns:
+            list: ConfigValidationError for each issue found, empty if valid
+        """
+        errors = []
+        self._validate_schema(config, self.schema, "", errors)
+        if errors:
+            # Rules below assume the schema holds
+            return errors
+
+        self._validate_enums(config, errors)
+        self._validate_entries(config, errors)
+        self._validate_patches(config, errors)
+        self._validate_kext_precedence(config, errors)
+        self._validate_map_keys(config, errors)
+        return errors
+
+
+    def _validate_schema(self, value, schema: dict, path: str, errors: list) -> None:
+        expected = schema["Type"]
+        if expected is None:
+            return
+        # bool is a subclass of int, plist integers and booleans are distinct
+        if type(value) is not expected:
+            errors.append(ConfigValidationError(path, f"Expected {expected.__name__}, got {type(value).__name__}"))
+            return
+
+        if expected is dict:
+            if "Keys" in schema:
+                for key, item in value.items():
+                    if key.startswith("#"):
+                        continue
+                    item_path = f"{path}->{key}" if path else key
+                    if key not in schema["Keys"]:
+                        errors.append(ConfigValidationError(item_path, "Unknown key"))
+                        continue
+                    self._validate_schema(item, schema["Keys"][key], item_path, errors)
+            elif "Values" in schema:
+                for key, item in value.items():
+                    self._validate_schema(item, schema["Values"], f"{path}->{key}", errors)
+
+        elif expected is list:
+            for i, item in enumerate(value):
+                self._validate_schema(item, schema["Items"], f"{path}[{i}]", errors)
+
+
+    @staticmethod
+    def _get(config: dict, path: str, default=None):
+        """
+        Value at path, default if missing (OpenCore treats missing keys as defaults)
+        """
+        for key in path.split("->"):
+            if key not in config:
+                return default
+            config = config[key]
+        return config
+
+
+    def _validate_enums(self, config: dict, errors: list) -> None:
+        for path, values in ENUMS.items():
+            value = self._get(config, path)
+            if value is not None and value not in values:
+                errors.append(ConfigValidationError(path, f"Unsupported value {value!r}"))
+
+
+    def _validate_entries(self, config: dict, errors: list) -> None:
+        """
+        File extensions, duplicates, architectures and kernel ranges of entry arrays
+        """
+        for path, (key, extensions) in FILE_ENTRIES.items():
+            seen = {}
+            for i, entry in enumerate(self._get(config, path, [])):
+                entry_path = f"{path}[{i}]"
+                value = entry.get(key, "")
+                if not value.lower().endswith(extensions):
+                    errors.append(ConfigValidationError(f"{entry_path}->{key}", f"{value!r} does not end with {' or '.join(extensions)}"))
+                if value in seen:
+                    errors.append(ConfigValidationError(f"{entry_path}->{key}", f"{value!r} is duplicated (first at {path}[{seen[value]}])"))
+                else:
+                    seen[value] = i
+
+        for path in ["Booter->Patch", "Kernel->Add", "Kernel->Block", "Kernel->Force", "Kernel->Patch"]:
+            for i, entry in enumerate(self._get(config, path, [])):
+                if "Arch" in entry and entry["Arch"] not in ARCHITECTURES:
+                    errors.append(ConfigValidationError(f"{path}[{i}]->Arch", f"Unsupported value {entry['Arch']!r}"))
+                for key in ["MinKernel", "MaxKernel"]:
+                    if key in entry and not KERNEL_PATTERN.match(entry[key]):
+                        errors.append(ConfigValidationError(f"{path}[{i}]->{key}", f"Malformed kernel version {entry[key]!r}"))
+
+        for i, entry in enumerate(self._get(config, "Kernel->Block", [])):
+            if entry.get("Strategy", "Disable") not in ["Disable", "Exclude"]:
+                errors.append(ConfigValidationError(f"Kernel->Block[{i}]->Strategy", f"Unsupported value {entry['Strategy']!r}"))
+
+
+    def _validate_patches(self, config: dict, errors: list) -> None:
+        """
+        Find/Replace and their masks must be of equal length
+
+        Find may be left empty to patch at Base
+        """
+        for path in PATCH_ENTRIES:
+            for i, patch in enumerate(self._get(config, path, [])):
+                entry_path = f"{path}[{i}]"
+                find, replace = patch.get("Find", b""), patch.get("Replace", b"")
+                if find and len(find) != len(replace):
+                    errors.append(ConfigValidationError(entry_path, f"Find and Replace differ in size ({len(find)} vs {len(replace)})"))
+                if patch.get("Mask") and len(patch["Mask"]) != len(find):
+                    errors.append(ConfigValidationError(f"{entry_path}->Mask", "Mask differs in size from Find"))
+                if patch.get("ReplaceMask") and len(patch["ReplaceMask"]) != len(replace):
+                    errors.append(ConfigValidationError(f"{entry_path}->ReplaceMask", "ReplaceMask differs in size from Replace"))
+
+
+    def _validate_kext_precedence(self, config: dict, errors: list) -> None:
+        """
+        Enabled kexts must be loaded after the kext they depend on (including plugins after their parent)
+        """
+        positions = {}
+        for i, kext in enumerate(self._get(config, "Kernel->Add", [])):
+            if kext.get("Enabled") is True:
+                positions.setdefault(kext.get("BundlePath", ""), i)
+
+        for bundle_path, i in positions.items():
+            parents = []
+            if bundle_path in KEXT_PRECEDENCE:
+                parents.append(KEXT_PRECEDENCE[bundle_path])
+            if "/Contents/PlugIns/" in bundle_path:
+                parents.append(bundle_path.rsplit("/Contents/PlugIns/", 1)[0])
+            for parent in parents:
+                if parent in positions and positions[parent] > i:
+                    errors.append(ConfigValidationError(f"Kernel->Add[{i}]", f"{bundle_path} is placed prior to {parent} (Kernel->Add[{positions[parent]}])"))
+
+
+    def _validate_map_keys(self, config: dict, errors: list) -> None:
+        for path in ["NVRAM->Add", "NVRAM->Delete", "NVRAM->LegacySchema"]:
+            for guid in self._get(config, path, {}):
+                if not GUID_PATTERN.match(guid):
+                    errors.append(ConfigValidationError(f"{path}->{guid}", "Malformed GUID"))
+
+        for path in ["DeviceProperties->Add", "DeviceProperties->Delete"]:
+            for device_path in self._get(config, path, {}):
+                if not DEVICE_PATH_PATTERN.match(device_path):
+                    errors.append(ConfigValidationError(f"{path}->{device_path}", "Malformed device path"))
@@ -69,23 +69,22 @@ class BuildFirmware:
         Power Management Handling
         """
 
-        if not self.model in smbios_data.smbios_dictionary:
-            return
-        if not "CPU Generation" in smbios_data.smbios_dictionary[self.model]:
+        model = smbios_data.get_model(self.model)
+        if model is None or model.cpu_generation is None:
             return
 
-        if smbios_data.smbios_dictionary[self.model]["CPU Generation"] <= cpu_data.CPUGen.ivy_bridge.value:
+        if model.cpu_generation <= cpu_data.CPUGen.ivy_bridge.value:
             logging.info("启用旧版电源管理支持")
             support.BuildSupport(self.model, self.constants, self.config).enable_kext("AppleIntelCPUPowerManagement.kext", self.constants.aicpupm_version, self.constants.aicpupm_path)
             support.BuildSupport(self.model, self.constants, self.config).enable_kext("AppleIntelCPUPowerManagementClient.kext", self.constants.aicpupm_version, self.constants.aicpupm_client_path)
 
-        if smbios_data.smbios_dictionary[self.model]["CPU Generation"] <= cpu_data.CPUGen.sandy_bridge.value or self.constants.disable_fw_throttle is True:
+        if model.cpu_generation <= cpu_data.CPUGen.sandy_bridge.value or self.constants.disable_fw_throttle is True:
             logging.info("覆盖 ACPI SMC 匹配")
             support.BuildSupport(self.model, self.constants, self.config).enable_kext("ASPP-Override.kext", self.constants.aspp_override_version, self.constants.aspp_override_path)
             if self.constants.disable_fw_throttle is True:
                 support.BuildSupport(self.model, self.constants, self.config).get_item_by_kv(self.config["Kernel"]["Add"], "BundlePath", "ASPP-Override.kext")["MinKernel"] = ""
 
-        if self.constants.disable_fw_throttle is True and smbios_data.smbios_dictionary[self.model]["CPU Generation"] >= cpu_data.CPUGen.nehalem.value:
+        if self.constants.disable_fw_throttle is True and model.cpu_generation >= cpu_data.CPUGen.nehalem.value:
             logging.info("禁用固件节流")
             support.BuildSupport(self.model, self.constants, self.config).enable_kext("SimpleMSR.kext", self.constants.simplemsr_version, self.constants.simplemsr_path)
 
@@ -94,17 +93,16 @@ class BuildFirmware:
         ACPI Table Handling
         """
 
-        if not self.model in smbios_data.smbios_dictionary:
-            return
-        if not "CPU Generation" in smbios_data.smbios_dictionary[self.model]:
+        model = smbios_data.get_model(self.model)
+        if model is None or model.cpu_generation is None:
             return
 
-        if smbios_data.smbios_dictionary[self.model]["CPU Generation"] == cpu_data.CPUGen.nehalem.value and not (self.model.startswith("MacPro") or self.model.startswith("Xserve")):
+        if model.cpu_generation == cpu_data.CPUGen.nehalem.value and not (self.model.startswith("MacPro") or self.model.startswith("Xserve")):
             logging.info("添加 SSDT-CPBG.aml")
             support.BuildSupport(self.model, self.constants, self.config).get_item_by_kv(self.config["ACPI"]["Add"], "Path", "SSDT-CPBG.aml")["Enabled"] = True
             shutil.copy(self.constants.pci_ssdt_path, self.constants.acpi_path)
 
-        if cpu_data.CPUGen.sandy_bridge <= smbios_data.smbios_dictionary[self.model]["CPU Generation"] <= cpu_data.CPUGen.ivy_bridge.value and self.model != "MacPro6,1":
+        if cpu_data.CPUGen.sandy_bridge <= model.cpu_generation <= cpu_data.CPUGen.ivy_bridge.value and self.model != "MacPro6,1":
             logging.info("启用 Windows 10 UEFI 音频支持")
             support.BuildSupport(self.model, self.constants, self.config).get_item_by_kv(self.config["ACPI"]["Add"], "Path", "SSDT-PCI.aml")["Enabled"] = True
             support.BuildSupport(self.model, self.constants, self.config).get_item_by_kv(self.config["ACPI"]["Patch"], "Comment", "BUF0 to BUF1")["Enabled"] = True
@@ -115,21 +113,20 @@ class BuildFirmware:
         CPU Compatibility Handling
         """
 
-        if not self.model in smbios_data.smbios_dictionary:
-            return
-        if not "CPU Generation" in smbios_data.smbios_dictionary[self.model]:
+        model = smbios_data.get_model(self.model)
+        if model is None or model.cpu_generation is None:
             return
 
-        if smbios_data.smbios_dictionary[self.model]["CPU Generation"] <= cpu_data.CPUGen.penryn.value:
+        if model.cpu_generation <= cpu_data.CPUGen.penryn.value:
             support.BuildSupport(self.model, self.constants, self.config).enable_kext("AAAMouSSE.kext", self.constants.mousse_version, self.constants.mousse_path)
             support.BuildSupport(self.model, self.constants, self.config).enable_kext("telemetrap.kext", self.constants.telemetrap_version, self.constants.telemetrap_path)
 
-        if smbios_data.smbios_dictionary[self.model]["CPU Generation"] <= cpu_data.CPUGen.ivy_bridge.value:
+        if model.cpu_generation <= cpu_data.CPUGen.ivy_bridge.value:
             logging.info("在 Ventura 中启用 Rosetta Cryptex 支持")
             support.BuildSupport(self.model, self.constants, self.config).enable_kext("CryptexFixup.kext", self.constants.cryptexfixup_version, self.constants.cryptexfixup_path)
 
         if (not self.constants.custom_model and "RDRAND" not in self.computer.cpu.flags) or \
-            (smbios_data.smbios_dictionary[self.model]["CPU Generation"] <= cpu_data.CPUGen.sandy_bridge.value):
+            (model.cpu_generation <= cpu_data.CPUGen.sandy_bridge.value):
             logging.info("添加 SurPlus 补丁以解决竞争条件")
             support.BuildSupport(self.model, self.constants, self.config).get_item_by_kv(self.config["Kernel"]["Patch"], "Comment", "SurPlus v1 - PART 1 of 2 - Patch read_erandom (inlined in _early_random)")["Enabled"] = True
             support.BuildSupport(self.model, self.constants, self.config).get_item_by_kv(self.config["Kernel"]["Patch"], "Comment", "SurPlus v1 - PART 2 of 2 - Patch register_and_init_prng")["Enabled"] = True
@@ -138,11 +135,11 @@ class BuildFirmware:
                 support.BuildSupport(self.model, self.constants, self.config).get_item_by_kv(self.config["Kernel"]["Patch"], "Comment", "SurPlus v1 - PART 1 of 2 - Patch read_erandom (inlined in _early_random)")["MaxKernel"] = ""
                 support.BuildSupport(self.model, self.constants, self.config).get_item_by_kv(self.config["Kernel"]["Patch"], "Comment", "SurPlus v1 - PART 2 of 2 - Patch register_and_init_prng")["MaxKernel"] = ""
 
-        if smbios_data.smbios_dictionary[self.model]["CPU Generation"] < cpu_data.CPUGen.sandy_bridge.value:
+        if model.cpu_generation < cpu_data.CPUGen.sandy_bridge.value:
             support.BuildSupport(self.model, self.constants, self.config).enable_kext("NoAVXFSCompressionTypeZlib.kext", self.constants.apfs_zlib_version, self.constants.apfs_zlib_path)
             support.BuildSupport(self.model, self.constants, self.config).enable_kext("NoAVXFSCompressionTypeZlib-AVXpel.kext", self.constants.apfs_zlib_v2_version, self.constants.apfs_zlib_v2_path)
 
-        if smbios_data.smbios_dictionary[self.model]["CPU Generation"] <= cpu_data.CPUGen.penryn.value:
+        if model.cpu_generation <= cpu_data.CPUGen.penryn.value:
             logging.info("添加 IOHIDFamily 补丁")
             support.BuildSupport(self.model, self.constants, self.config).get_item_by_kv(self.config["Kernel"]["Patch"], "Identifier", "com.apple.iokit.IOHIDFamily")["Enabled"] = True
 
@@ -155,9 +152,8 @@ class BuildFirmware:
         Firmware Driver Handling (Drivers/*.efi)
         """
 
-        if not self.model in smbios_data.smbios_dictionary:
-            return
-        if not "CPU Generation" in smbios_data.smbios_dictionary[self.model]:
+        model = smbios_data.get_model(self.model)
+        if model is None or model.cpu_generation is None:
             return
         
         # APFS check
@@ -168,7 +164,7 @@ class BuildFirmware:
         support.BuildSupport(self.model, self.constants, self.config).get_efi_binary_by_path("apfs_aligned.efi", "UEFI", "Drivers")["Enabled"] = True
 
         # Exfat check
-        if smbios_data.smbios_dictionary[self.model]["CPU Generation"] < cpu_data.CPUGen.sandy_bridge.value:
+        if model.cpu_generation < cpu_data.CPUGen.sandy_bridge.value:
             # Sandy Bridge 和更新的 Mac 原生支持 ExFat
             logging.info("- 添加 ExFatDxeLegacy.efi")
             shutil.copy(self.constants.exfat_legacy_driver_path, self.constants.drivers_path)
@@ -199,7 +195,7 @@ class BuildFirmware:
         # 对于型号支持，请检查固件中的 GUID 以及 Bootcamp Assistant 的 Info.plist 中的 'PreUEFIModels' 键
         # 参考: https://github.com/acidanthera/OpenCorePkg/blob/0.9.5/Platform/OpenLegacyBoot/OpenLegacyBoot.c#L19
         if Path(self.constants.drivers_path / Path("OpenLegacyBoot.efi")).exists():
-            # if smbios_data.smbios_dictionary[self.model]["CPU Generation"] <= cpu_data.CPUGen.ivy_bridge.value and self.model != "MacPro6,1":
+            # if model.cpu_generation <= cpu_data.CPUGen.ivy_bridge.value and self.model != "MacPro6,1":
             #     logging.info("- 启用 CSM 支持")
             #     support.BuildSupport(self.model, self.constants, self.config).get_efi_binary_by_path("OpenLegacyBoot.efi", "UEFI", "Drivers")["Enabled"] = True
             # else:
@@ -289,7 +285,7 @@ class BuildFirmware:
         能够通过加密文件缓冲区加载 ./Drivers/HardwareDrivers 的原因是其他驱动程序（如 ./qa_logger.efi）是通过设备路径调用的。
         """
 
-        if "Dual DisplayPort Display" not in smbios_data.smbios_dictionary[self.model]:
+        if smbios_data.get_model(self.model).dual_displayport_display is False:
             return
 
         logging.info("- 添加 4K/5K 显示补丁")
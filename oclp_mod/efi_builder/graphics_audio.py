@@ -324,12 +324,13 @@ class BuildGraphicsAudio:
 
        # Audio Patch
        if self.constants.set_alc_usage is True:
-           if smbios_data.smbios_dictionary[self.model]["Max OS Supported"] <= os_data.os_data.high_sierra:
+           model = smbios_data.get_model(self.model)
+           if model.max_os_supported <= os_data.os_data.high_sierra:
                # Models dropped in Mojave also lost Audio support
                # Xserves and MacPro4,1 are exceptions
                # iMac7,1 and iMac8,1 require AppleHDA/IOAudioFamily downgrade
                if not (self.model.startswith("Xserve") or self.model in ["MacPro4,1", "iMac7,1", "iMac8,1"]):
-                   if "nForce Chipset" in smbios_data.smbios_dictionary[self.model]:
+                   if model.nforce_chipset is True:
                        hdef_path = "PciRoot(0x0)/Pci(0x8,0x0)"
                    else:
                        hdef_path = "PciRoot(0x0)/Pci(0x1b,0x0)"
@@ -363,7 +364,7 @@ class BuildGraphicsAudio:
        """
 
        # Add UGA to GOP layer
-       if "UGA Graphics" in smbios_data.smbios_dictionary[self.model]:
+       if smbios_data.get_model(self.model).uga_graphics is True:
            logging.info("Adding UGA to GOP Patch")
            self.config["UEFI"]["Output"]["GopPassThrough"] = "Apple"
 
@@ -386,7 +387,7 @@ class BuildGraphicsAudio:
            # Add AMDGPUWakeHandler
            support.BuildSupport(self.model, self.constants, self.config).enable_kext("AMDGPUWakeHandler.kext", self.constants.gpu_wake_version, self.constants.gpu_wake_path)
 
-       if self.constants.dGPU_switch is True and "Switchable GPUs" in smbios_data.smbios_dictionary[self.model]:
+       if self.constants.dGPU_switch is True and smbios_data.get_model(self.model).switchable_gpus is True:
            logging.info("Allowing GMUX switching in Windows")
            self.config["Booter"]["Quirks"]["SignalAppleOS"] = True
 
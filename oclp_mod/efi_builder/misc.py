@@ -252,10 +252,9 @@ xw
         """
         iSight Handler
         """
-        if self.model in smbios_data.smbios_dictionary:
-            if "Legacy iSight" in smbios_data.smbios_dictionary[self.model]:
-                if smbios_data.smbios_dictionary[self.model]["Legacy iSight"] is True:
-                    support.BuildSupport(self.model, self.constants, self.config).enable_kext("LegacyUSBVideoSupport.kext", self.constants.apple_isight_version, self.constants.apple_isight_path)
+        model = smbios_data.get_model(self.model)
+        if model is not None and model.legacy_isight is True:
+            support.BuildSupport(self.model, self.constants, self.config).enable_kext("LegacyUSBVideoSupport.kext", self.constants.apple_isight_version, self.constants.apple_isight_path)
 
         if not self.constants.custom_model:
             if self.constants.computer.pcie_webcam is True:
@@ -123,21 +123,20 @@ class BuildWiredNetworking:
         Fall back to pre-built assumptions
         """
 
-        if not self.model in smbios_data.smbios_dictionary:
-            return
-        if not "Ethernet Chipset" in smbios_data.smbios_dictionary[self.model]:
+        model = smbios_data.get_model(self.model)
+        if model is None or model.ethernet_chipset is None:
             return
 
-        if smbios_data.smbios_dictionary[self.model]["Ethernet Chipset"] == "Broadcom":
-            if smbios_data.smbios_dictionary[self.model]["CPU Generation"] < cpu_data.CPUGen.ivy_bridge.value:
+        if model.ethernet_chipset == "Broadcom":
+            if model.cpu_generation < cpu_data.CPUGen.ivy_bridge.value:
                 # Required due to Big Sur's BCM5701 requiring VT-D support
                 # Applicable for pre-Ivy Bridge models
                 support.BuildSupport(self.model, self.constants, self.config).enable_kext("CatalinaBCM5701Ethernet.kext", self.constants.bcm570_version, self.constants.bcm570_path)
-        elif smbios_data.smbios_dictionary[self.model]["Ethernet Chipset"] == "Nvidia":
+        elif model.ethernet_chipset == "Nvidia":
             support.BuildSupport(self.model, self.constants, self.config).enable_kext("nForceEthernet.kext", self.constants.nforce_version, self.constants.nforce_path)
-        elif smbios_data.smbios_dictionary[self.model]["Ethernet Chipset"] == "Marvell":
+        elif model.ethernet_chipset == "Marvell":
             support.BuildSupport(self.model, self.constants, self.config).enable_kext("MarvelYukonEthernet.kext", self.constants.marvel_version, self.constants.marvel_path)
-        elif smbios_data.smbios_dictionary[self.model]["Ethernet Chipset"] == "Intel 80003ES2LAN":
+        elif model.ethernet_chipset == "Intel 80003ES2LAN":
             support.BuildSupport(self.model, self.constants, self.config).enable_kext("AppleIntel8254XEthernet.kext", self.constants.intel_8254x_version, self.constants.intel_8254x_path)
-        elif smbios_data.smbios_dictionary[self.model]["Ethernet Chipset"] == "Intel 82574L":
+        elif model.ethernet_chipset == "Intel 82574L":
             support.BuildSupport(self.model, self.constants, self.config).enable_kext("Intel82574L.kext", self.constants.intel_82574l_version, self.constants.intel_82574l_path)
\ No newline at end of file
@@ -106,9 +106,9 @@ class BuildSMBIOS:
        logging.info(f"使用Model ID: {spoofed_model}")
 
        spoofed_board = ""
-       if spoofed_model in smbios_data.smbios_dictionary:
-           if "Board ID" in smbios_data.smbios_dictionary[spoofed_model]:
-               spoofed_board = smbios_data.smbios_dictionary[spoofed_model]["Board ID"]
+       spoofed_entry = smbios_data.get_model(spoofed_model)
+       if spoofed_entry is not None:
+           spoofed_board = spoofed_entry.board_id
        logging.info(f"使用Board ID: {spoofed_board}")
 
        self.spoofed_model = spoofed_model
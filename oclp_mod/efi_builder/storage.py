@@ -68,12 +68,11 @@ class BuildStorage:
 
         # ThirdPartyDrives Check
         if self.constants.allow_3rd_party_drives is True:
+            model = smbios_data.get_model(self.model)
             for drive in ["SATA 2.5", "SATA 3.5", "mSATA"]:
-                if not self.model in smbios_data.smbios_dictionary:
+                if model is None:
                     break
-                if not "Stock Storage" in smbios_data.smbios_dictionary[self.model]:
-                    break
-                if drive in smbios_data.smbios_dictionary[self.model]["Stock Storage"]:
+                if drive in model.stock_storage:
                     if not self.constants.custom_model:
                         if self.computer.third_party_sata_ssd is True:
                             logging.info("- 添加 SATA 休眠补丁")
@@ -90,11 +89,8 @@ class BuildStorage:
         ATA (PATA) Handler
         """
 
-        if not self.model in smbios_data.smbios_dictionary:
-            return
-        if not "Stock Storage" in smbios_data.smbios_dictionary[self.model]:
-            return
-        if not "PATA" in smbios_data.smbios_dictionary[self.model]["Stock Storage"]:
+        model = smbios_data.get_model(self.model)
+        if model is None or not "PATA" in model.stock_storage:
             return
 
         support.BuildSupport(self.model, self.constants, self.config).enable_kext("AppleIntelPIIXATA.kext", self.constants.piixata_version, self.constants.piixata_path)
@@ -151,10 +147,10 @@ class BuildStorage:
         # 恢复在 macOS 14.0 Beta 2 中移除的 S1X/S3X NVMe 支持
         # Apple 对 S1X 和 S3X 的使用相当随意且不一致，因此我们将尝试为所有带有 NVMe 驱动的机型恢复支持
         # 此外扩展到覆盖所有使用 12+16 引脚 SSD 布局的 Mac 机型，以支持较旧的机器上使用较新的驱动
-        if self.constants.custom_model and self.model in smbios_data.smbios_dictionary:
-            if "CPU Generation" in smbios_data.smbios_dictionary[self.model]:
-                if (cpu_data.CPUGen.haswell <= smbios_data.smbios_dictionary[self.model]["CPU Generation"] <= cpu_data.CPUGen.kaby_lake) or self.model in [ "MacPro6,1" ]:
-                    support.BuildSupport(self.model, self.constants, self.config).enable_kext("IOS3XeFamily.kext", self.constants.s3x_nvme_version, self.constants.s3x_nvme_path)
+        model = smbios_data.get_model(self.model)
+        if self.constants.custom_model and model is not None and model.cpu_generation is not None:
+            if (cpu_data.CPUGen.haswell <= model.cpu_generation <= cpu_data.CPUGen.kaby_lake) or self.model in [ "MacPro6,1" ]:
+                support.BuildSupport(self.model, self.constants, self.config).enable_kext("IOS3XeFamily.kext", self.constants.s3x_nvme_version, self.constants.s3x_nvme_path)
 
         # Apple RAID Card 检查
         if not self.constants.custom_model:
@@ -175,14 +171,13 @@ class BuildStorage:
         SDXC Handler
         """
 
-        if not self.model in smbios_data.smbios_dictionary:
-            return
-        if not "CPU Generation" in smbios_data.smbios_dictionary[self.model]:
+        model = smbios_data.get_model(self.model)
+        if model is None or model.cpu_generation is None:
             return
 
         # 自 macOS Monterey 起，Apple 的 SDXC 驱动程序要求系统支持 VT-D
         # 然而，预 Ivy Bridge 的系统不支持此功能
-        if smbios_data.smbios_dictionary[self.model]["CPU Generation"] <= cpu_data.CPUGen.sandy_bridge.value:
+        if model.cpu_generation <= cpu_data.CPUGen.sandy_bridge.value:
             if (self.constants.computer.sdxc_controller and not self.constants.custom_model) or (self.model.startswith("MacBookPro8") or self.model.startswith("Macmini5")):
                 support.BuildSupport(self.model, self.constants, self.config).enable_kext("BigSurSDXC.kext", self.constants.bigsursdxc_version, self.constants.bigsursdxc_path)
 
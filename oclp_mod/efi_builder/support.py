@@ -19,14 +19,70 @@ class BuildSupport:
    Support Library for build.py and related libraries
    """
 
+   # Config arrays indexed by index_config(), and the keys entries are looked up by
+   INDEXED_CONFIG_ARRAYS: dict = {
+       ("ACPI",   "Add"):     ["Path"],
+       ("ACPI",   "Delete"):  ["Comment"],
+       ("ACPI",   "Patch"):   ["Comment"],
+       ("Booter", "Patch"):   ["Comment"],
+       ("Kernel", "Add"):     ["BundlePath"],
+       ("Kernel", "Block"):   ["Identifier"],
+       ("Kernel", "Force"):   ["Identifier"],
+       ("Kernel", "Patch"):   ["Comment", "Identifier"],
+       ("Misc",   "Tools"):   ["Path"],
+       ("UEFI",   "Drivers"): ["Path"],
+   }
+
+   # id(array) -> (array, length when indexed, {key: {value: position of first matching entry}})
+   _config_indexes: dict = {}
+
+
    def __init__(self, model: str, global_constants: constants.Constants, config: dict) -> None:
        self.model: str = model
        self.config: dict = config
        self.constants: constants.Constants = global_constants
 
 
-   @staticmethod
-   def get_item_by_kv(iterable: dict, key: str, value: typing.Any) -> dict:
+   @classmethod
+   def index_config(cls, config: dict) -> None:
+       """
+       Index the config's arrays for get_item_by_kv()
+
+       Indexes are held until release_config_index(). Lookups fall back to a
+       linear search for arrays modified in length since indexing, and when
+       the entry at the indexed position no longer holds the value (ie.
+       renamed or replaced in place) or no entry was indexed for it
+
+       Parameters:
+           config (dict): config.plist being built
+       """
+
+       for (entry, sub_entry), keys in cls.INDEXED_CONFIG_ARRAYS.items():
+           if sub_entry not in config.get(entry, {}):
+               continue
+           array = config[entry][sub_entry]
+           index = {key: {} for key in keys}
+           for position, item in enumerate(array):
+               for key in keys:
+                   if key in item:
+                       index[key].setdefault(item[key], position)
+           cls._config_indexes[id(array)] = (array, len(array), index)
+
+
+   @classmethod
+   def release_config_index(cls, config: dict) -> None:
+       """
+       Drop indexes created by index_config()
+       """
+
+       for entry, sub_entry in cls.INDEXED_CONFIG_ARRAYS:
+           if sub_entry not in config.get(entry, {}):
+               continue
+           cls._config_indexes.pop(id(config[entry][sub_entry]), None)
+
+
+   @classmethod
+   def get_item_by_kv(cls, iterable: dict, key: str, value: typing.Any) -> dict:
        """
        Gets an item from a list of dicts by key and value
 
@@ -37,6 +93,12 @@ class BuildSupport:
 
        """
 
+       indexed = cls._config_indexes.get(id(iterable))
+       if indexed is not None and indexed[0] is iterable and indexed[1] == len(iterable) and key in indexed[2]:
+           position = indexed[2][key].get(value)
+           if position is not None and iterable[position].get(key) == value:
+               return iterable[position]
+
        item = None
        for i in iterable:
            if i[key] == value:
@@ -249,4 +311,4 @@ class BuildSupport:
                        raise Exception(f" - 发现未知插件: {plugin.name}")
                    shutil.rmtree(plugin)
 
-       Path(self.constants.opencore_zip_copied).unlink()
\ No newline at end of file
+       Path(self.constants.opencore_zip_copied).unlink(missing_ok=True)
\ No newline at end of file
@@ -0,0 +1,144 @@
+"""
+template_cache.py: Cache of the extracted OpenCore package and base config.plist
+
+Every build starts from the same OpenCore zip and config.plist template.
+Extracting the zip and parsing the template dominate base generation, so both
+are done once per process, keyed by OpenCore version, variant and the SHA-256
+of the zip and template. Builds copy the cached tree and deep-copy the parsed
+template instead.
+
+Files are copied rather than hardlinked, as builders overwrite files in the
+OC folder in place (ie. Vault signing OpenCore.efi).
+
+Usage:
+>>> config = OpenCoreTemplateCache.clone(constants, constants.opencore_release_folder)
+"""
+
+import copy
+import shutil
+import atexit
+import hashlib
+import logging
+import zipfile
+import plistlib
+import tempfile
+import threading
+
+from pathlib import Path
+
+from .. import constants
+
+
+HASH_CHUNK_SIZE: int = 1024 * 1024
+
+
+class OpenCoreTemplateCache:
+    """
+    Process-wide cache of extracted OpenCore packages, content-addressed
+
+    Parameters:
+        path     (Path): Extracted OpenCore-Build folder, including config.plist
+        template (dict): Parsed config.plist template, never handed out directly
+    """
+
+    _templates:   dict = {} # digest -> OpenCoreTemplateCache
+    _file_hashes: dict = {} # (path, size, mtime) -> SHA-256
+    _lock = threading.Lock()
+    _cache_root: Path = None
+
+
+    def __init__(self, path: Path, template: dict) -> None:
+        self.path:     Path = path
+        self.template: dict = template
+
+
+    @classmethod
+    def _hash_file(cls, path: Path) -> str:
+        """
+        SHA-256 of a file, re-hashed only if its size or modification time changed
+        """
+        path_stat = Path(path).stat()
+        key = (str(path), path_stat.st_size, path_stat.st_mtime_ns)
+        if key not in cls._file_hashes:
+            digest = hashlib.sha256()
+            with open(path, "rb") as f:
+                while chunk := f.read(HASH_CHUNK_SIZE):
+                    digest.update(chunk)
+            cls._file_hashes[key] = digest.hexdigest()
+        return cls._file_hashes[key]
+
+
+    @classmethod
+    def digest(cls, global_constants: constants.Constants) -> str:
+        """
+        Cache key for the OpenCore package and template the constants select
+        """
+        digest = hashlib.sha256()
+        digest.update(global_constants.opencore_version.encode())
+        digest.update(b"DEBUG" if global_constants.opencore_debug is True else b"RELEASE")
+        digest.update(cls._hash_file(global_constants.opencore_zip_source).encode())
+        digest.update(cls._hash_file(global_constants.plist_template).encode())
+        return digest.hexdigest()
+
+
+    @classmethod
+    def get(cls, global_constants: constants.Constants) -> "OpenCoreTemplateCache":
+        """
+        Cached OpenCore package for the constants, extracted on first use
+        """
+        with cls._lock:
+            digest = cls.digest(global_constants)
+            if digest in cls._templates:
+                return cls._templates[digest]
+
+            if cls._cache_root is None:
+                cls._cache_root = Path(tempfile.mkdtemp(prefix="OCLP-Mod-OpenCore-"))
+                atexit.register(shutil.rmtree, cls._cache_root, ignore_errors=True)
+
+            logging.info(f"- 缓存 OpenCore v{global_constants.opencore_version} {'DEBUG' if global_constants.opencore_debug is True else 'RELEASE'} ({digest[:12]})")
+            extract_path = cls._cache_root / digest
+            zipfile.ZipFile(global_constants.opencore_zip_source).extractall(extract_path)
+            path = extract_path / Path("OpenCore-Build")
+            shutil.copy(global_constants.plist_template, path / Path("EFI/OC/config.plist"))
+            with open(global_constants.plist_template, "rb") as f:
+                template = plistlib.load(f)
+
+            cls._templates[digest] = cls(path, template)
+            return cls._templates[digest]
+
+
+    @classmethod
+    def clone(cls, global_constants: constants.Constants, destination: Path) -> dict:
+        """
+        Copy the cached OpenCore package to destination
+
+        Returns:
+            dict: Copy of the parsed config.plist template
+        """
+        cached = cls.get(global_constants)
+        shutil.copytree(cached.path, destination, dirs_exist_ok=True)
+        return copy.deepcopy(cached.template)
+
+
+    @classmethod
+    def set_cache_root(cls, path: Path) -> None:
+        """
+        Extract packages under path instead of a temporary folder removed at exit
+
+        For processes that don't run atexit handlers (ie. multiprocessing workers),
+        path is expected to be removed by the caller
+        """
+        with cls._lock:
+            cls._cache_root = Path(path)
+
+
+    @classmethod
+    def invalidate(cls) -> None:
+        """
+        Discard cached packages, next build re-extracts
+        """
+        with cls._lock:
+            for cached in cls._templates.values():
+                shutil.rmtree(cached.path.parent, ignore_errors=True)
+            cls._templates   = {}
+            cls._file_hashes = {}
@@ -22,6 +22,16 @@ sucatalog: Python module for querying Apple's Software Update Catalog, supportin
 ```
 
 
+### Cache Software Update Catalog
+
+`CatalogURL.url_contents` and `CatalogProducts` resolve documents through `CatalogCache`, stored under '/Users/Shared'.
+Stale entries are revalidated with ETag/Last-Modified, TTL and size limits are read from the global settings.
+
+>>> cache = sucatalog.CatalogCache()
+>>> catalog = sucatalog.CatalogURL(cache=cache).url_contents
+>>> products = sucatalog.CatalogProducts(catalog, cache=cache).products
+
+
 ### Parse Software Update Catalog - InstallAssistants only
 
 >>> import sucatalog
@@ -108,4 +118,5 @@ By default, `CatalogProducts` will only return InstallAssistants. To get all pro
 
 from .url       import CatalogURL
 from .constants import CatalogVersion, SeedType
-from .products  import CatalogProducts
\ No newline at end of file
+from .products  import CatalogProducts
+from .cache     import CatalogCache
\ No newline at end of file
@@ -0,0 +1,267 @@
+"""
+cache.py: Persistent on-disk cache for Software Update Catalog documents
+
+Entries are keyed by URL and store the server's ETag/Last-Modified, so
+stale entries are revalidated with a conditional request (304) instead
+of being downloaded again.
+
+Usage:
+>>> from sucatalog.cache import CatalogCache
+>>> catalog = CatalogCache().get_plist(sucatalog.CatalogURL().url)
+"""
+
+import time
+import hashlib
+import logging
+import plistlib
+import threading
+
+from pathlib import Path
+
+from ..support import network_handler, global_settings
+
+
+CACHE_FOLDER:     str = "/Users/Shared/.com.laobamac.oclp-mod.cache/sucatalog"
+CACHE_VERSION:    int = 1
+DEFAULT_TTL:      int = 60 * 60  # Seconds an entry is served without revalidation
+DEFAULT_MAX_SIZE: int = 128      # Megabytes, oldest entries are evicted past this
+
+
+class CatalogCache:
+    """
+    Disk-backed cache for catalog and per-product documents
+
+    TTL and size limits are read from the global settings
+    ('Catalog_Cache_TTL' in seconds, 'Catalog_Cache_Max_Size' in MB), a
+    max size of 0 disables the cache.
+
+    Safe to share between threads (ie. product prefetching): counters and
+    eviction are guarded by a lock, and the cache folder is scanned once
+    rather than on every write.
+
+    Args:
+        cache_folder (str): Folder to store entries in
+        ttl          (int): Override for the TTL in seconds
+        max_size     (int): Override for the max size in megabytes
+    """
+    def __init__(self, cache_folder: str = CACHE_FOLDER, ttl: int = None, max_size: int = None) -> None:
+        self.cache_folder: Path = Path(cache_folder)
+
+        if ttl is None:
+            ttl = global_settings.GlobalEnviromentSettings().read_property("Catalog_Cache_TTL")
+        if max_size is None:
+            max_size = global_settings.GlobalEnviromentSettings().read_property("Catalog_Cache_Max_Size")
+
+        self.ttl:      int = DEFAULT_TTL if ttl is None else int(ttl)
+        self.max_size: int = (DEFAULT_MAX_SIZE if max_size is None else int(max_size)) * 1024 * 1024
+
+        self.hits:          int = 0
+        self.revalidations: int = 0
+        self.misses:        int = 0
+
+        self._lock = threading.Lock()
+        self._entries: dict = None # Entry path -> (mtime, size), scanned on first write
+        self._total:   int  = 0
+
+        self.enabled: bool = self.max_size > 0 and self._prepare_cache_folder()
+
+
+    def _prepare_cache_folder(self) -> bool:
+        """
+        Create the cache folder if needed
+
+        Returns:
+            bool: True if the cache folder is usable
+        """
+        try:
+            self.cache_folder.mkdir(parents=True, exist_ok=True)
+        except Exception as e:
+            logging.info(f"Catalog cache unavailable ({self.cache_folder}): {e}")
+            return False
+        return True
+
+
+    def _entry_path(self, url: str) -> Path:
+        return self.cache_folder / f"{hashlib.sha256(url.encode()).hexdigest()}.plist"
+
+
+    def _read_entry(self, url: str) -> dict:
+        """
+        Read a cache entry, None if missing, corrupt or for another URL
+        """
+        path = self._entry_path(url)
+        if not path.exists():
+            return None
+        try:
+            entry = plistlib.loads(path.read_bytes())
+        except Exception:
+            return None
+        if entry.get("Version") != CACHE_VERSION or entry.get("URL") != url:
+            return None
+        return entry
+
+
+    def _write_entry(self, entry: dict) -> None:
+        """
+        Atomically write a cache entry, then enforce the size limit
+        """
+        path = self._entry_path(entry["URL"])
+        # Per thread, as the same URL may be written concurrently
+        temp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+        try:
+            temp_path.write_bytes(plistlib.dumps(entry, fmt=plistlib.FMT_BINARY))
+            temp_path.replace(path)
+            path_stat = path.stat()
+        except Exception as e:
+            logging.info(f"Failed to write catalog cache entry for {entry['URL']}: {e}")
+            temp_path.unlink(missing_ok=True)
+            return
+
+        with self._lock:
+            if self._entries is None:
+                self._scan_entries()
+            self._total -= self._entries.get(path, (0, 0))[1]
+            self._entries[path] = (path_stat.st_mtime, path_stat.st_size)
+            self._total += path_stat.st_size
+            self._evict()
+
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+
+    def _scan_entries(self) -> None:
+        """
+        Index existing entries, caller must hold the lock
+        """
+        self._entries = {}
+        for entry in self.cache_folder.glob("*.plist"):
+            try:
+                entry_stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            self._entries[entry] = (entry_stat.st_mtime, entry_stat.st_size)
+        self._total = sum(size for _, size in self._entries.values())
+
+
+    def _evict(self) -> None:
+        """
+        Remove least recently written entries until under the size limit, caller must hold the lock
+        """
+        if self._total <= self.max_size:
+            return
+        for entry in sorted(self._entries, key=lambda entry: self._entries[entry][0]):
+            if self._total <= self.max_size:
+                break
+            try:
+                entry.unlink(missing_ok=True)
+            except Exception as e:
+                logging.info(f"Failed to evict catalog cache entry {entry.name}: {e}")
+                continue
+            self._total -= self._entries.pop(entry)[1]
+
+
+    def _get(self, url: str, encode_plist: bool) -> bytes:
+        """
+        Resolve a URL through the cache
+
+        Parameters:
+            url          (str):  URL to fetch
+            encode_plist (bool): Store the document re-encoded as a binary plist
+
+        Returns:
+            bytes: Document contents (binary plist if encode_plist), None if unavailable
+        """
+        entry = self._read_entry(url) if self.enabled else None
+        if entry and entry.get("Binary", False) != encode_plist:
+            entry = None
+
+        if entry and time.time() - entry["Fetched"] < self.ttl:
+            self._count("hits")
+            return entry["Content"]
+
+        headers = {}
+        if entry:
+            if entry.get("ETag"):
+                headers["If-None-Match"] = entry["ETag"]
+            if entry.get("Last-Modified"):
+                headers["If-Modified-Since"] = entry["Last-Modified"]
+
+        response = network_handler.NetworkUtilities().get(url, headers=headers)
+
+        if entry and response.status_code == 304:
+            self._count("revalidations")
+            entry["Fetched"] = time.time()
+            self._write_entry(entry)
+            return entry["Content"]
+
+        if response.status_code != 200 or response.content is None:
+            if entry:
+                logging.info(f"Failed to revalidate {url}, using cached copy")
+                return entry["Content"]
+            return None
+
+        self._count("misses")
+        content = response.content
+        if encode_plist:
+            try:
+                content = plistlib.dumps(plistlib.loads(content), fmt=plistlib.FMT_BINARY)
+            except Exception:
+                return None
+
+        if self.enabled:
+            self._write_entry({
+                "Version":       CACHE_VERSION,
+                "URL":           url,
+                "ETag":          response.headers.get("ETag", ""),
+                "Last-Modified": response.headers.get("Last-Modified", ""),
+                "Fetched":       time.time(),
+                "Binary":        encode_plist,
+                "Content":       content,
+            })
+
+        return content
+
+
+    def get(self, url: str) -> bytes:
+        """
+        Fetch a document, revalidating the cached copy if stale
+
+        Returns:
+            bytes: Document contents, None if unavailable
+        """
+        return self._get(url, encode_plist=False)
+
+
+    def get_plist(self, url: str) -> dict:
+        """
+        Fetch and parse a plist document
+
+        Cached copies are stored as binary plists, which parse considerably
+        faster than the XML catalog served by Apple
+
+        Returns:
+            dict: Parsed plist, None if unavailable or invalid
+        """
+        content = self._get(url, encode_plist=True)
+        if content is None:
+            return None
+        try:
+            return plistlib.loads(content)
+        except Exception as e:
+            logging.error(f"Failed to parse cached plist for {url}: {e}")
+            return None
+
+
+    def clear(self) -> None:
+        """
+        Remove all cache entries
+        """
+        if not self.cache_folder.exists():
+            return
+        with self._lock:
+            for entry in self.cache_folder.glob("*.plist"):
+                entry.unlink(missing_ok=True)
+            self._entries = None
+            self._total   = 0
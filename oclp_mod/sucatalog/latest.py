@@ -0,0 +1,81 @@
+"""
+latest.py: Single-pass selection of the latest entry per group
+
+Used to reduce installer and DMG listings to the newest release of each
+macOS version, without repeatedly scanning and mutating the product list.
+
+Usage:
+>>> from sucatalog import latest
+>>> newest = latest.group_latest(dmgs, group=lambda dmg: dmg["build"][:2], key=lambda dmg: latest.parse_build(dmg["build"]))
+"""
+
+import re
+
+import packaging.version
+
+from typing    import Callable, Iterable
+from functools import lru_cache
+
+
+BUILD_PATTERN = re.compile(r"^(\d+)([A-Z])(\d+)([a-z]*)$")
+
+
+@lru_cache(maxsize=None)
+def parse_version(version: str) -> packaging.version.Version:
+    """
+    Parse a macOS version string
+
+    Returns:
+        packaging.version.Version: Parsed version, None if invalid
+    """
+    if version is None:
+        return None
+    try:
+        return packaging.version.parse(version)
+    except packaging.version.InvalidVersion:
+        return None
+
+
+@lru_cache(maxsize=None)
+def parse_build(build: str) -> tuple:
+    """
+    Convert a macOS build number into a sortable key
+
+    ex. 24A335 -> (24, "A", 1, 335)
+
+    Releases sort above betas of the same train (ie. 24A335 > 24A5331b),
+    as beta build numbers are larger but carry a lowercase suffix.
+    Unparsable builds sort below all valid builds.
+    """
+    if build is None:
+        return (-1, "", 0, 0)
+    match = BUILD_PATTERN.match(build)
+    if match is None:
+        return (-1, "", 0, 0)
+    major, train, number, suffix = match.groups()
+    return (int(major), train, 0 if suffix else 1, int(number))
+
+
+def group_latest(items: Iterable, group: Callable, key: Callable) -> dict:
+    """
+    Select the maximum item of each group in a single pass
+
+    Parameters:
+        items (Iterable): Items to select from
+        group (Callable): Returns the group of an item, or None to skip it
+        key   (Callable): Returns a comparable key, ties keep the first item seen
+
+    Returns:
+        dict: Group -> latest item, in order of first appearance
+    """
+    latest = {}
+    keys = {}
+    for item in items:
+        item_group = group(item)
+        if item_group is None:
+            continue
+        item_key = key(item)
+        if item_group not in latest or item_key > keys[item_group]:
+            latest[item_group] = item
+            keys[item_group] = item_key
+    return latest
@@ -4,17 +4,24 @@ products.py: Parse products from Software Update Catalog
 
 import re
 import plistlib
+import threading
 
 import packaging.version
 import xml.etree.ElementTree as ET
 
-from pathlib   import Path
-from functools import cached_property
+from pathlib            import Path
+from functools          import cached_property
+from urllib.parse       import urlparse
+from concurrent.futures import ThreadPoolExecutor
 
 from .url       import CatalogURL
+from .cache     import CatalogCache
+from .          import latest
 from .constants import CatalogVersion, SeedType
 
-from ..support import network_handler
+
+PREFETCH_WORKERS:  int = 16  # Concurrent metadata requests while parsing the catalog
+PREFETCH_PER_HOST: int = 6   # Concurrent requests per host (swcdn/swdist)
 
 
 class CatalogProducts:
@@ -24,12 +31,14 @@ class CatalogProducts:
         install_assistants_only       (bool): Only list InstallAssistant products
         only_vmm_install_assistants   (bool): Only list VMM-x86_64-compatible InstallAssistant products
         max_install_assistant_version (CatalogVersion): Maximum InstallAssistant version to list
+        cache                         (CatalogCache): Cache for per-product documents (defaults to the on-disk cache)
     """
     def __init__(self,
                  catalog: dict,
                  install_assistants_only: bool = True,
                  only_vmm_install_assistants: bool = True,
-                 max_install_assistant_version: CatalogVersion = CatalogVersion.TAHOE
+                 max_install_assistant_version: CatalogVersion = CatalogVersion.TAHOE,
+                 cache: CatalogCache = None
                 ) -> None:
         self.catalog:             dict = catalog
         self.ia_only:             bool = install_assistants_only
@@ -37,6 +46,86 @@ class CatalogProducts:
         self.max_ia_version: packaging = packaging.version.parse(f"{max_install_assistant_version.value}.99.99")
         self.max_ia_catalog: CatalogVersion = max_install_assistant_version
 
+        self.cache: CatalogCache = cache if cache is not None else CatalogCache()
+
+        self._documents:   dict = {}
+        self._host_limits: dict = {}
+        self._host_lock:   threading.Lock = threading.Lock()
+
+
+    def _get(self, url: str) -> bytes:
+        """
+        Fetch a document through the cache, limiting concurrent requests per host
+        """
+        host = urlparse(url).netloc
+        with self._host_lock:
+            if host not in self._host_limits:
+                self._host_limits[host] = threading.BoundedSemaphore(PREFETCH_PER_HOST)
+
+        with self._host_limits[host]:
+            return self.cache.get(url)
+
+
+    def _fetch(self, url: str) -> bytes:
+        """
+        Return a prefetched document, or fetch it now if it was not prefetched
+        """
+        if url in self._documents:
+            return self._documents[url].result()
+        return self._get(url)
+
+
+    def _is_install_assistant(self, product: dict) -> bool:
+        """
+        Check whether a catalog product is an InstallAssistant (macOS Installer)
+        """
+        if "ExtendedMetaInfo" not in product:
+            return False
+        if "InstallAssistantPackageIdentifiers" not in product["ExtendedMetaInfo"]:
+            return False
+        if "SharedSupport" not in product["ExtendedMetaInfo"]["InstallAssistantPackageIdentifiers"]:
+            return False
+        return True
+
+
+    def _english_distribution_url(self, product: dict) -> str:
+        """
+        Resolve the English distribution URL of a catalog product, if any
+        """
+        if "Distributions" not in product:
+            return None
+        if "English" in product["Distributions"]:
+            return product["Distributions"]["English"]
+        if "en" in product["Distributions"]:
+            return product["Distributions"]["en"]
+        return None
+
+
+    def _prefetch(self, executor: ThreadPoolExecutor, products: dict) -> None:
+        """
+        Queue the metadata documents each product will need
+
+        Info.plist and MobileAsset plists are always parsed, while the English
+        distribution is only known to be required when neither is present.
+        ServerMetadataURL remains on demand as it is rarely reached
+        """
+        for product in products.values():
+            if self.ia_only and not self._is_install_assistant(product):
+                continue
+
+            urls = [
+                package["URL"] for package in product.get("Packages", [])
+                if "URL" in package and Path(package["URL"]).name in ["Info.plist", "com_apple_MobileAsset_MacSoftwareUpdate.plist"]
+            ]
+            if not urls:
+                url = self._english_distribution_url(product)
+                if url is not None:
+                    urls.append(url)
+
+            for url in urls:
+                if url not in self._documents:
+                    self._documents[url] = executor.submit(self._get, url)
+
 
     def _legacy_parse_info_plist(self, data: dict) -> dict:
         """
@@ -184,16 +273,14 @@ class CatalogProducts:
         return marketing_name
 
 
-    def _list_latest_installers_only(self, products: list) -> list:
+    def _supported_versions(self) -> list:
         """
-        List only the latest installers per macOS version
+        List the macOS versions shown as latest installers
 
-        macOS versions capped at n-3 (n being the latest macOS version)
+        n to n-3, where n is the latest macOS version set (newest first)
         """
-
         supported_versions = []
 
-        # Build list of supported versions (n to n-3, where n is the latest macOS version set)
         did_find_latest = False
         for version in CatalogVersion:
             if did_find_latest is False:
@@ -206,69 +293,71 @@ class CatalogProducts:
             if len(supported_versions) == 4:
                 break
 
-        # Invert the list
-        supported_versions = supported_versions[::-1]
+        return supported_versions
 
-        # Create duplicate product list
-        products_copy = products.copy()
 
-        # Remove all but the newest version
-        for version in supported_versions:
-            _newest_version = packaging.version.parse("0.0.0")
+    def _list_latest_installers_only(self, products: list) -> list:
+        """
+        List only the latest installers per macOS version
 
-            # First, determine largest version
-            for installer in products:
-                if installer["Version"] is None:
-                    continue
-                if not installer["Version"].startswith(version.value):
-                    continue
-                if installer["Catalog"] in [SeedType.CustomerSeed, SeedType.DeveloperSeed, SeedType.PublicSeed]:
-                    continue
-                try:
-                    if packaging.version.parse(installer["Version"]) > _newest_version:
-                        _newest_version = packaging.version.parse(installer["Version"])
-                except packaging.version.InvalidVersion:
-                    pass
-
-            # Next, remove all installers that are not the newest version
-            for installer in products:
-                if installer["Version"] is None:
-                    continue
-                if not installer["Version"].startswith(version.value):
-                    continue
-                try:
-                    if packaging.version.parse(installer["Version"]) < _newest_version:
-                        if installer in products_copy:
-                            products_copy.pop(products_copy.index(installer))
-                except packaging.version.InvalidVersion:
-                    pass
+        macOS versions capped at n-3 (n being the latest macOS version)
 
-                # Remove beta versions if a public release is available
-                if _newest_version != packaging.version.parse("0.0.0"):
-                    if installer["Catalog"] in [SeedType.CustomerSeed, SeedType.DeveloperSeed, SeedType.PublicSeed]:
-                        if installer in products_copy:
-                            products_copy.pop(products_copy.index(installer))
+        Products are bucketed by macOS version in a single pass, then filtered
+        in a second pass, rather than repeatedly removing entries from a copy
+        """
 
-        
-        # Remove duplicates of the same version (i.e. multiple betas still in catalog), keep only latest
-        version_map = {}
-        for installer in products_copy:
-            version = installer.get("Version")
-            post_date = installer.get("PostDate")
-            if version is None:
-                continue
-            if version not in version_map or post_date > version_map[version].get("PostDate", ""):
-                version_map[version] = installer
+        supported_versions = self._supported_versions()
+        oldest_major = supported_versions[-1].value
+        betas = [SeedType.CustomerSeed, SeedType.DeveloperSeed, SeedType.PublicSeed]
+
+        def _bucket(installer: dict) -> CatalogVersion:
+            if installer["Version"] is None:
+                return None
+            for version in supported_versions:
+                if installer["Version"].startswith(version.value):
+                    return version
+            return None
+
+        # Newest public release per macOS version
+        public = [
+            installer for installer in products
+            if installer["Catalog"] not in betas and latest.parse_version(installer["Version"]) is not None
+        ]
+        newest = {
+            version: latest.parse_version(installer["Version"])
+            for version, installer in latest.group_latest(public, group=_bucket, key=lambda installer: latest.parse_version(installer["Version"])).items()
+            if latest.parse_version(installer["Version"]) > latest.parse_version("0.0.0")
+        }
 
-        products_copy = list(version_map.values())
+        def _is_listed(installer: dict) -> bool:
+            if installer["Version"] is None:
+                return False
 
-        # Remove EOL versions (older than n-3)
-        for installer in products:
-            if installer["Version"].split(".")[0] < supported_versions[-4].value:
-                if installer in products_copy:
-                    products_copy.pop(products_copy.index(installer))
+            bucket = _bucket(installer)
+            if bucket in newest:
+                parsed = latest.parse_version(installer["Version"])
+                if parsed is not None and parsed < newest[bucket]:
+                    return False
+                # Remove beta versions if a public release is available
+                if installer["Catalog"] in betas:
+                    return False
 
-        return products_copy
+            # Remove EOL versions (older than n-3)
+            major = latest.parse_version(installer["Version"].split(".")[0])
+            if major is None:
+                if installer["Version"].split(".")[0] < oldest_major:
+                    return False
+            elif major < latest.parse_version(oldest_major):
+                return False
+
+            return True
+
+        # Remove duplicates of the same version (i.e. multiple betas still in catalog), keep only latest
+        return list(latest.group_latest(
+            filter(_is_listed, products),
+            group=lambda installer: installer["Version"],
+            key=lambda installer: (latest.parse_build(installer["Build"]), installer["PostDate"]),
+        ).values())
 
 
     @cached_property
@@ -279,17 +368,27 @@ class CatalogProducts:
 
         catalog = self.catalog
 
+        with ThreadPoolExecutor(max_workers=PREFETCH_WORKERS) as executor:
+            self._prefetch(executor, catalog["Products"])
+            _products = self._parse_products(catalog)
+
+        self._documents = {}
+
+        return sorted(_products, key=lambda x: x["Version"])
+
+
+    def _parse_products(self, catalog: dict) -> list:
+        """
+        Build the product list, using prefetched metadata documents where available
+        """
+
         _products = []
 
         for product in catalog["Products"]:
 
             # InstallAssistants.pkgs (macOS Installers) will have the following keys:
             if self.ia_only:
-                if "ExtendedMetaInfo" not in catalog["Products"][product]:
-                    continue
-                if "InstallAssistantPackageIdentifiers" not in catalog["Products"][product]["ExtendedMetaInfo"]:
-                    continue
-                if "SharedSupport" not in catalog["Products"][product]["ExtendedMetaInfo"]["InstallAssistantPackageIdentifiers"]:
+                if not self._is_install_assistant(catalog["Products"][product]):
                     continue
 
             _product_map = {
@@ -331,11 +430,10 @@ class CatalogProducts:
                         if Path(package["URL"]).name not in ["Info.plist", "com_apple_MobileAsset_MacSoftwareUpdate.plist"]:
                             continue
 
-                        net_obj = network_handler.NetworkUtilities().get(package["URL"])
-                        if net_obj is None:
+                        contents = self._fetch(package["URL"])
+                        if contents is None:
                             continue
 
-                        contents = net_obj.content
                         try:
                             plist_contents = plistlib.loads(contents)
                         except plistlib.InvalidFileException:
@@ -361,34 +459,25 @@ class CatalogProducts:
 
             # Fall back to English distribution if no version is found
             if _product_map["Version"] is None:
-                url = None
-                if "Distributions" in catalog["Products"][product]:
-                    if "English" in catalog["Products"][product]["Distributions"]:
-                        url = catalog["Products"][product]["Distributions"]["English"]
-                    elif "en" in catalog["Products"][product]["Distributions"]:
-                        url = catalog["Products"][product]["Distributions"]["en"]
+                url = self._english_distribution_url(catalog["Products"][product])
 
                 if url is None:
                     continue
 
-                net_obj = network_handler.NetworkUtilities().get(url)
-                if net_obj is None:
+                contents = self._fetch(url)
+                if contents is None:
                     continue
 
-                contents = net_obj.content
-
                 _product_map.update(self._parse_english_distributions(contents))
 
                 if _product_map["Version"] is None:
                     if "ServerMetadataURL" in catalog["Products"][product]:
                         server_metadata_url = catalog["Products"][product]["ServerMetadataURL"]
 
-                        net_obj = network_handler.NetworkUtilities().get(server_metadata_url)
-                        if net_obj is None:
+                        server_metadata_contents = self._fetch(server_metadata_url)
+                        if server_metadata_contents is None:
                             continue
 
-                        server_metadata_contents = net_obj.content
-
                         try:
                             server_metadata_plist = plistlib.loads(server_metadata_contents)
                         except plistlib.InvalidFileException:
@@ -421,8 +510,6 @@ class CatalogProducts:
 
             _products.append(_product_map)
 
-        _products = sorted(_products, key=lambda x: x["Version"])
-
         return _products
 
 
@@ -8,7 +8,6 @@ https://swscan.apple.com/content/catalogs/others/index-15seed-15-14-13-12-10.16-
 """
 
 import logging
-import plistlib
 
 from .constants import (
     SeedType,
@@ -16,7 +15,7 @@ from .constants import (
     CatalogExtension
 )
 
-from ..support import network_handler
+from .cache import CatalogCache
 
 
 class CatalogURL:
@@ -27,15 +26,18 @@ class CatalogURL:
         version   (CatalogVersion):    Version of macOS
         seed      (SeedType):          Seed type
         extension (CatalogExtension):  Extension for the catalog URL
+        cache     (CatalogCache):      Cache used for url_contents (defaults to the on-disk cache)
     """
     def __init__(self,
                  version: CatalogVersion = CatalogVersion.TAHOE,
                  seed: SeedType = SeedType.PublicRelease,
-                 extension: CatalogExtension = CatalogExtension.PLIST
+                 extension: CatalogExtension = CatalogExtension.PLIST,
+                 cache: CatalogCache = None
                  ) -> None:
         self.version   = version
         self.seed      = seed
         self.extension = extension
+        self.cache     = cache
 
         self.seed    = self._fix_seed_type()
         self.version = self._fix_version()
@@ -167,9 +169,16 @@ class CatalogURL:
     def url_contents(self) -> dict:
         """
         Return URL contents
+
+        Served from the on-disk cache when fresh, otherwise revalidated
+        with a conditional request
         """
         try:
-            return plistlib.loads(network_handler.NetworkUtilities().get(self.url).content)
+            cache = self.cache if self.cache is not None else CatalogCache()
+            contents = cache.get_plist(self.url)
+            if contents is None:
+                raise Exception("No contents returned")
+            return contents
         except Exception as e:
             logging.error(f"Failed to fetch URL contents: {e}")
             return None
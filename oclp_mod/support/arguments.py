@@ -15,11 +15,6 @@ from . import subprocess_wrapper
 
 from .. import constants
 
-from ..wx_gui import gui_entry
-from ..efi_builder import build
-from ..sys_patch import sys_patch
-from ..sys_patch.auto_patcher import StartAutomaticPatching
-
 from ..datasets import (
     model_array,
     os_data
@@ -27,10 +22,12 @@ from ..datasets import (
 
 from . import (
     utilities,
-    defaults,
-    validation
+    defaults
 )
 
+# Handlers import efi_builder, sys_patch, validation and wx_gui on use,
+# so each CLI path only pays for the modules it needs
+
 
 
 # Generic building args
@@ -49,6 +46,10 @@ class arguments:
         Parses arguments passed to the patcher
         """
 
+        if self.args.profile_build:
+            logging.info("- 启用构建性能分析")
+            self.constants.profile_build = True
+
         if self.args.validate:
             self._validation_handler()
             return
@@ -81,6 +82,7 @@ class arguments:
         进入验证模式
         """
         logging.info("设置验证模式")
+        from . import validation
         validation.PatcherValidation(self.constants)
 
 
@@ -90,6 +92,11 @@ class arguments:
         """
 
         logging.info("设置系统卷修补")
+        from ..sys_patch import sys_patch
+        if self.args.dry_run:
+            sys_patch.PatchSysVolume(self.constants.custom_model or self.constants.computer.real_model, self.constants, None).start_dry_run()
+            return
+
         if "Library/InstallerSandboxes/" in str(self.constants.payload_path):
             logging.info("- 从安装沙盒运行，阻止操作系统更新程序")
             thread = threading.Thread(target=sys_patch.PatchSysVolume(self.constants.custom_model or self.constants.computer.real_model, self.constants, None).start_patch)
@@ -106,6 +113,7 @@ class arguments:
         开始根卷取消修补
         """
         logging.info("设置系统卷取消修补")
+        from ..sys_patch import sys_patch
         sys_patch.PatchSysVolume(self.constants.custom_model or self.constants.computer.real_model, self.constants, None).start_unpatch()
 
 
@@ -115,6 +123,7 @@ class arguments:
         """
 
         logging.info("设置自动修补")
+        from ..sys_patch.auto_patcher import StartAutomaticPatching
         StartAutomaticPatching(self.constants).start_auto_patch()
 
 
@@ -146,6 +155,7 @@ class arguments:
             logging.info("另一个OS缓存实例正在运行，退出")
             return
 
+        from ..wx_gui import gui_entry
         gui_entry.EntryPoint(self.constants).start(entry=gui_entry.SupportedEntryPoints.OS_CACHE)
 
 
@@ -269,4 +279,5 @@ class arguments:
             self.constants.allow_oc_everywhere = True
             self.constants.serial_settings = "None"
 
+        from ..efi_builder import build
         build.BuildOpenCore(self.constants.custom_model or self.constants.computer.real_model, self.constants)
\ No newline at end of file
@@ -330,9 +330,9 @@ class GenerateDefaults:
                                 continue
 
                     # Allow H.265 on AMD
-                    if self.model in smbios_data.smbios_dictionary:
-                        if "Socketed GPUs" in smbios_data.smbios_dictionary[self.model]:
-                            self.constants.serial_settings = "Minimal"
+                    model = smbios_data.get_model(self.model)
+                    if model is not None and model.socketed_gpus is not None:
+                        self.constants.serial_settings = "Minimal"
 
                 # See if system can use the native AMD stack in Ventura
                 if arch in [
@@ -95,16 +95,18 @@ def find_model_off_board(board):
             board = board[:-2]
         board = board.lower()
 
-    for key in smbios_data.smbios_dictionary:
-        if board in [smbios_data.smbios_dictionary[key]["Board ID"], smbios_data.smbios_dictionary[key]["SecureBootModel"]]:
-            if key.endswith("_v2") or key.endswith("_v3") or key.endswith("_v4"):
-                # smbios_data has duplicate SMBIOS to handle multiple board IDs
-                key = key[:-3]
-            if key == "MacPro4,1":
-                # 4,1 and 5,1 have the same board ID, best to return the newer ID
-                key = "MacPro5,1"
-            return key
-    return None
+    model = smbios_data.table().by_board_id(board)
+    if model is None:
+        return None
+
+    key = model.identifier
+    if key.endswith("_v2") or key.endswith("_v3") or key.endswith("_v4"):
+        # smbios_data has duplicate SMBIOS to handle multiple board IDs
+        key = key[:-3]
+    if key == "MacPro4,1":
+        # 4,1 and 5,1 have the same board ID, best to return the newer ID
+        key = "MacPro5,1"
+    return key
 
 def find_board_off_model(model):
     if model in smbios_data.smbios_dictionary:
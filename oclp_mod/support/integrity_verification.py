@@ -6,11 +6,15 @@ integrity_verification.py: 验证通过 .chunklist 和 .integrityDataV1 文件
 """
 
 import enum
+import mmap
+import bisect
 import hashlib
 import logging
 import binascii
 import threading
 
+from concurrent.futures import ThreadPoolExecutor
+
 from typing import Union
 from pathlib import Path
 
@@ -38,7 +42,7 @@ class ChunklistVerification:
 
     使用方法:
         >>> chunk_obj = ChunklistVerification("InstallAssistant.pkg", "InstallAssistant.pkg.integrityDataV1")
-        >>> chunk_obj.validate()
+        >>> chunk_obj.validate(workers=os.cpu_count())
         >>> while chunk_obj.status == ChunklistStatus.IN_PROGRESS:
         ...     print(f"正在验证 {chunk_obj.current_chunk} of {chunk_obj.total_chunks}")
 
@@ -61,6 +65,17 @@ class ChunklistVerification:
 
         self.status: ChunklistStatus = ChunklistStatus.IN_PROGRESS
 
+        # 每个块在文件中的起始偏移, 用于边下载边验证
+        self.chunk_offsets: list = []
+        self.file_size:     int  = 0
+        if self.chunks:
+            for chunk in self.chunks:
+                self.chunk_offsets.append(self.file_size)
+                self.file_size += chunk["length"]
+
+        self._verified:      set            = set()
+        self._verified_lock: threading.Lock = threading.Lock()
+
 
     def _generate_chunks(self, chunklist: Union[Path, bytes]) -> dict:
         """
@@ -93,9 +108,12 @@ class ChunklistVerification:
         return chunks
 
 
-    def _validate(self) -> None:
+    def _validate(self, workers: int = 1) -> None:
         """
         验证提供的文件是否符合 chunklist
+
+        参数:
+            workers (int): 并行哈希的线程数, 1 表示顺序验证
         """
 
         if self.chunks is None:
@@ -114,6 +132,10 @@ class ChunklistVerification:
             logging.info(self.error_msg)
             return
 
+        if workers > 1 and self.file_path.stat().st_size > 0:
+            self._validate_parallel(workers)
+            return
+
         with self.file_path.open("rb") as f:
             for chunk in self.chunks:
                 self.current_chunk += 1
@@ -127,8 +149,175 @@ class ChunklistVerification:
         self.status = ChunklistStatus.SUCCESS
 
 
-    def validate(self) -> None:
+    def _validate_parallel(self, workers: int) -> None:
+        """
+        使用线程池并行验证各个块
+
+        块之间相互独立, 文件通过 mmap 映射, hashlib 在哈希大块数据时会释放 GIL,
+        因此验证速度随核心数增加。current_chunk 表示已完成验证的块数量
+
+        参数:
+            workers (int): 线程数
+        """
+
+        failed = threading.Event()
+        failures = []
+        progress_lock = threading.Lock()
+
+        # memoryview 切片不复制数据, hashlib 直接读取映射, 各线程的缺页可以重叠
+        # 视图须在 mmap 关闭前释放
+        with self.file_path.open("rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped, memoryview(mapped) as view:
+            def _hash_chunk(index: int) -> None:
+                if failed.is_set():
+                    return
+                chunk = self.chunks[index]
+                offset = self.chunk_offsets[index]
+                status = hashlib.sha256(view[offset:offset + chunk["length"]]).digest()
+                with progress_lock:
+                    if status != chunk["checksum"]:
+                        failures.append((index, status))
+                        failed.set()
+                        return
+                    if not failed.is_set():
+                        self.current_chunk += 1
+
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                list(executor.map(_hash_chunk, range(self.total_chunks)))
+
+        if failures:
+            index, status = min(failures)
+            self.current_chunk = index + 1
+            self.error_msg = f"块 {self.current_chunk} 校验和状态失败: 块校验和 {binascii.hexlify(self.chunks[index]['checksum']).decode()}, 计算校验和 {binascii.hexlify(status).decode()}"
+            self.status = ChunklistStatus.FAILURE
+            logging.info(self.error_msg)
+            return
+
+        self.status = ChunklistStatus.SUCCESS
+
+
+    def validate(self, workers: int = 1) -> None:
         """
         启动 _validate() 线程
+
+        参数:
+            workers (int): 并行哈希的线程数, 1 表示顺序验证
+        """
+        threading.Thread(target=self._validate, args=(workers,)).start()
+
+
+    def chunk_index_at(self, offset: int) -> int:
+        """
+        获取从指定偏移开始的块索引
+
+        参数:
+            offset (int): 文件中的字节偏移
+
+        返回:
+            int: 块索引, 如果偏移不在块边界上则返回 -1
+        """
+        index = bisect.bisect_right(self.chunk_offsets, offset) - 1
+        if index < 0 or self.chunk_offsets[index] != offset:
+            return -1
+        return index
+
+
+    def verify_chunk(self, index: int, digest: bytes) -> bool:
+        """
+        验证单个块的校验和, 供下载过程中增量验证使用
+
+        验证失败时仅记录 error_msg, 不设置 FAILURE, 以便调用方重新获取该块
+
+        参数:
+            index  (int):   块索引
+            digest (bytes): 计算得到的 SHA-256 摘要
+
+        返回:
+            bool: 校验和是否匹配
+        """
+        chunk = self.chunks[index]
+        if digest != chunk["checksum"]:
+            self.error_msg = f"块 {index + 1} 校验和状态失败: 块校验和 {binascii.hexlify(chunk['checksum']).decode()}, 计算校验和 {binascii.hexlify(digest).decode()}"
+            logging.info(self.error_msg)
+            return False
+
+        self.mark_verified(index)
+        return True
+
+
+    def mark_verified(self, index: int) -> None:
+        """
+        将块标记为已验证, 例如恢复下载时上次已验证的块
+
+        参数:
+            index (int): 块索引
+        """
+        with self._verified_lock:
+            self._verified.add(index)
+            self.current_chunk = len(self._verified)
+            if self.current_chunk == self.total_chunks:
+                self.status = ChunklistStatus.SUCCESS
+
+
+class ChunklistStream:
+    """
+    边下载边验证的增量哈希器, 从块边界开始按顺序接收数据
+
+    参数:
+        verification (ChunklistVerification): 块列表
+        offset       (int):                   起始偏移, 必须位于块边界
+
+    使用方法:
+        >>> stream = ChunklistStream(chunk_obj, 0)
+        >>> for data in response.iter_content():
+        ...     verified = stream.update(data)
+        ...     if verified is None:
+        ...         print(f"块 {stream.index + 1} 损坏")
+    """
+
+    def __init__(self, verification: ChunklistVerification, offset: int) -> None:
+        self.verification: ChunklistVerification = verification
+        self.index:        int = verification.chunk_index_at(offset)
+
+        if self.index == -1:
+            raise Exception(f"偏移 {offset} 不在块边界上")
+
+        self._hasher    = hashlib.sha256()
+        self._remaining = verification.chunks[self.index]["length"]
+
+
+    def update(self, data: bytes) -> Union[int, None]:
+        """
+        哈希新数据, 并验证所有已完整接收的块
+
+        参数:
+            data (bytes): 紧接上次数据之后的字节
+
+        返回:
+            int: 本次新验证通过的字节数 (仅计算完整块), 如果块校验失败则返回 None
         """
-        threading.Thread(target=self._validate).start()
\ No newline at end of file
+        verified = 0
+        view = memoryview(data)
+        while view:
+            if self.index >= self.verification.total_chunks:
+                self.verification.error_msg = "文件大小超过块列表描述的大小"
+                logging.info(self.verification.error_msg)
+                return None
+
+            length = min(self._remaining, len(view))
+            self._hasher.update(view[:length])
+            self._remaining -= length
+            view = view[length:]
+
+            if self._remaining:
+                continue
+
+            if not self.verification.verify_chunk(self.index, self._hasher.digest()):
+                return None
+
+            verified += self.verification.chunks[self.index]["length"]
+            self.index += 1
+            self._hasher = hashlib.sha256()
+            if self.index < self.verification.total_chunks:
+                self._remaining = self.verification.chunks[self.index]["length"]
+
+        return verified
@@ -10,20 +10,30 @@ import requests
 import threading
 import logging
 import enum
+import bisect
 import hashlib
 import atexit
+import plistlib
 
 from typing import Union
 from pathlib import Path
 
 from ..constants import Constants
 
-from . import utilities
+from . import utilities, integrity_verification
 
 SESSION = requests.Session()
 
 settings = Constants()
 
+SEGMENT_COUNT:       int = 4                   # Parallel Range connections per download
+SEGMENT_MIN_SIZE:    int = 1024 * 1024 * 64    # Files smaller than this are downloaded over a single connection
+SEGMENT_RETRIES:     int = 5                   # Reconnect attempts per segment before giving up
+CHUNK_RETRIES:       int = 3                   # Re-fetch attempts for a chunk failing chunklist verification
+STREAM_CHUNK_SIZE:   int = 1024 * 1024 * 4
+STATE_FILE_SUFFIX:   str = ".oclp-download"    # Sidecar file tracking segment progress for resuming
+STATE_FILE_VERSION:  int = 1
+
 class DownloadStatus(enum.Enum):
     """
     Enum for download status
@@ -188,9 +198,13 @@ class DownloadObject:
 
         >>> print("Download complete"")
 
+    If a ChunklistVerification object is provided, each chunk is verified as it
+    is written and corrupted chunks are re-fetched. On success the object's
+    status is set to ChunklistStatus.SUCCESS, removing the need for a second pass.
+
     """
 
-    def __init__(self, url: str, path: str, size: str = None) -> None:
+    def __init__(self, url: str, path: str, size: str = None, chunklist: integrity_verification.ChunklistVerification = None) -> None:
         self.url:       str = url
         self.status:    str = DownloadStatus.INACTIVE
         self.size:      str = size
@@ -215,6 +229,15 @@ class DownloadObject:
         self.checksum = None
         self._checksum_storage: hash = None
 
+        self.segment_count:     int  = SEGMENT_COUNT
+        self.state_path:        Path = Path(str(self.filepath) + STATE_FILE_SUFFIX)
+
+        self._segments:         list = []
+        self._segment_lock:     threading.Lock = threading.Lock()
+        self._resumed_size:     float = 0.0
+
+        self.chunklist: integrity_verification.ChunklistVerification = chunklist if chunklist and chunklist.chunks else None
+
         # 注释掉初始的文件大小获取，在下载时再获取
         # if self.has_network:
         #     self._populate_file_size()
@@ -338,10 +361,16 @@ class DownloadObject:
 
         try:
             if Path(path).exists():
+                if self._load_state() is not None:
+                    logging.info(f"保留部分下载的文件以便恢复: {path}")
+                    return True
                 logging.info(f"删除现有文件: {path}")
                 Path(path).unlink()
                 return True
 
+            if self.state_path.exists():
+                self.state_path.unlink()
+
             if not Path(path).parent.exists():
                 logging.info(f"创建目录: {Path(path).parent}")
                 Path(path).parent.mkdir(parents=True, exist_ok=True)
@@ -385,6 +414,15 @@ class DownloadObject:
             # 在下载前获取文件大小
             self._populate_file_size()
 
+            range_size = self._probe_range_support()
+            if range_size >= SEGMENT_MIN_SIZE and self.segment_count > 1:
+                self._download_segmented(range_size, display_progress)
+                self.status = DownloadStatus.COMPLETE
+                utilities.enable_sleep_after_running()
+                return
+
+            self._remove_state()
+
             # 使用相同的SESSION确保一致性
             response = SESSION.get(self.url, stream=True, timeout=30, allow_redirects=True)
             
@@ -404,9 +442,12 @@ class DownloadObject:
                     self.total_file_size = float(content_length)
                     logging.info(f"从响应头获取到文件大小: {utilities.human_fmt(self.total_file_size)}")
 
+            # 没有分段支持时无法单独重新获取损坏的块，因此校验失败时立即停止
+            stream = integrity_verification.ChunklistStream(self.chunklist, 0) if self.chunklist else None
+
             with open(self.filepath, 'wb') as file:
                 atexit.register(self.stop)
-                for i, chunk in enumerate(response.iter_content(1024 * 1024 * 4)):
+                for i, chunk in enumerate(response.iter_content(STREAM_CHUNK_SIZE)):
                     if self.should_stop:
                         raise Exception("下载已停止")
                     if chunk:
@@ -414,6 +455,9 @@ class DownloadObject:
                         self.downloaded_file_size += len(chunk)
                         if self.should_checksum:
                             self._update_checksum(chunk)
+                        if stream is not None and stream.update(chunk) is None:
+                            self.chunklist.status = integrity_verification.ChunklistStatus.FAILURE
+                            raise Exception(self.chunklist.error_msg)
                         if display_progress and i % 100 == 0:
                             # 不要在这里使用日志记录，因为我们会向日志文件中大量写入
                             if self.total_file_size == 0.0:
@@ -439,6 +483,297 @@ class DownloadObject:
         utilities.enable_sleep_after_running()
 
 
+    def _probe_range_support(self) -> int:
+        """
+        Check whether the server honours HTTP Range requests
+
+        Issues a single byte Range request and parses Content-Range for the real size,
+        as Content-Length from HEAD may describe a redirect or be overridden by self.size
+
+        Returns:
+            int: Exact file size in bytes if Range requests are supported, 0 otherwise
+        """
+
+        try:
+            response = SESSION.get(self.url, headers={"Range": "bytes=0-0"}, stream=True, timeout=10, allow_redirects=True, verify=False)
+            response.close()
+        except Exception as e:
+            logging.info(f"无法检测分段下载支持: {str(e)}")
+            return 0
+
+        if response.status_code != 206:
+            return 0
+
+        content_range = response.headers.get("Content-Range", "")
+        if not content_range.startswith("bytes ") or "/" not in content_range:
+            return 0
+
+        total = content_range.rsplit("/", 1)[1]
+        if not total.isdigit():
+            return 0
+
+        return int(total)
+
+
+    def _plan_segments(self, file_size: int) -> list:
+        """
+        Split the file into contiguous byte ranges, one per connection
+
+        Parameters:
+            file_size (int): Size of the file in bytes
+
+        When verifying against a chunklist, boundaries are aligned to chunk offsets
+        so every segment can hash its chunks in order
+
+        Returns:
+            list: List of segments ({"Start", "End", "Downloaded"}), End is inclusive
+        """
+
+        segment_size = -(-file_size // self.segment_count)
+        starts = list(range(0, file_size, segment_size))
+        if self.chunklist:
+            offsets = self.chunklist.chunk_offsets
+            starts = sorted({offsets[min(bisect.bisect_left(offsets, start), len(offsets) - 1)] for start in starts})
+
+        segments = []
+        for start, end in zip(starts, starts[1:] + [file_size]):
+            segments.append({
+                "Start":      start,
+                "End":        end - 1,
+                "Downloaded": 0,
+            })
+        return segments
+
+
+    def _load_state(self) -> Union[dict, None]:
+        """
+        Load resume state from the sidecar file
+
+        Returns:
+            dict: State if it belongs to this URL and file, None otherwise
+        """
+
+        if not self.state_path.exists() or not self.filepath.exists():
+            return None
+
+        try:
+            state = plistlib.loads(self.state_path.read_bytes())
+        except Exception as e:
+            logging.info(f"无法读取下载状态文件 {self.state_path}: {str(e)}")
+            return None
+
+        if state.get("Version") != STATE_FILE_VERSION or state.get("URL") != self.url:
+            return None
+        if state.get("Chunklist") != (self.chunklist is not None):
+            return None
+        if self.filepath.stat().st_size != state.get("Size"):
+            return None
+
+        return state
+
+
+    def _save_state(self, file_size: int) -> None:
+        """
+        Write current segment progress to the sidecar file
+
+        Parameters:
+            file_size (int): Size of the file in bytes
+        """
+
+        with self._segment_lock:
+            state = {
+                "Version":   STATE_FILE_VERSION,
+                "URL":       self.url,
+                "Size":      file_size,
+                "Chunklist": self.chunklist is not None,
+                "Segments":  [dict(segment) for segment in self._segments],
+            }
+
+        try:
+            temp_path = Path(str(self.state_path) + ".tmp")
+            temp_path.write_bytes(plistlib.dumps(state))
+            temp_path.replace(self.state_path)
+        except Exception as e:
+            logging.info(f"无法写入下载状态文件 {self.state_path}: {str(e)}")
+
+
+    def _remove_state(self) -> None:
+        """
+        Remove the sidecar state file, if present
+        """
+
+        if self.state_path.exists():
+            self.state_path.unlink()
+
+
+    def _download_segmented(self, file_size: int, display_progress: bool = False) -> None:
+        """
+        Download the file as several parallel Range segments
+
+        Progress is persisted to the sidecar state file, so an interrupted
+        download resumes from the last written byte of each segment
+
+        Parameters:
+            file_size (int): Exact size of the file in bytes
+            display_progress (bool): Display progress in console
+        """
+
+        if self.chunklist and self.chunklist.file_size != file_size:
+            logging.info(f"块列表大小 ({self.chunklist.file_size}) 与文件大小 ({file_size}) 不符, 下载后再进行验证")
+            self.chunklist = None
+
+        state = self._load_state()
+        if state is not None and state["Size"] == file_size:
+            self._segments = state["Segments"]
+            self._resumed_size = float(sum(segment["Downloaded"] for segment in self._segments))
+            logging.info(f"恢复下载: 已有 {utilities.human_fmt(self._resumed_size)} 的 {self.filename}")
+            if self.chunklist:
+                # Segment progress only counts verified chunks, so anything before it was checked in the previous session
+                for segment in self._segments:
+                    index = self.chunklist.chunk_index_at(segment["Start"])
+                    while index < self.chunklist.total_chunks and self.chunklist.chunk_offsets[index] < segment["Start"] + segment["Downloaded"]:
+                        self.chunklist.mark_verified(index)
+                        index += 1
+        else:
+            self._segments = self._plan_segments(file_size)
+            self._resumed_size = 0.0
+            with open(self.filepath, "wb") as file:
+                file.truncate(file_size)
+
+        self.total_file_size = float(file_size)
+        self.downloaded_file_size = self._resumed_size
+        self._save_state(file_size)
+
+        logging.info(f"使用 {len(self._segments)} 个分段下载 {self.filename} ({utilities.human_fmt(file_size)})")
+
+        errors = []
+        abort = threading.Event()
+        def _segment_worker(segment: dict) -> None:
+            try:
+                self._download_segment(segment, abort)
+            except Exception as e:
+                errors.append(e)
+                abort.set()
+
+        threads = [
+            threading.Thread(target=_segment_worker, args=(segment,))
+            for segment in self._segments
+            if segment["Start"] + segment["Downloaded"] <= segment["End"]
+        ]
+
+        atexit.register(self.stop)
+        for thread in threads:
+            thread.start()
+
+        while any(thread.is_alive() for thread in threads):
+            time.sleep(1)
+            self._save_state(file_size)
+            if display_progress:
+                # 不要在这里使用日志记录，因为我们会向日志文件中大量写入
+                print(f"已下载 {self.get_percent():.2f}% 的 {self.filename} ({utilities.human_fmt(self.get_speed())}/秒) ({self.get_time_remaining():.2f} 秒剩余)")
+
+        for thread in threads:
+            thread.join()
+
+        self._save_state(file_size)
+
+        if errors:
+            raise errors[0]
+        if any(segment["Start"] + segment["Downloaded"] <= segment["End"] for segment in self._segments):
+            raise Exception("下载已停止")
+
+        self._remove_state()
+
+        if self.should_checksum:
+            with open(self.filepath, "rb") as file:
+                for chunk in iter(lambda: file.read(STREAM_CHUNK_SIZE), b""):
+                    self._update_checksum(chunk)
+
+        self.download_complete = True
+        logging.info(f"下载完成: {self.filename}")
+        logging.info("统计信息:")
+        logging.info(f"- 已下载大小: {utilities.human_fmt(self.downloaded_file_size - self._resumed_size)}")
+        logging.info(f"- 经过时间: {(time.time() - self.start_time):.2f} 秒")
+        logging.info(f"- 速度: {utilities.human_fmt(self.get_speed())}/秒")
+        logging.info(f"- 位置: {self.filepath}")
+
+
+    def _download_segment(self, segment: dict, abort: threading.Event) -> None:
+        """
+        Download a single Range segment into its offset of the file
+
+        Reconnects from the last written byte on connection errors.
+        With a chunklist, "Downloaded" only advances over verified chunks,
+        and a chunk failing verification is re-fetched on its own
+
+        Parameters:
+            segment (dict): Segment to download, "Downloaded" is updated in place
+            abort (threading.Event): Set when another segment failed
+        """
+
+        attempt = 0
+        mismatches = {}
+        while True:
+            start = segment["Start"] + segment["Downloaded"]
+            if start > segment["End"]:
+                return
+
+            stream = integrity_verification.ChunklistStream(self.chunklist, start) if self.chunklist else None
+            pending = 0
+            verified = 0
+
+            try:
+                response = SESSION.get(self.url, headers={"Range": f"bytes={start}-{segment['End']}"}, stream=True, timeout=30, allow_redirects=True, verify=False)
+                if response.status_code != 206:
+                    raise Exception(f"服务器未返回分段内容，状态码: {response.status_code}")
+
+                # Unbuffered, so that the state file never records bytes which were not handed to the OS
+                with open(self.filepath, "r+b", buffering=0) as file:
+                    file.seek(start)
+                    for chunk in response.iter_content(STREAM_CHUNK_SIZE):
+                        if self.should_stop or abort.is_set():
+                            return
+                        if not chunk:
+                            continue
+                        file.write(chunk)
+
+                        verified = len(chunk) if stream is None else stream.update(chunk)
+                        if verified is None:
+                            break
+                        pending += len(chunk) - verified
+                        with self._segment_lock:
+                            segment["Downloaded"] += verified
+                            self.downloaded_file_size += len(chunk)
+
+                if stream is not None and verified is None:
+                    response.close()
+                    with self._segment_lock:
+                        self.downloaded_file_size -= pending
+                    mismatches[stream.index] = mismatches.get(stream.index, 0) + 1
+                    if mismatches[stream.index] > CHUNK_RETRIES:
+                        self.chunklist.status = integrity_verification.ChunklistStatus.FAILURE
+                        raise Exception(self.chunklist.error_msg)
+                    logging.warning(f"块 {stream.index + 1} 校验失败，重新获取 (第 {mismatches[stream.index]} 次)")
+                    continue
+
+                if segment["Start"] + segment["Downloaded"] <= segment["End"]:
+                    raise requests.exceptions.ConnectionError("分段连接提前结束")
+                return
+
+            except (
+                requests.exceptions.Timeout,
+                requests.exceptions.ConnectionError,
+                requests.exceptions.ChunkedEncodingError,
+            ) as error:
+                with self._segment_lock:
+                    self.downloaded_file_size -= pending
+                attempt += 1
+                if attempt > SEGMENT_RETRIES or self.should_stop or abort.is_set():
+                    raise
+                logging.warning(f"分段 {segment['Start']}-{segment['End']} 连接中断 ({error})，第 {attempt} 次重试")
+                time.sleep(min(2 ** attempt, 30))
+
+
     def get_percent(self) -> float:
         """
         Query the download percent
@@ -460,7 +795,7 @@ class DownloadObject:
             float: The download speed in bytes per second
         """
 
-        return self.downloaded_file_size / (time.time() - self.start_time)
+        return (self.downloaded_file_size - self._resumed_size) / (time.time() - self.start_time)
 
 
     def get_time_remaining(self) -> float:
@@ -508,6 +843,7 @@ class DownloadObject:
         Stop the download
 
         If the download is active, this function will hold the thread until stopped
+        Segmented downloads keep their state file, so a later download() resumes
         """
 
         self.should_stop = True
@@ -0,0 +1,110 @@
+"""
+startup_scheduler.py: Dependency driven scheduler for startup tasks
+
+Each task runs on its own thread once its dependencies complete, and exposes
+a Future that later consumers wait on, rather than polling threads.
+
+Usage:
+>>> scheduler = StartupScheduler()
+>>> scheduler.add("OSProbe",          probe_os)
+>>> scheduler.add("Computer.probe",   probe_computer)
+>>> scheduler.add("GenerateDefaults", generate_defaults, ["OSProbe", "Computer.probe"])
+>>> scheduler.start()
+>>> scheduler.result("GenerateDefaults")
+"""
+
+import threading
+
+from concurrent.futures import Future
+
+from . import startup_trace
+
+
+class StartupTask:
+
+    def __init__(self, name: str, function: callable, dependencies: list, background: bool) -> None:
+        self.name:         str      = name
+        self.function:     callable = function
+        self.dependencies: list     = dependencies
+        self.background:   bool     = background
+
+        self.future: Future           = Future()
+        self.thread: threading.Thread = None
+
+
+class StartupScheduler:
+    """
+    Runs startup tasks concurrently, respecting dependencies
+
+    Exceptions are stored on the task's Future and raised by result(), dependent
+    tasks are skipped with the same exception. Background tasks (ie. not awaited
+    during startup) also raise on their own thread, so threading.excepthook still
+    reports them.
+    """
+
+    def __init__(self) -> None:
+        self.tasks: dict = {}
+
+
+    def add(self, name: str, function: callable, dependencies: list = None, background: bool = False) -> Future:
+        """
+        Register a task, dependencies must be registered before start()
+        """
+        if name in self.tasks:
+            raise Exception(f"Startup task already registered: {name}")
+        self.tasks[name] = StartupTask(name, function, dependencies or [], background)
+        return self.tasks[name].future
+
+
+    def start(self) -> None:
+        for task in self.tasks.values():
+            for dependency in task.dependencies:
+                if dependency not in self.tasks:
+                    raise Exception(f"Startup task {task.name} depends on unknown task {dependency}")
+
+        for task in self.tasks.values():
+            task.thread = threading.Thread(target=self._run, args=(task,), name=task.name)
+            task.thread.start()
+
+
+    def _run(self, task: StartupTask) -> None:
+        for dependency in task.dependencies:
+            exception = self.tasks[dependency].future.exception()
+            if exception is not None:
+                # Skipped, consumers see the dependency's exception (already reported if in the background)
+                task.future.set_exception(exception)
+                return
+
+        if not task.future.set_running_or_notify_cancel():
+            return
+        try:
+            with startup_trace.phase(task.name):
+                result = task.function()
+        except Exception as e:
+            task.future.set_exception(e)
+            if task.background:
+                raise
+            return
+        task.future.set_result(result)
+
+
+    def future(self, name: str) -> Future:
+        return self.tasks[name].future
+
+
+    def thread(self, name: str) -> threading.Thread:
+        return self.tasks[name].thread
+
+
+    def wait(self, name: str) -> None:
+        """
+        Block until a task completes, regardless of outcome
+        """
+        self.tasks[name].future.exception()
+
+
+    def result(self, name: str):
+        """
+        Block until a task completes, raising its (or its dependency's) exception
+        """
+        return self.tasks[name].future.result()
@@ -0,0 +1,210 @@
+"""
+startup_trace.py: Startup tracing for OCLP-Mod
+
+Enabled with the OCLP_MOD_TRACE_STARTUP environment variable or --trace_startup.
+Records module import times and startup phases, and on exit writes them next
+to the log file as a Chrome trace (chrome://tracing, https://ui.perfetto.dev).
+
+Import times are only recorded for modules imported after this module, hence
+application_entry imports it first.
+
+Usage:
+>>> with startup_trace.phase("Computer.probe"):
+...     computer = device_probe.Computer.probe()
+
+>>> threading.Thread(target=startup_trace.traced("Analytics", analytics.send_analytics)).start()
+"""
+
+import os
+import sys
+import json
+import time
+import atexit
+import logging
+import functools
+import threading
+import contextlib
+import importlib.abc
+
+from pathlib import Path
+
+
+TRACE_ENV_VARIABLE: str = "OCLP_MOD_TRACE_STARTUP"
+TRACE_ARGUMENT:     str = "--trace_startup"
+
+
+class _TimedLoader:
+    """
+    Loader proxy recording how long a module takes to execute, including its own imports
+    """
+
+    def __init__(self, loader, name: str, trace: "StartupTrace") -> None:
+        self._loader = loader
+        self._name   = name
+        self._trace  = trace
+
+
+    def __getattr__(self, attribute: str):
+        return getattr(self._loader, attribute)
+
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+
+    def exec_module(self, module) -> None:
+        start = time.perf_counter_ns()
+        try:
+            self._loader.exec_module(module)
+        finally:
+            self._trace.add(self._name, "import", start, time.perf_counter_ns())
+
+
+class _ImportTimer(importlib.abc.MetaPathFinder):
+    """
+    Meta path finder wrapping the loaders found by the remaining finders
+    """
+
+    def __init__(self, trace: "StartupTrace") -> None:
+        self._trace = trace
+
+
+    def find_spec(self, fullname: str, path, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                break
+        else:
+            return None
+
+        if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+            spec.loader = _TimedLoader(spec.loader, fullname, self._trace)
+        return spec
+
+
+class StartupTrace:
+    """
+    Collects trace events, no-op unless enabled
+    """
+
+    def __init__(self) -> None:
+        self.enabled: bool = bool(os.environ.get(TRACE_ENV_VARIABLE)) or TRACE_ARGUMENT in sys.argv
+        self.events:  list = []
+        self.path:    Path = None
+
+        self._thread_names: dict = {}
+        self._lock = threading.Lock()
+
+        if self.enabled:
+            sys.meta_path.insert(0, _ImportTimer(self))
+            atexit.register(self.write)
+
+
+    def add(self, name: str, category: str, start: int, end: int) -> None:
+        """
+        Record a complete event, start and end are time.perf_counter_ns() values
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            self._thread_names[threading.get_ident()] = threading.current_thread().name
+            self.events.append({
+                "name": name,
+                "cat":  category,
+                "ph":   "X",
+                "ts":   start / 1000,
+                "dur":  (end - start) / 1000,
+                "pid":  os.getpid(),
+                "tid":  threading.get_ident(),
+            })
+
+
+    def instant(self, name: str) -> None:
+        """
+        Record a point in time (ie. first window shown)
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            self._thread_names[threading.get_ident()] = threading.current_thread().name
+            self.events.append({
+                "name": name,
+                "cat":  "phase",
+                "ph":   "i",
+                "s":    "p",
+                "ts":   time.perf_counter_ns() / 1000,
+                "pid":  os.getpid(),
+                "tid":  threading.get_ident(),
+            })
+
+
+    @contextlib.contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            self.add(name, "phase", start, time.perf_counter_ns())
+
+
+    def traced(self, name: str, function: callable) -> callable:
+        """
+        Wrap a thread target, recording it as a phase on its own thread
+        """
+        if not self.enabled:
+            return function
+
+        @functools.wraps(function)
+        def _traced(*args, **kwargs):
+            with self.phase(name):
+                return function(*args, **kwargs)
+        return _traced
+
+
+    def write(self, path: Path = None) -> None:
+        """
+        Write the trace, defaults to next to the log file (set with set_path())
+
+        Registered with atexit after logging's own shutdown handler (logging is
+        imported first), and atexit runs handlers last in, first out, so logging
+        is still available here
+        """
+        if not self.enabled:
+            return
+        path = path or self.path or Path(f"OCLP-Mod_startup_{time.strftime('%Y-%m-%d_%H-%M-%S')}.trace.json")
+
+        with self._lock:
+            events = list(self.events)
+            thread_names = dict(self._thread_names)
+        for tid, thread_name in thread_names.items():
+            events.append({"name": "thread_name", "ph": "M", "pid": os.getpid(), "tid": tid, "args": {"name": thread_name}})
+
+        try:
+            with open(path, "w") as f:
+                json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+        except OSError as e:
+            logging.error(f"无法写入启动跟踪: {e}")
+            return
+        logging.info(f"启动跟踪已写入: {path}")
+
+
+    def set_path(self, log_filepath: Path) -> None:
+        """
+        Store the trace alongside the log file
+        """
+        if log_filepath is None:
+            return
+        self.path = Path(log_filepath).with_suffix(".trace.json")
+
+
+_trace = StartupTrace()
+
+enabled  = _trace.enabled
+add      = _trace.add
+instant  = _trace.instant
+phase    = _trace.phase
+traced   = _trace.traced
+write    = _trace.write
+set_path = _trace.set_path
@@ -4,6 +4,7 @@ subprocess_wrapper.py: Wrapper for subprocess module to better handle errors and
 """
 
 import enum
+import shlex
 import logging
 import subprocess
 
@@ -12,6 +13,13 @@ from pathlib import Path
 
 OCLP_PRIVILEGED_HELPER = "/Library/PrivilegedHelperTools/com.laobamac.oclp-mod.privileged-helper"
 
+BATCH_MARKER = "__OCLP_BATCH_OPERATION__"
+
+# Manifests are passed inline to /bin/sh -c, split to stay well under ARG_MAX (1 MiB on macOS, shared with the environment)
+BATCH_MANIFEST_CHUNK_SIZE = 256 * 1024
+
+_active_batch = None
+
 
 class PrivilegedHelperErrorCodes(enum.IntEnum):
     """
@@ -54,6 +62,185 @@ def run_as_root(*args, **kwargs) -> subprocess.CompletedProcess:
     return subprocess.run([OCLP_PRIVILEGED_HELPER] + [args[0][0]] + args[0][1:], **kwargs)
 
 
+class PrivilegedBatch:
+    """
+    Queue privileged commands and execute them in as few helper invocations as possible.
+
+    Queued commands are compiled to a shell manifest, which is passed inline
+    to /bin/sh -c through the Privileged Helper Tool. The manifest is never
+    written to disk, as root must not execute a file the user can modify. Each command's output and return code
+    is reported back as a subprocess.CompletedProcess in 'results'.
+    Execution stops at the first failing command queued with verify.
+
+    Parameters:
+        use_helper (bool): Run through the Privileged Helper Tool.
+                           If False, the manifest runs unprivileged (ie. against a temporary root for testing)
+
+    Usage:
+        >>> with subprocess_wrapper.PrivilegedBatch() as batch:
+        ...     subprocess_wrapper.run_as_root_or_queue(["/bin/rm", "-Rf", path])
+        >>> for result in batch.results:
+        ...     print(result.args, result.returncode)
+    """
+
+    def __init__(self, use_helper: bool = True) -> None:
+        self.use_helper: bool = use_helper
+        self.operations: list = []
+        self.results:    list = []
+
+
+    def __enter__(self) -> "PrivilegedBatch":
+        global _active_batch
+        if _active_batch is not None:
+            raise Exception("A privileged batch is already active")
+        _active_batch = self
+        return self
+
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        global _active_batch
+        _active_batch = None
+        if exc_type is None:
+            self.execute()
+
+
+    def queue(self, args: list, verify: bool = True) -> None:
+        """
+        Queue a command for execution.
+
+        Note: Full path to first argument is required.
+        """
+        if not Path(args[0]).exists():
+            raise FileNotFoundError(f"File not found: {args[0]}")
+
+        self.operations.append(([str(arg) for arg in args], verify))
+
+
+    def generate_manifest(self, start: int = 0, end: int = None) -> str:
+        """
+        Generate the shell manifest for queued commands [start, end), defaults to all.
+
+        Each command is wrapped with begin/end markers carrying its index and return code.
+        """
+        manifest = "__oclp_run() {\n"
+        manifest += "    index=\"$1\"; verify=\"$2\"; shift 2\n"
+        manifest += "    output=$(\"$@\" 2>&1)\n"
+        manifest += "    status=$?\n"
+        manifest += f"    printf '%s %s begin\\n' {BATCH_MARKER} \"$index\"\n"
+        manifest += "    [ -n \"$output\" ] && printf '%s\\n' \"$output\"\n"
+        manifest += f"    printf '%s %s end %s\\n' {BATCH_MARKER} \"$index\" \"$status\"\n"
+        manifest += "    if [ \"$status\" -ne 0 ] && [ \"$verify\" = \"1\" ]; then exit \"$status\"; fi\n"
+        manifest += "}\n"
+        for index in range(start, len(self.operations) if end is None else end):
+            args, verify = self.operations[index]
+            manifest += f"__oclp_run {index} {1 if verify else 0} {shlex.join(args)}\n"
+        return manifest
+
+
+    def _chunks(self) -> list:
+        """
+        Split queued commands into [start, end) ranges whose manifests fit BATCH_MANIFEST_CHUNK_SIZE.
+
+        A single command exceeding the limit is still given its own chunk.
+        """
+        chunks = []
+        start = 0
+        size = len(self.generate_manifest(0, 0).encode())
+        for index, (args, verify) in enumerate(self.operations):
+            command_size = len(f"__oclp_run {index} {1 if verify else 0} {shlex.join(args)}\n".encode())
+            if index > start and size + command_size > BATCH_MANIFEST_CHUNK_SIZE:
+                chunks.append((start, index))
+                start = index
+                size = len(self.generate_manifest(0, 0).encode())
+            size += command_size
+        chunks.append((start, len(self.operations)))
+        return chunks
+
+
+    def _parse_results(self, output: bytes) -> list:
+        """
+        Split manifest output into per-command results.
+        """
+        results = []
+        current_index = None
+        current_output = []
+        for line in output.decode("utf-8", errors="replace").split("\n"):
+            if line.startswith(BATCH_MARKER):
+                fields = line.split(" ")
+                if fields[2] == "begin":
+                    current_index = int(fields[1])
+                    current_output = []
+                elif fields[2] == "end" and current_index is not None:
+                    results.append(subprocess.CompletedProcess(
+                        args=self.operations[current_index][0],
+                        returncode=int(fields[3]),
+                        stdout="\n".join(current_output).encode("utf-8"),
+                    ))
+                    current_index = None
+                continue
+            if current_index is not None:
+                current_output.append(line)
+        return results
+
+
+    def execute(self) -> list:
+        """
+        Execute all queued commands, one invocation per manifest chunk.
+
+        Returns:
+            list: subprocess.CompletedProcess for each executed command
+
+        Raises on the first failed command queued with verify, matching run_as_root_and_verify().
+        """
+        if not self.operations:
+            return self.results
+
+        chunks = self._chunks()
+        self.results = []
+        for start, end in chunks:
+            args = ["/bin/sh", "-c", self.generate_manifest(start, end)]
+            if self.use_helper:
+                process = run_as_root(args, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+            else:
+                process = run(args, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+            chunk_results = self._parse_results(process.stdout)
+            self.results += chunk_results
+            if len(chunk_results) != end - start:
+                # Stopped on a failed verified command, or the helper failed before running the manifest
+                break
+        logging.info(f"- Executed {len(self.results)} of {len(self.operations)} privileged operations in {len(chunks)} invocation(s)")
+
+        if not chunk_results and process.returncode != 0:
+            # Helper tool failed before running the manifest
+            verify(process)
+
+        for result, (_, should_verify) in zip(self.results, self.operations):
+            if should_verify:
+                verify(result)
+
+        if len(self.results) != len(self.operations):
+            log(process)
+            raise Exception(f"Privileged batch stopped after {len(self.results)} of {len(self.operations)} operations")
+
+        return self.results
+
+
+def run_as_root_or_queue(args: list, verify: bool = True, **kwargs) -> subprocess.CompletedProcess:
+    """
+    Run subprocess as root, or queue it if a PrivilegedBatch is active.
+
+    Returns:
+        subprocess.CompletedProcess: Result if run immediately, None if queued
+    """
+    if _active_batch is not None:
+        _active_batch.queue(args, verify)
+        return None
+
+    if verify:
+        return run_as_root_and_verify(args, **kwargs)
+    return run_as_root(args, **kwargs)
+
+
 def verify(process_result: subprocess.CompletedProcess) -> None:
     """
     Verify process result and raise exception if failed.
@@ -11,6 +11,7 @@ import logging
 import argparse
 import binascii
 import plistlib
+import threading
 import subprocess
 import py_sip_xnu
 
@@ -109,15 +110,124 @@ def check_recovery():
     return RECOVERY_STATUS
 
 
+class SystemQueryCache:
+    """
+    Process-wide cache of system state queries (diskutil, NVRAM, csr, sysctl)
+
+    Keys are the query described as a string, ie. "diskutil info /",
+    "nvram 4D1FDA02-38C7-4A6A-9CC6-4BCCA8B30102:boot-path", "csr status",
+    "sysctl sysctl.proc_translated". Failed queries raise and are not cached.
+
+    Results are expected to be stable for the run, invalidate() must be called
+    after modifying the root volume or NVRAM. Values can be injected, allowing
+    queries to be served without a Mac.
+    """
+
+    def __init__(self) -> None:
+        self.hits:   int = 0
+        self.misses: int = 0
+
+        self._results:  dict = {}
+        self._injected: dict = {}
+        self._lock = threading.Lock()
+
+
+    def get(self, key: str, function: callable):
+        """
+        Cached result of a query, run function on a miss
+        """
+        with self._lock:
+            if key in self._injected:
+                self.hits += 1
+                return self._injected[key]
+            if key in self._results:
+                self.hits += 1
+                return self._results[key]
+            self.misses += 1
+
+        value = function()
+        with self._lock:
+            self._results[key] = value
+        return value
+
+
+    def inject(self, key: str, value) -> None:
+        """
+        Inject a canned result, kept until removed with uninject()
+        """
+        with self._lock:
+            self._injected[key] = value
+
+
+    def uninject(self, key: str = None) -> None:
+        """
+        Remove an injected result, or all injected results if key is None
+        """
+        with self._lock:
+            if key is None:
+                self._injected = {}
+            else:
+                self._injected.pop(key, None)
+
+
+    def invalidate(self, key: str = None) -> None:
+        """
+        Discard cached results (injected results are kept), or a single query's result
+        """
+        with self._lock:
+            if key is None:
+                self._results = {}
+            else:
+                self._results.pop(key, None)
+
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "cached": len(self._results)}
+
+
+system_query_cache = SystemQueryCache()
+
+
+def get_root_volume_info() -> dict:
+    """
+    'diskutil info -plist /', cached
+    """
+    return system_query_cache.get("diskutil info /", lambda: plistlib.loads(subprocess.run(["/usr/sbin/diskutil", "info", "-plist", "/"], stdout=subprocess.PIPE).stdout))
+
+
+def get_csr_status() -> int:
+    """
+    Active csr-active-config value, cached
+    """
+    return system_query_cache.get("csr status", lambda: py_sip_xnu.SipXnu().get_sip_status().value)
+
+
+def get_sysctl(name: str) -> str:
+    """
+    'sysctl -n <name>', cached
+
+    Returns:
+        str: Value, or None if the sysctl is unavailable
+    """
+    def _query():
+        result = subprocess.run(["/usr/sbin/sysctl", "-n", name], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        if result.returncode != 0:
+            return None
+        return result.stdout.decode().strip()
+
+    return system_query_cache.get(f"sysctl {name}", _query)
+
+
 def get_disk_path():
-    root_partition_info = plistlib.loads(subprocess.run(["/usr/sbin/diskutil", "info", "-plist", "/"], stdout=subprocess.PIPE).stdout.decode().strip().encode())
+    root_partition_info = get_root_volume_info()
     root_mount_path = root_partition_info["DeviceIdentifier"]
     root_mount_path = root_mount_path[:-2] if root_mount_path.count("s") > 1 else root_mount_path
     return root_mount_path
 
 
 def check_if_root_is_apfs_snapshot():
-    root_partition_info = plistlib.loads(subprocess.run(["/usr/sbin/diskutil", "info", "-plist", "/"], stdout=subprocess.PIPE).stdout.decode().strip().encode())
+    root_partition_info = get_root_volume_info()
     try:
         is_snapshotted = root_partition_info["APFSSnapshot"]
     except KeyError:
@@ -135,12 +245,12 @@ def check_seal():
 
 def check_filesystem_type():
     # Expected to return 'apfs' or 'hfs'
-    filesystem_type = plistlib.loads(subprocess.run(["/usr/sbin/diskutil", "info", "-plist", "/"], stdout=subprocess.PIPE).stdout.decode().strip().encode())
+    filesystem_type = get_root_volume_info()
     return filesystem_type["FilesystemType"]
 
 
 def csr_decode(os_sip):
-    sip_int = py_sip_xnu.SipXnu().get_sip_status().value
+    sip_int = get_csr_status()
     for i,  current_sip_bit in enumerate(sip_data.system_integrity_protection.csr_values):
         if sip_int & (1 << i):
             sip_data.system_integrity_protection.csr_values[current_sip_bit] = True
@@ -349,6 +459,19 @@ def check_command_line_tools():
     else:
         return False
 
+def _read_nvram(name: str):
+    nvram = ioreg.IORegistryEntryFromPath(ioreg.kIOMasterPortDefault, "IODeviceTree:/options".encode())
+
+    value = ioreg.IORegistryEntryCreateCFProperty(nvram, name, ioreg.kCFAllocatorDefault, ioreg.kNilOptions)
+
+    ioreg.IOObjectRelease(nvram)
+
+    if not value:
+        return None
+
+    return ioreg.corefoundation_to_native(value)
+
+
 def get_nvram(variable: str, uuid: str = None, *, decode: bool = False):
     # TODO: Properly fix for El Capitan, which does not print the XML representation even though we say to
 
@@ -357,17 +480,11 @@ def get_nvram(variable: str, uuid: str = None, *, decode: bool = False):
     else:
         uuid = ""
 
-    nvram = ioreg.IORegistryEntryFromPath(ioreg.kIOMasterPortDefault, "IODeviceTree:/options".encode())
-
-    value = ioreg.IORegistryEntryCreateCFProperty(nvram, f"{uuid}{variable}", ioreg.kCFAllocatorDefault, ioreg.kNilOptions)
-
-    ioreg.IOObjectRelease(nvram)
+    value = system_query_cache.get(f"nvram {uuid}{variable}", lambda: _read_nvram(f"{uuid}{variable}"))
 
     if not value:
         return None
 
-    value = ioreg.corefoundation_to_native(value)
-
     if decode:
         if isinstance(value, bytes):
             try:
@@ -603,10 +720,15 @@ def check_cli_args():
     parser.add_argument("--unpatch_sys_vol", help="Unpatches root volume, EXPERIMENTAL", action="store_true", required=False)
     parser.add_argument("--prepare_for_update", help="Prepares host for macOS update, ex. clean /Library/Extensions", action="store_true", required=False)
     parser.add_argument("--cache_os", help="Caches patcher files (ex. KDKs) for incoming OS in Preflight.plist", action="store_true", required=False)
+    parser.add_argument("--dry_run", "--dry-run", help="Print root patch plan and diff against root volume, use with --patch_sys_vol", action="store_true", required=False)
 
     # validation args
     parser.add_argument("--validate", help="Runs Validation Tests for CI", action="store_true", required=False)
 
+    # Debugging args
+    parser.add_argument("--trace_startup", help="Write a Chrome trace of startup (imports and phases) next to the log", action="store_true", required=False)
+    parser.add_argument("--profile_build", help="Log per-phase durations, file copies and bytes written of OpenCore builds, use with --build or --validate", action="store_true", required=False)
+
     # GUI args
     parser.add_argument("--gui_patch", help="Starts GUI in Root Patcher", action="store_true", required=False)
     parser.add_argument("--gui_unpatch", help="Starts GUI in Root Unpatcher", action="store_true", required=False)
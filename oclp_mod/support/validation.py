@@ -2,11 +2,20 @@
 validation.py: Validation class for the patcher
 """
 
+import os
+import copy
+import json
 import atexit
+import pickle
+import shutil
 import logging
+import platform
+import tempfile
+import traceback
 import subprocess
 
-from pathlib import Path
+from pathlib            import Path
+from concurrent.futures import ProcessPoolExecutor
 import time
 
 from . import network_handler
@@ -14,13 +23,14 @@ from . import network_handler
 from .. import constants
 
 from ..sys_patch import sys_patch_helpers
-from ..efi_builder import build
+from ..efi_builder import build, template_cache, build_profiler
 from ..support import subprocess_wrapper
 
 from ..datasets import (
     example_data,
     model_array,
-    os_data
+    os_data,
+    pci_data
 )
 from ..sys_patch.patchsets import (
     HardwarePatchsetDetection,
@@ -29,6 +39,78 @@ from ..sys_patch.patchsets import (
 )
 
 
+VALIDATION_WORKERS: int = os.cpu_count() or 1
+REPORTED_SLOWEST:   int = 5
+
+
+def _snapshot_constants(global_constants: constants.Constants) -> dict:
+    """
+    Picklable copy of the constants' settings, for rebuilding Constants in a worker
+    """
+    settings = {}
+    dropped  = []
+    for variable, value in vars(global_constants).items():
+        if variable == "computer" and value is not None:
+            value = copy.copy(value)
+            value.ioregistry = None
+        try:
+            pickle.dumps(value)
+        except Exception:
+            # ie. threads, wx objects
+            dropped.append(variable)
+            continue
+        settings[variable] = value
+
+    if dropped:
+        logging.info(f"Build workers will use default values for unpicklable settings: {', '.join(sorted(dropped))}")
+    return settings
+
+
+def _initialize_worker(work_path: Path) -> None:
+    """
+    Build workers log nothing, failures are returned to the parent
+    """
+    logging.disable(logging.CRITICAL)
+    template_cache.OpenCoreTemplateCache.set_cache_root(Path(work_path) / f"OpenCore-{os.getpid()}")
+
+
+def _build_and_validate(settings: dict, model: str, label: str, work_path: Path) -> dict:
+    """
+    Build a model in an isolated build folder, then validate it in-process and against ocvalidate
+
+    Runs in a worker process
+
+    Returns:
+        dict: Model, Duration, Phases, Profile (None unless profiling) and Error (None if succeeded)
+    """
+    global_constants = constants.Constants()
+    for variable, value in settings.items():
+        setattr(global_constants, variable, value)
+    global_constants.current_path = Path(tempfile.mkdtemp(prefix="build-", dir=work_path))
+
+    result = {"Model": label, "Duration": 0, "Phases": {}, "Profile": None, "Error": None}
+    start = time.perf_counter()
+    try:
+        builder = build.BuildOpenCore(model, global_constants)
+        result["Phases"] = builder.profiler.timings
+        if builder.profiler.enabled is True:
+            result["Profile"] = builder.profiler.report()
+        if builder.config_errors:
+            result["Error"] = "\n".join(str(error) for error in builder.config_errors)
+        elif platform.system() == "Darwin":
+            # Reference implementation, covers rules the in-process validator doesn't
+            output = subprocess.run([global_constants.ocvalidate_path, f"{global_constants.opencore_release_folder}/EFI/OC/config.plist"], stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+            if output.returncode != 0:
+                result["Error"] = output.stdout.decode()
+    except Exception:
+        result["Error"] = traceback.format_exc()
+    finally:
+        result["Duration"] = time.perf_counter() - start
+        shutil.rmtree(global_constants.current_path, ignore_errors=True)
+
+    return result
+
+
 class PatcherValidation:
     """
     Validation class for the patcher
@@ -42,6 +124,7 @@ class PatcherValidation:
         self.active_patchset_files = []
 
         self.constants.validate = True
+        self.work_path: Path = None
 
         self.valid_dumps = [
             example_data.MacBookPro.MacBookPro92_Stock,
@@ -73,47 +156,91 @@ class PatcherValidation:
             example_data.MacBookPro.MacBookPro141_SSD_Upgrade,
         ]
 
+        self._validate_pci_id_table()
         self._validate_configs()
         self._validate_sys_patch()
 
 
-    def _build_prebuilt(self) -> None:
+    def _build_prebuilt(self, executor: ProcessPoolExecutor) -> list:
         """
-        Generate a build for each predefined model
+        Queue a build for each predefined model
         Then validate against ocvalidate
+
+        Returns:
+            list: Futures of _build_and_validate() results
         """
 
+        settings = _snapshot_constants(self.constants)
+        variant = "DEBUG" if self.constants.opencore_debug is True else "RELEASE"
+        futures = []
         for model in model_array.SupportedSMBIOS:
-            logging.info(f"Validating predefined model: {model}")
-            self.constants.custom_model = model
-            build.BuildOpenCore(self.constants.custom_model, self.constants)
-            result = subprocess.run([self.constants.ocvalidate_path, f"{self.constants.opencore_release_folder}/EFI/OC/config.plist"], stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
-            if result.returncode != 0:
-                logging.info("Error on build!")
-                subprocess_wrapper.log(result)
-                raise Exception(f"Validation failed for predefined model: {model}")
-            else:
-                logging.info(f"Validation succeeded for predefined model: {model}")
-
-
-    def _build_dumps(self) -> None:
+            settings["custom_model"] = model
+            futures.append(executor.submit(_build_and_validate, dict(settings), model, f"{model} ({variant})", self.work_path))
+        self.constants.custom_model = model
+        return futures
+
+
+    def _build_dumps(self, executor: ProcessPoolExecutor) -> list:
         """
-        Generate a build for each predefined model
+        Queue a build for each dumped model
         Then validate against ocvalidate
+
+        Returns:
+            list: Futures of _build_and_validate() results
         """
 
+        settings = _snapshot_constants(self.constants)
+        variant = "DEBUG" if self.constants.opencore_debug is True else "RELEASE"
+        futures = []
         for model in self.valid_dumps:
-            self.constants.computer = model
-            self.constants.custom_model = ""
-            logging.info(f"Validating dumped model: {self.constants.computer.real_model}")
-            build.BuildOpenCore(self.constants.computer.real_model, self.constants)
-            result = subprocess.run([self.constants.ocvalidate_path, f"{self.constants.opencore_release_folder}/EFI/OC/config.plist"], stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
-            if result.returncode != 0:
-                logging.info("Error on build!")
-                subprocess_wrapper.log(result)
-                raise Exception(f"Validation failed for predefined model: {self.constants.computer.real_model}")
-            else:
-                logging.info(f"Validation succeeded for predefined model: {self.constants.computer.real_model}")
+            settings["computer"] = model
+            settings["custom_model"] = ""
+            futures.append(executor.submit(_build_and_validate, dict(settings), model.real_model, f"{model.real_model} dump ({variant})", self.work_path))
+
+        # Sys patch validation continues with the last dump, as it did when building serially
+        self.constants.computer = model
+        self.constants.custom_model = ""
+        return futures
+
+
+    def _report(self, results: list) -> None:
+        """
+        Log per-model results, the slowest models and builder phases
+
+        Raises if any build failed
+        """
+
+        failures = [result for result in results if result["Error"] is not None]
+        for result in results:
+            if result["Error"] is None:
+                logging.info(f"Validation succeeded for predefined model: {result['Model']} ({result['Duration']:.2f}s)")
+        for result in failures:
+            logging.info(f"Error on build: {result['Model']}")
+            logging.info(result["Error"])
+
+        phases = {}
+        for result in results:
+            for phase, duration in result["Phases"].items():
+                phases[phase] = phases.get(phase, 0) + duration
+
+        logging.info(f"Validated {len(results)} builds, {len(failures)} failed")
+        logging.info("Slowest models:")
+        for result in sorted(results, key=lambda result: result["Duration"], reverse=True)[:REPORTED_SLOWEST]:
+            logging.info(f"  {result['Model']}: {result['Duration']:.2f}s")
+        logging.info("Slowest builder phases (total across builds):")
+        for phase, duration in sorted(phases.items(), key=lambda item: item[1], reverse=True)[:REPORTED_SLOWEST]:
+            logging.info(f"  {phase}: {duration:.2f}s")
+
+        profiles = [result["Profile"] for result in results if result["Profile"] is not None]
+        if profiles:
+            report = build_profiler.BuildProfiler.aggregate(profiles)
+            logging.info(f"Build profile (total across {report['Builds']} builds):")
+            for line in build_profiler.BuildProfiler.summary(report):
+                logging.info(f"  {line}")
+            logging.info(f"Build profile (JSON): {json.dumps(report, sort_keys=True)}")
+
+        if failures:
+            raise Exception(f"Validation failed for predefined model: {', '.join(result['Model'] for result in failures)}")
 
 
     def _validate_root_patch_files(self, major_kernel: int, minor_kernel: int) -> None:
@@ -316,14 +443,80 @@ class PatcherValidation:
                 logging.info(f"  {file}")
 
 
+    def _validate_pci_id_table(self) -> None:
+        """
+        Validate pci_data's compiled ID table and benchmark lookups
+
+        Fails if an ID is listed under two architectures/chipsets, or if the table
+        disagrees with scanning PCI_ID_LISTS in order (as device_probe used to)
+        """
+
+        def _lookup_linear(vendor_id: int, device_id: int, family: str) -> str:
+            for list_vendor_id, list_family, arch, device_ids in pci_data.PCI_ID_LISTS:
+                if list_vendor_id == vendor_id and list_family == family and device_id in device_ids:
+                    return arch
+            return None
+
+        conflicts = pci_data.find_pci_id_conflicts()
+        for vendor_id, device_id, used, ignored in conflicts:
+            logging.info(f"PCI ID {hex(vendor_id)}:{hex(device_id)} listed as both {used} and {ignored}")
+
+        queries = []
+        for vendor_id, family, arch, device_ids in pci_data.PCI_ID_LISTS:
+            for device_id in device_ids:
+                queries.append((vendor_id, device_id, family))
+                queries.append((vendor_id, device_id ^ 0xFFFF, family)) # Unlisted IDs take the slowest path
+
+        mismatches = [query for query in queries if pci_data.lookup(*query) != _lookup_linear(*query)]
+        for vendor_id, device_id, family in mismatches:
+            logging.info(f"PCI ID {hex(vendor_id)}:{hex(device_id)} ({family}) resolves differently through pci_id_table")
+
+        timings = {}
+        for name, function in [("pci_id_table", pci_data.lookup), ("linear scan", _lookup_linear)]:
+            start = time.perf_counter()
+            for query in queries:
+                function(*query)
+            timings[name] = (time.perf_counter() - start) / len(queries)
+        logging.info(f"PCI ID lookups ({len(queries)} queries): pci_id_table {timings['pci_id_table'] * 1e6:.2f}us, linear scan {timings['linear scan'] * 1e6:.2f}us per lookup")
+
+        if conflicts or mismatches:
+            raise Exception(f"PCI ID table validation failed: {len(conflicts)} duplicated IDs, {len(mismatches)} mismatched lookups")
+
+
     def _validate_configs(self) -> None:
         """
         Validates build modules
         """
 
+        # Builds run in worker processes, each with an isolated build folder
+        self.work_path = Path(tempfile.mkdtemp(prefix="OCLP-Mod-Validation-"))
+        start = time.perf_counter()
+        try:
+            with ProcessPoolExecutor(max_workers=VALIDATION_WORKERS, initializer=_initialize_worker, initargs=(self.work_path,)) as executor:
+                futures = self._queue_builds(executor)
+                results = [future.result() for future in futures]
+        finally:
+            shutil.rmtree(self.work_path, ignore_errors=True)
+
+        logging.info(f"Built {len(results)} configurations in {time.perf_counter() - start:.2f}s with {VALIDATION_WORKERS} workers")
+        if platform.system() != "Darwin":
+            logging.info("ocvalidate requires macOS, configurations were only validated in-process")
+        self._report(results)
+
+        subprocess.run(["/bin/rm", "-rf", self.constants.build_path], stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+
+
+    def _queue_builds(self, executor: ProcessPoolExecutor) -> list:
+        """
+        Queue both validation passes
+
+        Returns:
+            list: Futures of _build_and_validate() results
+        """
+
         # First run is with default settings
-        self._build_prebuilt()
-        self._build_dumps()
+        futures = self._build_prebuilt(executor)
+        futures += self._build_dumps(executor)
 
         # Second run, flip all settings
         self.constants.verbose_debug = True
@@ -342,7 +535,7 @@ class PatcherValidation:
         self.constants.software_demux = True
         self.constants.serial_settings = "Minimal"
 
-        self._build_prebuilt()
-        self._build_dumps()
+        futures += self._build_prebuilt(executor)
+        futures += self._build_dumps(executor)
 
-        subprocess.run(["/bin/rm", "-rf", self.constants.build_path], stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
\ No newline at end of file
+        return futures
\ No newline at end of file
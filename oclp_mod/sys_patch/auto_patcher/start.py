@@ -145,7 +145,7 @@ class StartAutomaticPatching:
 
         if utilities.check_seal() is True:
             logging.info("- 检测到快照封印完好，检测修补")
-            patches = HardwarePatchsetDetection(self.constants).device_properties
+            patches = HardwarePatchsetDetection.shared(self.constants).device_properties
             if not any(not patch.startswith("设置") and not patch.startswith("验证") and patches[patch] is True for patch in patches):
                 patches = {}
             if patches:
@@ -54,6 +54,31 @@ class KernelCacheSupport:
         return True
 
 
+    def auxkc_destination(self, install_file: str, install_patch_directory: str, destination_folder_path: str) -> str:
+        """
+        Resolve the destination of a kext without patching it, see add_auxkc_support() for logic
+
+        Parameters:
+            install_file            (str): Kext file name
+            install_patch_directory (str): Patch directory
+            destination_folder_path (str): Destination folder path
+
+        Returns:
+            str: Updated destination folder path, unchanged if the AuxKC is not used
+        """
+
+        if self.skip_root_kmutil_requirement is False:
+            return destination_folder_path
+        if not install_file.endswith(".kext"):
+            return destination_folder_path
+        if install_patch_directory != "/System/Library/Extensions":
+            return destination_folder_path
+        if self.detected_os < os_data.os_data.ventura:
+            return destination_folder_path
+
+        return str(self.mount_location_data) + "/Library/Extensions"
+
+
     def add_auxkc_support(self, install_file: str, source_folder_path: str, install_patch_directory: str, destination_folder_path: str) -> str:
         """
         Patch provided Kext to support Auxiliary Kernel Collection
@@ -79,17 +104,10 @@ class KernelCacheSupport:
             str: Updated destination folder path
         """
 
-        if self.skip_root_kmutil_requirement is False:
-            return destination_folder_path
-        if not install_file.endswith(".kext"):
-            return destination_folder_path
-        if install_patch_directory != "/System/Library/Extensions":
-            return destination_folder_path
-        if self.detected_os < os_data.os_data.ventura:
+        updated_install_location = self.auxkc_destination(install_file, install_patch_directory, destination_folder_path)
+        if updated_install_location == destination_folder_path:
             return destination_folder_path
 
-        updated_install_location = str(self.mount_location_data) + "/Library/Extensions"
-
         logging.info(f"  - 为 {install_file} 添加 AuxKC 支持")
         plist_path = Path(Path(source_folder_path) / Path(install_file) / Path("Contents/Info.plist"))
         plist_data = plistlib.load((plist_path).open("rb"))
@@ -125,8 +143,19 @@ class KernelCacheSupport:
         oclp_path = "/System/Library/CoreServices/oclp-mod.plist"
         if Path(oclp_path).exists():
             oclp_plist_data = plistlib.load(Path(oclp_path).open("rb"))
+
+            # Content manifest lists installed paths directly, including AuxKC relocations
+            manifest = oclp_plist_data.get("Manifest", {})
+            for path in manifest.get("Files", {}) if isinstance(manifest, dict) else {}:
+                if not path.startswith("/Library/Extensions/") or not path.endswith(".kext"):
+                    continue
+                if not Path(path).exists():
+                    continue
+                logging.info(f"  - 删除 {Path(path).name}")
+                subprocess_wrapper.run_as_root(["/bin/rm", "-Rf", path])
+
             for key in oclp_plist_data:
-                if isinstance(oclp_plist_data[key], (bool, int)):
+                if key == "Manifest" or isinstance(oclp_plist_data[key], (bool, int)):
                     continue
                 for install_type in [PatchType.OVERWRITE_SYSTEM_VOLUME, PatchType.OVERWRITE_DATA_VOLUME, PatchType.MERGE_SYSTEM_VOLUME, PatchType.MERGE_DATA_VOLUME]:
                     if install_type not in oclp_plist_data[key]:
@@ -11,7 +11,7 @@ from pathlib import Path
 from .snapshot import APFSSnapshot
 
 from ...datasets import os_data
-from ...support  import subprocess_wrapper
+from ...support  import subprocess_wrapper, utilities
 
 
 class RootVolumeMount:
@@ -30,7 +30,7 @@ class RootVolumeMount:
         ex. / -> disk1s1
         """
         try:
-            content = plistlib.loads(subprocess.run(["/usr/sbin/diskutil", "info", "-plist", "/"], capture_output=True).stdout)
+            content = utilities.get_root_volume_info()
         except plistlib.InvalidFileException:
             raise RuntimeError("Failed to parse diskutil output.")
 
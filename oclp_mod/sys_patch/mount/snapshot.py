@@ -7,7 +7,7 @@ import platform
 import subprocess
 
 from ...datasets import os_data
-from ...support  import subprocess_wrapper
+from ...support  import subprocess_wrapper, utilities
 
 
 class APFSSnapshot:
@@ -21,11 +21,7 @@ class APFSSnapshot:
         """
         Check if currently running inside of Rosetta
         """
-        result = subprocess_wrapper.run(["/usr/sbin/sysctl", "-n", "sysctl.proc_translated"], stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
-        if result.returncode != 0:
-            return False
-
-        return True if result.stdout.decode().strip() == "1" else False
+        return utilities.get_sysctl("sysctl.proc_translated") == "1"
 
 
     def create_snapshot(self) -> bool:
@@ -3,4 +3,5 @@ patchsets module
 """
 
 from .base   import PatchType, DynamicPatchset
-from .detect import HardwarePatchsetDetection, HardwarePatchsetSettings, HardwarePatchsetValidation
\ No newline at end of file
+from .detect import HardwarePatchsetDetection, HardwarePatchsetSettings, HardwarePatchsetValidation
+from .probes import DetectionProbe, DetectionProbeRegistry
\ No newline at end of file
@@ -3,16 +3,14 @@ detect.py: Detects patches for a given system
 """
 
 import logging
-import plistlib
-import subprocess
-import py_sip_xnu
+import threading
 import packaging.version
 
-from enum      import StrEnum
-from pathlib   import Path
-from functools import cache
+from enum    import StrEnum
+from pathlib import Path
 
 from .hardware.base import BaseHardware, HardwareVariantGraphicsSubclass
+from .probes        import DetectionProbe, DetectionProbeRegistry, default_registry, VOLATILE_PROBE_MAX_AGE
 
 from .hardware.graphics import (
     intel_iron_lake,
@@ -55,8 +53,6 @@ from ... import constants
 from ...datasets import sip_data
 from ...datasets.os_data import os_data
 from ...support import (
-    network_handler,
-    utilities,
     kdk_handler,
     metallib_handler
 )
@@ -97,12 +93,18 @@ class HardwarePatchsetValidation(StrEnum):
 
 class HardwarePatchsetDetection:
 
+    _shared_detection: tuple = None
+    _shared_detection_lock = threading.Lock()
+
+
     def __init__(self, constants: constants.Constants,
                  xnu_major: int = None, xnu_minor:  int = None,
                  os_build:  str = None, os_version: str = None,
-                 validation: bool = False # Whether to run validation checks
+                 validation: bool = False, # Whether to run validation checks
+                 probes: DetectionProbeRegistry = None
                  ) -> None:
         self._constants = constants
+        self._probes    = probes or default_registry
 
         self._xnu_major  = xnu_major  or self._constants.detected_os
         self._xnu_minor  = xnu_minor  or self._constants.detected_os_minor
@@ -153,6 +155,50 @@ class HardwarePatchsetDetection:
         self._detect()
 
 
+    @classmethod
+    def shared(cls, constants: constants.Constants) -> "HardwarePatchsetDetection":
+        """
+        Detection result for the host, shared across the run
+
+        Detection instantiates every hardware class and runs subprocess-backed
+        validation checks, so consumers should reuse this result rather than
+        constructing their own. Result is regenerated if the detected OS or
+        probed hardware changes, otherwise invalidate() must be called when
+        settings or the root volume are modified.
+
+        Treat the result as read-only, copy patches before modifying them.
+        """
+        key = (
+            id(constants),
+            id(constants.computer),
+            constants.detected_os,
+            constants.detected_os_minor,
+            constants.detected_os_build,
+            constants.detected_os_version,
+        )
+        with cls._shared_detection_lock:
+            if cls._shared_detection is None or cls._shared_detection[0] != key:
+                cls._shared_detection = (key, cls(constants))
+            return cls._shared_detection[1]
+
+
+    @classmethod
+    def invalidate(cls, volatile_only: bool = False) -> None:
+        """
+        Discard the shared detection result and memoized probes, next call to shared() will re-run detection
+
+        Parameters:
+            volatile_only (bool): Only discard probes of state that can change during a session (see VOLATILE_PROBE_MAX_AGE)
+        """
+        with cls._shared_detection_lock:
+            cls._shared_detection = None
+        if volatile_only is False:
+            default_registry.invalidate()
+            return
+        for probe in VOLATILE_PROBE_MAX_AGE:
+            default_registry.invalidate(probe)
+
+
     def _validation_check_unsupported_host_os(self) -> bool:
         """
         Determine if host OS is unsupported
@@ -166,15 +212,13 @@ class HardwarePatchsetDetection:
         return False
 
 
-    @cache
     def _validation_check_missing_network_connection(self) -> bool:
         """
         Determine if network connection is present
         """
-        return network_handler.NetworkUtilities().verify_network_connection() is False
+        return self._probes.get(DetectionProbe.NETWORK_CONNECTION) is False
 
 
-    @cache
     def _validation_check_filevault_is_enabled(self) -> bool:
         """
         Determine if FileVault is enabled
@@ -184,23 +228,21 @@ class HardwarePatchsetDetection:
             return False
 
         # OCLP-Mod exposes whether it patched APFS.kext to allow for FileVault
-        nvram = utilities.get_nvram("OCLP-Settings", "4D1FDA02-38C7-4A6A-9CC6-4BCCA8B30102", decode=True)
+        nvram = self._probes.get(DetectionProbe.NVRAM_OCLP_SETTINGS)
         if nvram:
             if "-allow_fv" in nvram:
                 return False
 
-        return "FileVault is Off" not in subprocess.run(["/usr/bin/fdesetup", "status"], stdout=subprocess.PIPE, stderr=subprocess.STDOUT).stdout.decode()
+        return "FileVault is Off" not in self._probes.get(DetectionProbe.FILEVAULT_STATUS)
 
     def _validation_check_repatching_is_possible(self) -> bool:
         """
         Determine if repatching is not allowed
         """
-        oclp_patch_path = "/System/Library/CoreServices/oclp-mod.plist"
-        if not Path(oclp_patch_path).exists():
+        oclp_plist = self._probes.get(DetectionProbe.ROOT_PATCH_PLIST)
+        if oclp_plist is None:
             return self._is_root_volume_dirty()
 
-        oclp_plist = plistlib.load(open(oclp_patch_path, "rb"))
-
         if self._constants.computer.oclp_sys_url != self._constants.commit_info[2]:
             logging.error("使用不同版本的OCLP-Mod安装过补丁，需要先卸载补丁")
             return True
@@ -217,6 +259,7 @@ class HardwarePatchsetDetection:
             "Metal Library Used",
             "OS Version",
             "Custom Signature",
+            "Manifest",
         }
 
         existing_patches = set(oclp_plist) - wireless_keys - metadata_keys
@@ -230,36 +273,39 @@ class HardwarePatchsetDetection:
         """
         Determine if System Integrity Protection is enabled
         """
-        return utilities.csr_decode(configs)
+        sip_value  = self._probes.get(DetectionProbe.SIP_STATUS)
+        csr_values = list(sip_data.system_integrity_protection.csr_values)
+
+        # Can be adjusted to whatever OS needs patching
+        return not all(sip_value & (1 << csr_values.index(config)) for config in configs)
 
 
     def _validation_check_secure_boot_model_enabled(self) -> bool:
         """
         Determine if SecureBootModel is enabled
         """
-        return utilities.check_secure_boot_level()
+        return self._probes.get(DetectionProbe.SECURE_BOOT_ENABLED)
 
 
     def _validation_check_amfi_enabled(self, level: amfi_detect.AmfiConfigDetectLevel) -> bool:
         """
         Determine if AMFI is enabled
         """
-        return not amfi_detect.AmfiConfigurationDetection().check_config(self._override_amfi_level(level))
+        return not self._probes.get(DetectionProbe.AMFI_CONFIGURATION).check_config(self._override_amfi_level(level))
 
 
     def _validation_check_whatevergreen_missing(self) -> bool:
         """
         Determine if WhateverGreen.kext is missing
         """
-        return utilities.check_kext_loaded("as.vit9696.WhateverGreen") is False
+        return self._probes.get(DetectionProbe.KEXT_WHATEVERGREEN) is False
 
 
-    @cache
     def _validation_check_force_opengl_missing(self) -> bool:
         """
         Determine if Force OpenGL property is missing
         """
-        nv_on = utilities.get_nvram("boot-args", decode=True)
+        nv_on = self._probes.get(DetectionProbe.NVRAM_BOOT_ARGS)
         if nv_on:
             if "ngfxgl=" in nv_on:
                 return False
@@ -274,7 +320,7 @@ class HardwarePatchsetDetection:
         """
         Determine if Force compat property is missing
         """
-        nv_on = utilities.get_nvram("boot-args", decode=True)
+        nv_on = self._probes.get(DetectionProbe.NVRAM_BOOT_ARGS)
         if nv_on:
             if "ngfxcompat=" in nv_on:
                 return False
@@ -289,22 +335,21 @@ class HardwarePatchsetDetection:
         """
         Determine if nvda_drv(_vrl) variable is missing
         """
-        nv_on = utilities.get_nvram("boot-args", decode=True)
+        nv_on = self._probes.get(DetectionProbe.NVRAM_BOOT_ARGS)
         if nv_on:
             if "nvda_drv_vrl=" in nv_on:
                 return False
-        nv_on = utilities.get_nvram("nvda_drv")
+        nv_on = self._probes.get(DetectionProbe.NVRAM_NVDA_DRV)
         if nv_on:
             return False
         return True
 
 
-    @cache
     def _override_amfi_level(self, level: amfi_detect.AmfiConfigDetectLevel) -> amfi_detect.AmfiConfigDetectLevel:
         """
         Override level required based on whether AMFIPass is loaded
         """
-        amfipass_version = utilities.check_kext_loaded("com.dhinakg.AMFIPass")
+        amfipass_version = self._probes.get(DetectionProbe.KEXT_AMFIPASS)
         if amfipass_version:
             if packaging.version.parse(amfipass_version) >= packaging.version.parse(self._constants.amfipass_compatibility_version):
                 # If AMFIPass is loaded, our binaries will work
@@ -323,13 +368,12 @@ class HardwarePatchsetDetection:
         """
         Check if network patches are already applied
         """
-        oclp_patch_path = "/System/Library/CoreServices/oclp-mod.plist"
-        if not Path(oclp_patch_path).exists():
-            return False
         try:
-            oclp_plist = plistlib.load(open(oclp_patch_path, "rb"))
+            oclp_plist = self._probes.get(DetectionProbe.ROOT_PATCH_PLIST)
         except Exception as e:
             return False
+        if oclp_plist is None:
+            return False
         if "Legacy Wireless" in oclp_plist or "Modern Wireless" in oclp_plist:
             return True
         return False
@@ -356,10 +400,7 @@ class HardwarePatchsetDetection:
         if self._xnu_major < os_data.big_sur.value:
             return False
         
-        try:
-            content = plistlib.loads(subprocess.run(["/usr/sbin/diskutil", "info", "-plist", "/"], capture_output=True).stdout)
-        except plistlib.InvalidFileException:
-            raise RuntimeError("Failed to parse diskutil output.")
+        content = self._probes.get(DetectionProbe.ROOT_VOLUME_INFO)
 
         seal = content["Sealed"]
 
@@ -369,6 +410,27 @@ class HardwarePatchsetDetection:
 
         return False
     
+    def _prefetch_probes(self) -> None:
+        """
+        Concurrently run the environment probes required by all hosts
+        """
+        probes = [
+            DetectionProbe.NVRAM_BOOT_ARGS,
+            DetectionProbe.NVRAM_OCLP_SETTINGS,
+            DetectionProbe.SIP_STATUS,
+            DetectionProbe.SECURE_BOOT_ENABLED,
+            DetectionProbe.AMFI_CONFIGURATION,
+            DetectionProbe.KEXT_AMFIPASS,
+            DetectionProbe.ROOT_PATCH_PLIST,
+        ]
+        if self._xnu_major >= os_data.big_sur.value:
+            probes += [
+                DetectionProbe.FILEVAULT_STATUS,
+                DetectionProbe.ROOT_VOLUME_INFO,
+            ]
+        self._probes.prefetch(probes)
+
+
     def _can_patch(self, requirements: dict, ignore_keys: list[str] = []) -> bool:
         """
         Check if patching is possible
@@ -478,7 +540,7 @@ class HardwarePatchsetDetection:
         """
         Handle SIP breakdown
         """
-        current_sip_status  = hex(py_sip_xnu.SipXnu().get_sip_status().value)
+        current_sip_status  = hex(self._probes.get(DetectionProbe.SIP_STATUS))
         expected_sip_status = hex(self._convert_required_sip_config_to_int(required_sip_configs))
         sip_string = f"验证: 启动时SIP: {current_sip_status} vs 需要: {expected_sip_status}"
         index = list(requirements.keys()).index(HardwarePatchsetValidation.SIP_ENABLED)
@@ -502,6 +564,8 @@ class HardwarePatchsetDetection:
         highest_amfi_level            = amfi_detect.AmfiConfigDetectLevel.NO_CHECK
         required_sip_configs          = []
 
+        self._prefetch_probes()
+
         # First pass to find all present hardware
         for hardware in self._hardware_variants:
             item: BaseHardware = hardware(
@@ -510,6 +574,7 @@ class HardwarePatchsetDetection:
                 os_build         = self._os_build,
                 global_constants = self._constants
             )
+            item._probes = self._probes
             # During validation, don't skip missing items
             # This is to ensure we can validate all files
             if self._validation is False:
@@ -541,6 +606,12 @@ class HardwarePatchsetDetection:
             if item.required_amfi_level() > highest_amfi_level:
                 highest_amfi_level = item.required_amfi_level()
 
+        if has_nvidia_web_drivers is True:
+            self._probes.prefetch([
+                DetectionProbe.KEXT_WHATEVERGREEN,
+                DetectionProbe.NVRAM_NVDA_DRV,
+            ])
+
         if self._validation is False:
             if requires_metallib_support_pkg is True:
                 missing_metallib_support_pkg = not self._is_cached_metallib_support_pkg_present()
@@ -5,7 +5,8 @@ base.py: Base class for hardware patch set detection
 from enum    import StrEnum
 from pathlib import Path
 
-from ..base import BasePatchset
+from ..base   import BasePatchset
+from ..probes import DetectionProbeRegistry, default_registry
 
 from ....constants import Constants
 
@@ -48,6 +49,9 @@ class BaseHardware(BasePatchset):
 
         self._xnu_float = float(f"{self._xnu_major}.{self._xnu_minor}")
 
+        # Environment probes, replaced by HardwarePatchsetDetection with its own registry
+        self._probes: DetectionProbeRegistry = default_registry
+
 
     def name(self) -> str:
         """
@@ -4,10 +4,10 @@ gmux.py: Legacy GMUX detection
 
 from ..base import BaseHardware, HardwareVariant
 
-from ...base import PatchType
+from ...base   import PatchType
+from ...probes import DetectionProbe
 
 from .....constants import Constants
-from .....support   import utilities
 
 from .....datasets.os_data import os_data
 
@@ -44,7 +44,7 @@ class GraphicsMultiplexer(BaseHardware):
         """
         # If GFX0 is missing, assume machine was demuxed
         # -wegnoegpu would also trigger this, so ensure arg is not present
-        if not "-wegnoegpu" in (utilities.get_nvram("boot-args", decode=True) or ""):
+        if not "-wegnoegpu" in (self._probes.get(DetectionProbe.NVRAM_BOOT_ARGS) or ""):
             igpu = self._constants.computer.igpu
             dgpu = self._check_dgpu_status()
             if igpu and not dgpu:
@@ -4,10 +4,10 @@ legacy_audio.py: Legacy Audio detection
 
 from ..base import BaseHardware, HardwareVariant
 
-from ...base import PatchType
+from ...base   import PatchType
+from ...probes import DetectionProbe
 
 from .....constants import Constants
-from .....support   import utilities
 
 from .....datasets.os_data import os_data
 
@@ -64,7 +64,7 @@ class LegacyAudio(BaseHardware):
                                       "iMac12,1",
                                       "iMac12,2",
                                       "MacPro3,1"
-        ] and utilities.check_kext_loaded("as.vit9696.AppleALC") is False)
+        ] and self._probes.get(DetectionProbe.KEXT_APPLEALC) is False)
 
 
     def native_os(self) -> bool:
@@ -0,0 +1,222 @@
+"""
+probes.py: Environment probes used by patchset detection
+
+Probes query host state required for validation (FileVault, SIP, NVRAM, loaded
+kexts, root volume). Independent probes are run concurrently, and results are
+memoized alongside the time they were taken, so repeated detections within a
+run don't spawn the same subprocesses again. Probes of state that can change
+during a session (network, loaded kexts, root patch plist) expire after
+VOLATILE_PROBE_MAX_AGE. Root volume, NVRAM and SIP probes
+are additionally backed by utilities.system_query_cache, shared with the rest
+of the patcher.
+
+Results can be injected, allowing detection to be exercised without a Mac.
+
+Usage:
+>>> registry = DetectionProbeRegistry()
+>>> registry.inject(DetectionProbe.FILEVAULT_STATUS, "FileVault is Off.")
+>>> HardwarePatchsetDetection(constants, probes=registry)
+"""
+
+import time
+import logging
+import plistlib
+import threading
+import subprocess
+
+from enum               import StrEnum
+from pathlib            import Path
+from concurrent.futures import ThreadPoolExecutor
+
+from ...support    import utilities, network_handler
+from ...detections import amfi_detect
+
+
+PROBE_WORKERS: int = 8
+
+ROOT_PATCH_PLIST: str = "/System/Library/CoreServices/oclp-mod.plist"
+
+
+class DetectionProbe(StrEnum):
+    """
+    Enum for environment probes
+    """
+    FILEVAULT_STATUS     = "fdesetup status"
+    NVRAM_BOOT_ARGS      = "nvram boot-args"
+    NVRAM_OCLP_SETTINGS  = "nvram OCLP-Settings"
+    NVRAM_NVDA_DRV       = "nvram nvda_drv"
+    SIP_STATUS           = "csr active config"
+    SECURE_BOOT_ENABLED  = "secure boot level"
+    AMFI_CONFIGURATION   = "AMFI configuration"
+    KEXT_WHATEVERGREEN   = "kext as.vit9696.WhateverGreen"
+    KEXT_AMFIPASS        = "kext com.dhinakg.AMFIPass"
+    KEXT_APPLEALC        = "kext as.vit9696.AppleALC"
+    ROOT_VOLUME_INFO     = "diskutil info /"
+    ROOT_PATCH_PLIST     = "root patch plist"
+    NETWORK_CONNECTION   = "network connection"
+
+
+# Seconds before a memoized result is considered stale, probes not listed are kept until invalidated
+VOLATILE_PROBE_MAX_AGE: dict = {
+    DetectionProbe.NETWORK_CONNECTION: 30,
+    DetectionProbe.ROOT_PATCH_PLIST:   60,
+    DetectionProbe.KEXT_WHATEVERGREEN: 300,
+    DetectionProbe.KEXT_AMFIPASS:      300,
+    DetectionProbe.KEXT_APPLEALC:      300,
+}
+
+
+def _probe_filevault_status() -> str:
+    return subprocess.run(["/usr/bin/fdesetup", "status"], stdout=subprocess.PIPE, stderr=subprocess.STDOUT).stdout.decode()
+
+
+def _probe_root_volume_info() -> dict:
+    try:
+        return utilities.get_root_volume_info()
+    except plistlib.InvalidFileException:
+        raise RuntimeError("Failed to parse diskutil output.")
+
+
+def _probe_root_patch_plist() -> dict:
+    if not Path(ROOT_PATCH_PLIST).exists():
+        return None
+    return plistlib.load(open(ROOT_PATCH_PLIST, "rb"))
+
+
+class DetectionProbeRegistry:
+    """
+    Registry of environment probes, memoizing each result with a timestamp
+
+    Parameters:
+        max_age  (float): Seconds before a memoized result is considered stale, None to keep until invalidated
+        max_ages (dict):  Per-probe overrides of max_age, defaults to VOLATILE_PROBE_MAX_AGE
+    """
+
+    def __init__(self, max_age: float = None, max_ages: dict = None) -> None:
+        self.max_age  = max_age
+        self.max_ages = dict(VOLATILE_PROBE_MAX_AGE if max_ages is None else max_ages)
+
+        self._probes:   dict = {
+            DetectionProbe.FILEVAULT_STATUS:    _probe_filevault_status,
+            DetectionProbe.NVRAM_BOOT_ARGS:     lambda: utilities.get_nvram("boot-args", decode=True),
+            DetectionProbe.NVRAM_OCLP_SETTINGS: lambda: utilities.get_nvram("OCLP-Settings", "4D1FDA02-38C7-4A6A-9CC6-4BCCA8B30102", decode=True),
+            DetectionProbe.NVRAM_NVDA_DRV:      lambda: utilities.get_nvram("nvda_drv"),
+            DetectionProbe.SIP_STATUS:          utilities.get_csr_status,
+            DetectionProbe.SECURE_BOOT_ENABLED: utilities.check_secure_boot_level,
+            DetectionProbe.AMFI_CONFIGURATION:  amfi_detect.AmfiConfigurationDetection,
+            DetectionProbe.KEXT_WHATEVERGREEN:  lambda: utilities.check_kext_loaded("as.vit9696.WhateverGreen"),
+            DetectionProbe.KEXT_AMFIPASS:       lambda: utilities.check_kext_loaded("com.dhinakg.AMFIPass"),
+            DetectionProbe.KEXT_APPLEALC:       lambda: utilities.check_kext_loaded("as.vit9696.AppleALC"),
+            DetectionProbe.ROOT_VOLUME_INFO:    _probe_root_volume_info,
+            DetectionProbe.ROOT_PATCH_PLIST:    _probe_root_patch_plist,
+            DetectionProbe.NETWORK_CONNECTION:  lambda: network_handler.NetworkUtilities().verify_network_connection(),
+        }
+        self._results:  dict = {} # probe -> (value, timestamp)
+        self._injected: dict = {}
+        self._lock = threading.Lock()
+
+
+    def register(self, probe: str, function: callable) -> None:
+        """
+        Register (or replace) the function backing a probe
+        """
+        with self._lock:
+            self._probes[probe] = function
+            self._results.pop(probe, None)
+
+
+    def inject(self, probe: str, value) -> None:
+        """
+        Inject a canned result for a probe, kept until removed with uninject()
+        """
+        with self._lock:
+            self._injected[probe] = value
+
+
+    def uninject(self, probe: str = None) -> None:
+        """
+        Remove an injected result, or all injected results if probe is None
+        """
+        with self._lock:
+            if probe is None:
+                self._injected = {}
+            else:
+                self._injected.pop(probe, None)
+
+
+    def _memoized(self, probe: str) -> tuple:
+        """
+        Returns:
+            tuple: (value, timestamp) if a valid result is held, otherwise None
+        """
+        if probe in self._injected:
+            return (self._injected[probe], None)
+        if probe not in self._results:
+            return None
+        value, timestamp = self._results[probe]
+        max_age = self.max_ages.get(probe, self.max_age)
+        if max_age is not None and time.monotonic() - timestamp > max_age:
+            return None
+        return (value, timestamp)
+
+
+    def _run(self, probe: str):
+        if probe not in self._probes:
+            raise Exception(f"Unknown detection probe: {probe}")
+        value = self._probes[probe]()
+        with self._lock:
+            self._results[probe] = (value, time.monotonic())
+        return value
+
+
+    def get(self, probe: str):
+        """
+        Result of a probe, run if not memoized (or stale)
+        """
+        with self._lock:
+            memoized = self._memoized(probe)
+        if memoized is not None:
+            return memoized[0]
+        return self._run(probe)
+
+
+    def timestamp(self, probe: str) -> float:
+        """
+        time.monotonic() of when the memoized result was taken, None if not memoized or injected
+        """
+        with self._lock:
+            memoized = self._memoized(probe)
+        return memoized[1] if memoized else None
+
+
+    def prefetch(self, probes: list) -> None:
+        """
+        Concurrently run probes not already memoized
+
+        Failures are not raised here, the probe is re-run by get() which raises as usual
+        """
+        with self._lock:
+            pending = [probe for probe in dict.fromkeys(probes) if self._memoized(probe) is None]
+        if len(pending) < 2:
+            # Nothing to overlap, get() will run it
+            return
+
+        with ThreadPoolExecutor(max_workers=min(PROBE_WORKERS, len(pending))) as executor:
+            futures = {probe: executor.submit(self._run, probe) for probe in pending}
+        for probe, future in futures.items():
+            if future.exception() is not None:
+                logging.debug(f"- 探测 {probe} 失败: {future.exception()}")
+
+
+    def invalidate(self, probe: str = None) -> None:
+        """
+        Discard memoized results (injected results are kept), or a single probe's result
+        """
+        with self._lock:
+            if probe is None:
+                self._results = {}
+            else:
+                self._results.pop(probe, None)
+
+
+default_registry = DetectionProbeRegistry()
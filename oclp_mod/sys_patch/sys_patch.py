@@ -35,6 +35,7 @@ This is because Apple removed on-disk binaries (ref: https://github.com/laobamac
   'sudo ditto /Library/Developer/KDKs/<KDK Version>/System /System/Volumes/Update/mnt1/System'
 """
 
+import copy
 import logging
 import plistlib
 import subprocess
@@ -48,10 +49,12 @@ from .mount import (
     APFSSnapshot
 )
 from .utilities import (
-    install_new_file,
-    remove_file,
     PatcherSupportPkgMount,
-    KernelDebugKitMerge
+    PatcherSupportPkgIndex,
+    KernelDebugKitMerge,
+    PatchPlanCompiler,
+    PatchPlanExecutor,
+    load_manifest
 )
 
 from .. import constants
@@ -92,11 +95,13 @@ class PatchSysVolume:
         self.needs_kmutil_exemptions = False # For '/Library/Extensions' rebuilds
         self.kdk_path = None
         self.metallib_path = None
+        self.root_changed = True        # Set after patching, False if root volume content matches the booted snapshot
+        self.kernelcache_changed = True # Set after patching, False if kext content matches the booted kernel caches
 
         # GUI will detect hardware patches before starting PatchSysVolume()
         # However the TUI will not, so allow for data to be passed in manually avoiding multiple calls
         if hardware_details is None:
-            hardware_details = HardwarePatchsetDetection(self.constants).device_properties
+            hardware_details = HardwarePatchsetDetection.shared(self.constants).device_properties
         self.hardware_details = hardware_details
         self._init_pathing()
 
@@ -221,10 +226,20 @@ class PatchSysVolume:
         Returns:
             bool: True if successful, False if not
         """
-        if self._rebuild_kernel_cache() is False:
-            return False
+        if self.root_changed is False:
+            self._unmount_root_vol()
+            logging.info("- 根卷内容与当前快照一致，跳过重建")
+            logging.info("- 补丁完成")
+            self.constants.root_patcher_succeeded = True
+            return True
+
+        if self.kernelcache_changed is True:
+            if self._rebuild_kernel_cache() is False:
+                return False
+            self._update_preboot_kernel_cache()
+        else:
+            logging.info("- 内核扩展未更改，跳过内核缓存重建")
 
-        self._update_preboot_kernel_cache()
         self._rebuild_dyld_shared_cache()
 
         if self._create_new_apfs_snapshot() is False:
@@ -324,18 +339,19 @@ class PatchSysVolume:
                 subprocess_wrapper.run_as_root(["/usr/bin/defaults", "delete", "/Library/Preferences/com.apple.CoreDisplay", arg])
 
 
-    def _write_patchset(self, patchset: dict) -> None:
+    def _write_patchset(self, patchset: dict, manifest: dict = None) -> None:
         """
         Write patchset information to Root Volume
 
         Parameters:
             patchset (dict): Patchset information (generated by HardwarePatchsetDetection)
+            manifest (dict): Content manifest of installed files (see PatchPlan.manifest())
         """
 
         destination_path = f"{self.mount_location}/System/Library/CoreServices"
         file_name = "oclp-mod.plist"
         destination_path_file = f"{destination_path}/{file_name}"
-        if sys_patch_helpers.SysPatchHelpers(self.constants).generate_patchset_plist(patchset, file_name, self.kdk_path, self.metallib_path):
+        if sys_patch_helpers.SysPatchHelpers(self.constants).generate_patchset_plist(patchset, file_name, self.kdk_path, self.metallib_path, manifest):
             logging.info("- 将补丁集信息写入根卷")
             if Path(destination_path_file).exists():
                 subprocess_wrapper.run_as_root_and_verify(["/bin/rm", destination_path_file], stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
@@ -360,7 +376,7 @@ class PatchSysVolume:
         if self.patch_set_dictionary != {}:
             self._execute_patchset(self.patch_set_dictionary)
         else:
-            self._execute_patchset(HardwarePatchsetDetection(self.constants).patches)
+            self._execute_patchset(copy.deepcopy(HardwarePatchsetDetection.shared(self.constants).patches))
 
         if self.constants.wxpython_variant is True and self.constants.detected_os >= os_data.os_data.big_sur:
             needs_daemon = False
@@ -387,75 +403,60 @@ class PatchSysVolume:
 
         source_files_path = str(self.constants.payload_local_binaries_root_path)
         required_patches = self._preflight_checks(required_patches, source_files_path)
-        for patch in required_patches:
-            logging.info("- 安装补丁集: " + patch)
-            for method_remove in [PatchType.REMOVE_SYSTEM_VOLUME, PatchType.REMOVE_DATA_VOLUME]:
-                if method_remove in required_patches[patch]:
-                    for remove_patch_directory in required_patches[patch][method_remove]:
-                        logging.info("- 删除文件路径: " + remove_patch_directory)
-                        for remove_patch_file in required_patches[patch][method_remove][remove_patch_directory]:
-                            if method_remove == PatchType.REMOVE_SYSTEM_VOLUME:
-                                destination_folder_path = str(self.mount_location) + remove_patch_directory
-                            else:
-                                destination_folder_path = str(self.mount_location_data) + remove_patch_directory
-                            remove_file(destination_folder_path, remove_patch_file)
-
-
-            for method_install in [PatchType.OVERWRITE_SYSTEM_VOLUME, PatchType.OVERWRITE_DATA_VOLUME, PatchType.MERGE_SYSTEM_VOLUME, PatchType.MERGE_DATA_VOLUME]:
-                if method_install not in required_patches[patch]:
-                    continue
 
-                for install_patch_directory in list(required_patches[patch][method_install]):
-                    logging.info(f"- 处理安装路径: {install_patch_directory}")
-                    for install_file in list(required_patches[patch][method_install][install_patch_directory]):
-                        source_folder_path = required_patches[patch][method_install][install_patch_directory][install_file] + install_patch_directory
-                        # 检查是否从根目录源
-                        if not required_patches[patch][method_install][install_patch_directory][install_file].startswith("/"):
-                            source_folder_path = source_files_path + "/" + source_folder_path
-
-                        if method_install in [PatchType.OVERWRITE_SYSTEM_VOLUME, PatchType.MERGE_SYSTEM_VOLUME]:
-                            destination_folder_path = str(self.mount_location) + install_patch_directory
-                        else:
-                            if install_patch_directory == "/Library/Extensions":
-                                self.needs_kmutil_exemptions = True
-                                if kc_support_obj.check_kexts_needs_authentication(install_file) is True:
-                                    self.constants.needs_to_open_preferences = True
-
-                            destination_folder_path = str(self.mount_location_data) + install_patch_directory
-
-                        updated_destination_folder_path = kc_support_obj.add_auxkc_support(install_file, source_folder_path, install_patch_directory, destination_folder_path)
-                        if updated_destination_folder_path != destination_folder_path:
-                            if kc_support_obj.check_kexts_needs_authentication(install_file) is True:
-                                self.constants.needs_to_open_preferences = True
-
-                        if destination_folder_path != updated_destination_folder_path:
-                            # 更新 required_patches 以反映新的目标文件夹路径
-                            if updated_destination_folder_path not in required_patches[patch][method_install]:
-                                required_patches[patch][method_install].update({updated_destination_folder_path: {}})
-                            required_patches[patch][method_install][updated_destination_folder_path].update({install_file: required_patches[patch][method_install][install_patch_directory][install_file]})
-                            required_patches[patch][method_install][install_patch_directory].pop(install_file)
-
-                            destination_folder_path = updated_destination_folder_path
-
-                        install_new_file(source_folder_path, destination_folder_path, install_file, method_install)
-
-            if PatchType.EXECUTE in required_patches[patch]:
-                for process in required_patches[patch][PatchType.EXECUTE]:
-                    # 有些进程需要 sudo，然而我们不能直接在某些场景中调用 sudo
-                    # 相反，如果字符串的布尔值为 True，则调用提升权限函数
-                    if required_patches[patch][PatchType.EXECUTE][process] is True:
-                        logging.info(f"- 以 root 运行进程:\n{process}")
-                        subprocess_wrapper.run_as_root_and_verify(process.split(" "), stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
-                    else:
-                        logging.info(f"- 运行进程:\n{process}")
-                        subprocess_wrapper.run_and_verify(process, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, shell=True)
+        plan = PatchPlanCompiler(
+            source_files_path,
+            self.mount_location,
+            self.mount_location_data,
+            kc_support=kc_support_obj,
+            index=PatcherSupportPkgIndex.for_mount(self.constants)
+        ).compile(required_patches)
+        if plan.needs_kmutil_exemptions is True:
+            self.needs_kmutil_exemptions = True
+        if plan.needs_to_open_preferences is True:
+            self.constants.needs_to_open_preferences = True
+
+        previous_manifest = self._load_previous_manifest()
+        executor = PatchPlanExecutor(plan, kc_support=kc_support_obj, previous_manifest=previous_manifest)
+        executor.execute()
+        required_patches = plan.patchset
+
+        self.kernelcache_changed = executor.kernelcache_changed
+        self.root_changed = executor.root_changed or self.kernelcache_changed
 
         if any(x in required_patches for x in ["AMD Legacy GCN", "AMD Legacy Polaris", "AMD Legacy Vega"]):
             sys_patch_helpers.SysPatchHelpers(self.constants).disable_window_server_caching()
         if "Metal 3802 Common Extended" in required_patches:
             sys_patch_helpers.SysPatchHelpers(self.constants).patch_gpu_compiler_libraries(mount_point=self.mount_location)
 
-        self._write_patchset(required_patches)
+        self._write_patchset(required_patches, plan.manifest())
+
+
+    def _load_previous_manifest(self) -> dict:
+        """
+        Load the content manifest of the booted root volume
+
+        Only used if the booted volume was patched on the same OS build with the same KDK,
+        otherwise all content is treated as changed
+
+        Returns:
+            dict: Manifest files (see load_manifest()), empty if unavailable
+        """
+        oclp_plist = Path("/System/Library/CoreServices/oclp-mod.plist")
+        if not oclp_plist.exists():
+            return {}
+
+        try:
+            oclp_plist_data = plistlib.load(oclp_plist.open("rb"))
+        except Exception:
+            return {}
+
+        if oclp_plist_data.get("OS Version") != f"{self.constants.detected_os}.{self.constants.detected_os_minor} ({self.constants.detected_os_build})":
+            return {}
+        if oclp_plist_data.get("Kernel Debug Kit Used") != str(self.kdk_path or "Not applicable"):
+            return {}
+
+        return load_manifest(oclp_plist_data)
 
 
     def _resolve_metallib_support_pkg(self) -> str:
@@ -488,6 +489,31 @@ class PatchSysVolume:
         return self._resolve_metallib_support_pkg()
 
 
+    def _resolve_dynamic_patchsets_locally(self, required_patches: dict) -> dict:
+        """
+        Resolve dynamic patchsets already available on disk, without downloading
+
+        Used for previews, unresolved entries are left as is (see PatchOperationStatus.PENDING)
+
+        Returns:
+            dict: Copy of the patchset with resolved sources
+        """
+        required_patches = copy.deepcopy(required_patches)
+        metallib_path = None
+        for patch in required_patches:
+            for method_type in [PatchType.OVERWRITE_SYSTEM_VOLUME, PatchType.OVERWRITE_DATA_VOLUME, PatchType.MERGE_SYSTEM_VOLUME, PatchType.MERGE_DATA_VOLUME]:
+                for install_patch_directory in required_patches[patch].get(method_type, {}):
+                    for install_file, source in required_patches[patch][method_type][install_patch_directory].items():
+                        if source != DynamicPatchset.MetallibSupportPkg:
+                            continue
+                        if metallib_path is None:
+                            metallib_obj = metallib_handler.MetalLibraryObject(self.constants, self.constants.detected_os_build, self.constants.detected_os_version, passive=True)
+                            metallib_path = str(metallib_obj.metallib_installed_path) if metallib_obj.metallib_already_installed else ""
+                        if metallib_path:
+                            required_patches[patch][method_type][install_patch_directory][install_file] = metallib_path
+        return required_patches
+
+
     @cache
     def _resolve_dynamic_patchset(self, variant: DynamicPatchset) -> str:
         """
@@ -513,6 +539,8 @@ class PatchSysVolume:
 
         logging.info("- 在打补丁前运行预检")
 
+        index = PatcherSupportPkgIndex.for_mount(self.constants)
+
         for patch in required_patches:
             # 检查所有文件是否存在
             for method_type in [PatchType.OVERWRITE_SYSTEM_VOLUME, PatchType.OVERWRITE_DATA_VOLUME, PatchType.MERGE_SYSTEM_VOLUME, PatchType.MERGE_DATA_VOLUME]:
@@ -531,7 +559,7 @@ class PatchSysVolume:
                         # 检查是否从根目录源
                         if not required_patches[patch][method_type][install_patch_directory][install_file].startswith("/"):
                             source_file = source_files_path + "/" + source_file
-                        if not Path(source_file).exists():
+                        if not (index.exists(source_file) if index else Path(source_file).exists()):
                             raise Exception(f"无法找到 {source_file}")
 
         # 确保没有使用旧的 Skylight 插件
@@ -567,8 +595,9 @@ class PatchSysVolume:
 
         logging.info("- 开始打补丁过程")
         logging.info(f"- 确定适用于 Darwin {self.constants.detected_os} 的所需补丁集")
-        patchset_obj = HardwarePatchsetDetection(self.constants)
-        self.patch_set_dictionary = patchset_obj.patches
+        patchset_obj = HardwarePatchsetDetection.shared(self.constants)
+        # Preflight checks resolve dynamic patchsets in place, keep the shared result untouched
+        self.patch_set_dictionary = copy.deepcopy(patchset_obj.patches)
 
         if self.patch_set_dictionary == {}:
             logging.info("- 您的机器不需要任何根卷补丁！")
@@ -597,6 +626,55 @@ class PatchSysVolume:
 
         self._patch_root_vol()
 
+        # Root volume and cached KDK/MetallibSupportPkg state changed
+        utilities.system_query_cache.invalidate()
+        HardwarePatchsetDetection.invalidate()
+
+
+    def start_dry_run(self) -> None:
+        """
+        Entry function for previewing the patching process
+
+        Compiles the patch plan against the booted root volume and logs it
+        alongside a diff, no changes are made to either volume
+        """
+
+        logging.info("- 开始补丁预览 (不会修改系统)")
+        patchset_obj = HardwarePatchsetDetection.shared(self.constants)
+        required_patches = patchset_obj.patches
+
+        if required_patches == {}:
+            logging.info("- 您的机器不需要任何根卷补丁！")
+            return
+
+        # Shared patchset must stay unresolved for start_patch()
+        required_patches = self._resolve_dynamic_patchsets_locally(required_patches)
+
+        if patchset_obj.can_patch is False:
+            logging.error("- 当前无法进行补丁:")
+            patchset_obj.detailed_errors()
+
+        if PatcherSupportPkgMount(self.constants).mount() is False:
+            logging.error("- 依赖丢失，无法继续")
+            return
+
+        kc_support_obj = kernelcache.KernelCacheSupport(
+            mount_location_data="",
+            detected_os=self.constants.detected_os,
+            skip_root_kmutil_requirement=self.skip_root_kmutil_requirement
+        )
+
+        # Booted volume is identical to the snapshot mounted during patching
+        plan = PatchPlanCompiler(
+            self.constants.payload_local_binaries_root_path,
+            "",
+            "",
+            kc_support=kc_support_obj,
+            index=PatcherSupportPkgIndex.for_mount(self.constants)
+        ).compile(required_patches)
+        for line in plan.describe(diff=True).split("\n"):
+            logging.info(line)
+
 
     def start_unpatch(self) -> None:
         """
@@ -604,7 +682,7 @@ class PatchSysVolume:
         """
 
         logging.info("- 开始卸载进程")
-        patchset_obj = HardwarePatchsetDetection(self.constants)
+        patchset_obj = HardwarePatchsetDetection.shared(self.constants)
         if patchset_obj.can_unpatch is False:
             logging.error("- 未能卸载补丁")
             patchset_obj.detailed_errors()
@@ -615,3 +693,6 @@ class PatchSysVolume:
             return
 
         self._unpatch_root_vol()
+
+        utilities.system_query_cache.invalidate()
+        HardwarePatchsetDetection.invalidate()
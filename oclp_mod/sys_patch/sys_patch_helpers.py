@@ -77,7 +77,7 @@ class SysPatchHelpers:
                 f.write(data)
 
 
-    def generate_patchset_plist(self, patchset: dict, file_name: str, kdk_used: Path, metallib_used: Path):
+    def generate_patchset_plist(self, patchset: dict, file_name: str, kdk_used: Path, metallib_used: Path, manifest: dict = None):
         """
         Generate patchset file for user reference
 
@@ -85,6 +85,7 @@ class SysPatchHelpers:
             patchset (dict): Dictionary of patchset, sys_patch/patchsets
             file_name (str): Name of the file to write to
             kdk_used (Path): Path to the KDK used, if any
+            manifest (dict): Content manifest of installed files, if any (see PatchPlan.manifest())
 
         Returns:
             bool: True if successful, False if not
@@ -115,6 +116,9 @@ class SysPatchHelpers:
 
         data.update(patchset)
 
+        if manifest:
+            data["Manifest"] = manifest
+
         if Path(source_path_file).exists():
             os.remove(source_path_file)
 
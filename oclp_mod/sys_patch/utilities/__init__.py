@@ -3,4 +3,6 @@ utilities: General utility functions for root volume patching
 """
 from .files import install_new_file, remove_file, fix_permissions
 from .dmg_mount import PatcherSupportPkgMount
-from .kdk_merge import KernelDebugKitMerge
\ No newline at end of file
+from .payload_index import PatcherSupportPkgIndex
+from .kdk_merge import KernelDebugKitMerge
+from .plan import PatchPlan, PatchPlanCompiler, PatchPlanExecutor, load_manifest
\ No newline at end of file
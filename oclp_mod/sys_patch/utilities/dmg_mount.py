@@ -12,6 +12,8 @@ from ... import constants
 
 from ...support import subprocess_wrapper
 
+from .payload_index import PatcherSupportPkgIndex
+
 
 class PatcherSupportPkgMount:
 
@@ -172,6 +174,7 @@ class PatcherSupportPkgMount:
         # If already mounted, skip
         if Path(self.constants.payload_local_binaries_root_path).exists():
             logging.info("- 本地 PatcherSupportPkg 资源可用，继续...")
+            PatcherSupportPkgIndex.for_mount(self.constants)
             return True
 
         if self._mount_universal_binaries_dmg() is False:
@@ -180,4 +183,6 @@ class PatcherSupportPkgMount:
         if self._mount_laobamac_internal_resources_dmg() is False:
             return False
 
+        PatcherSupportPkgIndex.for_mount(self.constants)
+
         return True
\ No newline at end of file
@@ -21,6 +21,9 @@ def install_new_file(source_folder: Path, destination_folder: Path, file_name: s
     - PatchType.MERGE_* are merged with the destination folder
     - Other files are deleted and replaced
 
+    If a subprocess_wrapper.PrivilegedBatch is active, operations are queued
+    and executed when the batch exits.
+
     Parameters:
         source_folder      (Path): Path to the source folder
         destination_folder (Path): Path to the destination folder
@@ -36,26 +39,26 @@ def install_new_file(source_folder: Path, destination_folder: Path, file_name: s
     if method in [PatchType.MERGE_SYSTEM_VOLUME, PatchType.MERGE_DATA_VOLUME]:
         # merge with rsync
         logging.info(f"  - 安装: {file_name}")
-        subprocess_wrapper.run_as_root(["/usr/bin/rsync", "-r", "-i", "-a", f"{source_folder}/{file_name}", f"{destination_folder}/"], stdout=subprocess.PIPE)
-        fix_permissions(destination_folder + "/" + file_name)
+        subprocess_wrapper.run_as_root_or_queue(["/usr/bin/rsync", "-r", "-i", "-a", f"{source_folder}/{file_name}", f"{destination_folder}/"], verify=False, stdout=subprocess.PIPE)
+        fix_permissions(destination_folder + "/" + file_name, Path(source_folder + "/" + file_name_str).is_dir())
     elif Path(source_folder + "/" + file_name_str).is_dir():
         # Applicable for .kext, .app, .plugin, .bundle, all of which are directories
         if Path(destination_folder + "/" + file_name).exists():
             logging.info(f"  - 找到现有 {file_name}，正在覆盖...")
-            subprocess_wrapper.run_as_root_and_verify(["/bin/rm", "-R", f"{destination_folder}/{file_name}"], stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+            subprocess_wrapper.run_as_root_or_queue(["/bin/rm", "-Rf", f"{destination_folder}/{file_name}"], stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
         else:
             logging.info(f"  - 安装: {file_name}")
-        subprocess_wrapper.run_as_root_and_verify(generate_copy_arguments(f"{source_folder}/{file_name}", destination_folder), stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
-        fix_permissions(destination_folder + "/" + file_name)
+        subprocess_wrapper.run_as_root_or_queue(generate_copy_arguments(f"{source_folder}/{file_name}", destination_folder), stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+        fix_permissions(destination_folder + "/" + file_name, True)
     else:
         # Assume it's an individual file, replace as normal
         if Path(destination_folder + "/" + file_name).exists():
             logging.info(f"  - 找到现有 {file_name}，正在覆盖...")
-            subprocess_wrapper.run_as_root_and_verify(["/bin/rm", f"{destination_folder}/{file_name}"], stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+            subprocess_wrapper.run_as_root_or_queue(["/bin/rm", "-f", f"{destination_folder}/{file_name}"], stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
         else:
             logging.info(f"  - 安装: {file_name}")
-        subprocess_wrapper.run_as_root_and_verify(generate_copy_arguments(f"{source_folder}/{file_name}", destination_folder), stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
-        fix_permissions(destination_folder + "/" + file_name)
+        subprocess_wrapper.run_as_root_or_queue(generate_copy_arguments(f"{source_folder}/{file_name}", destination_folder), stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+        fix_permissions(destination_folder + "/" + file_name, False)
 
 
 def remove_file(destination_folder: Path, file_name: str) -> None:
@@ -70,21 +73,28 @@ def remove_file(destination_folder: Path, file_name: str) -> None:
     if Path(destination_folder + "/" + file_name).exists():
         logging.info(f"  - 删除: {file_name}")
         if Path(destination_folder + "/" + file_name).is_dir():
-            subprocess_wrapper.run_as_root_and_verify(["/bin/rm", "-R", f"{destination_folder}/{file_name}"], stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+            subprocess_wrapper.run_as_root_or_queue(["/bin/rm", "-Rf", f"{destination_folder}/{file_name}"], stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
         else:
-            subprocess_wrapper.run_as_root_and_verify(["/bin/rm", f"{destination_folder}/{file_name}"], stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+            subprocess_wrapper.run_as_root_or_queue(["/bin/rm", "-f", f"{destination_folder}/{file_name}"], stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
 
 
-def fix_permissions(destination_file: Path) -> None:
+def fix_permissions(destination_file: Path, is_directory: bool = None) -> None:
     """
     Fix file permissions for a given file or directory
+
+    Parameters:
+        destination_file (Path): Path to the file or directory
+        is_directory     (bool): Whether the destination is a directory, detected if None.
+                                 Required when batching, as the destination may not exist yet
     """
 
     chmod_args = ["/bin/chmod",      "-Rf", "755", destination_file]
     chown_args = ["/usr/sbin/chown", "-Rf", "root:wheel", destination_file]
-    if not Path(destination_file).is_dir():
+    if is_directory is None:
+        is_directory = Path(destination_file).is_dir()
+    if not is_directory:
         # Strip recursive arguments
         chmod_args.pop(1)
         chown_args.pop(1)
-    subprocess_wrapper.run_as_root_and_verify(chmod_args, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
-    subprocess_wrapper.run_as_root_and_verify(chown_args, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
\ No newline at end of file
+    subprocess_wrapper.run_as_root_or_queue(chmod_args, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+    subprocess_wrapper.run_as_root_or_queue(chown_args, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
\ No newline at end of file
@@ -0,0 +1,279 @@
+"""
+payload_index.py: In-memory index of PatcherSupportPkg's Universal-Binaries payload
+
+Lookups against the mounted, shadowed disk image are slow, so the payload is
+walked once per mount (or loaded from the index generated at build time) and
+preflight checks resolve sources against the index instead.
+
+Usage:
+>>> index = PatcherSupportPkgIndex.for_mount(constants)
+>>> index.exists(f"{constants.payload_local_binaries_root_path}/13.7.2/System/Library/Extensions/IOSurface.kext")
+True
+"""
+
+import os
+import stat
+import bisect
+import hashlib
+import logging
+import plistlib
+
+from pathlib import Path
+
+from ... import constants
+
+
+INDEX_VERSION:        int = 3
+HASH_CHUNK_SIZE:      int = 1024 * 1024
+DMG_FINGERPRINT_SIZE: int = 1024 * 1024 # Bytes read from each end of the disk image
+
+
+class PatcherSupportPkgIndex:
+    """
+    Index of a payload tree: relative path -> (size, mode, SHA-256)
+
+    Hashes are only generated at build time, indexes generated at runtime leave them empty.
+    File hashes are of their contents, symlink hashes of their target (see hash_leaf()).
+
+    Parameters:
+        root_path (str):  Root of the payload tree
+        entries   (dict): Relative path -> [size, mode, hash]
+    """
+
+    _mounted_indexes: dict = {}
+
+
+    def __init__(self, root_path: str, entries: dict) -> None:
+        self.root_path: str  = str(root_path).rstrip("/")
+        self.entries:   dict = entries
+
+        self._sorted_paths: list = None
+
+
+    @classmethod
+    def generate(cls, root_path: str, include_hashes: bool = False) -> "PatcherSupportPkgIndex":
+        """
+        Walk the payload tree once and index every file, directory and symlink
+        """
+        root_path = str(root_path).rstrip("/")
+        entries = {}
+        for root, dirs, files in os.walk(root_path):
+            for name in dirs + files:
+                path = os.path.join(root, name)
+                try:
+                    path_stat = os.lstat(path)
+                except OSError:
+                    continue
+                file_hash = ""
+                if include_hashes and (stat.S_ISREG(path_stat.st_mode) or stat.S_ISLNK(path_stat.st_mode)):
+                    file_hash = cls.hash_leaf(path)
+                entries[os.path.relpath(path, root_path)] = [path_stat.st_size, path_stat.st_mode, file_hash]
+
+        return cls(root_path, entries)
+
+
+    @staticmethod
+    def _hash_file(path: str) -> str:
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            while chunk := f.read(HASH_CHUNK_SIZE):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+
+    @classmethod
+    def hash_leaf(cls, path: str) -> str:
+        """
+        SHA-256 of a file's contents, or of a symlink's target
+        """
+        if os.path.islink(path):
+            return hashlib.sha256(b"L" + os.fsencode(os.readlink(path))).hexdigest()
+        return cls._hash_file(path)
+
+
+    @staticmethod
+    def combine_hashes(leaves: list) -> str:
+        """
+        SHA-256 of a directory from its leaves (files and symlinks)
+
+        Parameters:
+            leaves (list): (relative path, is symlink, leaf hash) of each leaf
+        """
+        digest = hashlib.sha256()
+        for relative, is_link, leaf_hash in sorted(leaves):
+            digest.update(b"\0" + relative.encode() + b"\0" + (b"L" if is_link else b"F") + leaf_hash.encode())
+        return digest.hexdigest()
+
+
+    @staticmethod
+    def _fingerprint_dmg(dmg_path: str) -> str:
+        """
+        Cheap identity of a disk image: its size, and a SHA-256 of its first and last megabyte
+
+        The UDIF trailer at the end of the image holds the checksums of its contents,
+        so a rebuilt image differs there. Modification times aren't used, as they
+        aren't preserved once the image is bundled with the application.
+        """
+        size = Path(dmg_path).stat().st_size
+        digest = hashlib.sha256()
+        with open(dmg_path, "rb") as f:
+            digest.update(f.read(DMG_FINGERPRINT_SIZE))
+            f.seek(max(size - DMG_FINGERPRINT_SIZE, 0))
+            digest.update(f.read(DMG_FINGERPRINT_SIZE))
+        return f"{size}:{digest.hexdigest()}"
+
+
+    @classmethod
+    def load(cls, index_path: str, root_path: str, dmg_path: str = None, verify_dmg_hash: bool = False) -> "PatcherSupportPkgIndex":
+        """
+        Load a persisted index
+
+        Parameters:
+            index_path      (str):  Path to the index plist
+            root_path       (str):  Root the payload is mounted at
+            dmg_path        (str):  Disk image the index was generated from, index is rejected if its fingerprint differs
+            verify_dmg_hash (bool): Also compare the SHA-256 of the whole disk image, for build time only as it reads the entire image
+
+        Returns:
+            PatcherSupportPkgIndex: Loaded index, None if missing or stale
+        """
+        if not Path(index_path).exists():
+            return None
+        try:
+            data = plistlib.load(open(index_path, "rb"))
+        except Exception as e:
+            logging.info(f"- 无法读取 PatcherSupportPkg 索引: {e}")
+            return None
+
+        if data.get("Version") != INDEX_VERSION:
+            return None
+        if dmg_path:
+            if not Path(dmg_path).exists() or data.get("DMG Fingerprint") != cls._fingerprint_dmg(dmg_path):
+                return None
+            if verify_dmg_hash is True and data.get("DMG SHA-256") != cls._hash_file(dmg_path):
+                return None
+
+        return cls(root_path, data["Entries"])
+
+
+    def write(self, index_path: str, dmg_path: str = None) -> None:
+        """
+        Persist the index, stored as a binary plist for fast loading
+
+        The disk image's fingerprint is checked on load, its full SHA-256 only at build time
+        """
+        data = {
+            "Version":         INDEX_VERSION,
+            "DMG Fingerprint": self._fingerprint_dmg(dmg_path) if dmg_path else "",
+            "DMG SHA-256":     self._hash_file(dmg_path) if dmg_path else "",
+            "Entries":         self.entries,
+        }
+        with open(index_path, "wb") as f:
+            plistlib.dump(data, f, fmt=plistlib.FMT_BINARY)
+
+
+    @classmethod
+    def for_mount(cls, global_constants: constants.Constants) -> "PatcherSupportPkgIndex":
+        """
+        Index of the mounted Universal-Binaries payload, created once per mount
+
+        Prefers the index generated at build time, unless internal resources were merged into the payload
+        """
+        root_path = Path(global_constants.payload_local_binaries_root_path)
+        if not root_path.exists():
+            return None
+
+        root_stat = root_path.stat()
+        mount_key = (str(root_path), root_stat.st_dev, root_stat.st_ino)
+        if mount_key in cls._mounted_indexes:
+            return cls._mounted_indexes[mount_key]
+
+        index = None
+        if not Path(global_constants.payload_path / Path("laobamacInternal")).exists():
+            index = cls.load(global_constants.payload_local_binaries_index_path, root_path, global_constants.payload_local_binaries_root_path_dmg)
+        if index is None:
+            index = cls.generate(root_path)
+
+        logging.info(f"- 已索引 PatcherSupportPkg 资源 ({len(index.entries)} 个条目)")
+        cls._mounted_indexes = {mount_key: index}
+        return index
+
+
+    def _relative(self, path: str) -> str:
+        """
+        Resolve path relative to the payload root, None if outside of it
+        """
+        path = os.path.normpath(str(path))
+        if path == self.root_path:
+            return "."
+        if not path.startswith(self.root_path + "/"):
+            return None
+        return path[len(self.root_path) + 1:]
+
+
+    def entry(self, path: str) -> list:
+        """
+        Returns:
+            list: [size, mode, hash] of path, None if not indexed
+        """
+        relative = self._relative(path)
+        if relative is None:
+            return None
+        return self.entries.get(relative)
+
+
+    def exists(self, path: str) -> bool:
+        """
+        Path.exists() equivalent, paths outside of the payload fall back to the filesystem
+        """
+        if self._relative(path) is None:
+            return Path(path).exists()
+        if self._relative(path) == ".":
+            return True
+        return self.entry(path) is not None
+
+
+    def is_dir(self, path: str) -> bool:
+        """
+        Path.is_dir() equivalent, paths outside of the payload fall back to the filesystem
+        """
+        if self._relative(path) is None:
+            return Path(path).is_dir()
+        entry = self.entry(path)
+        if entry is None:
+            return False
+        if stat.S_ISLNK(entry[1]):
+            return Path(path).is_dir()
+        return stat.S_ISDIR(entry[1])
+
+
+    def hash(self, path: str) -> str:
+        """
+        plan.hash_path() equivalent from the hashes generated at build time
+
+        Returns:
+            str: SHA-256, None if path isn't indexed or the index has no hashes for it
+        """
+        relative = self._relative(path)
+        if relative is None or relative == ".":
+            return None
+        entry = self.entry(path)
+        if entry is None:
+            return None
+        if not stat.S_ISDIR(entry[1]):
+            return entry[2] or None
+
+        if self._sorted_paths is None:
+            self._sorted_paths = sorted(self.entries)
+        prefix = relative + "/"
+        leaves = []
+        for child in self._sorted_paths[bisect.bisect_left(self._sorted_paths, prefix):]:
+            if not child.startswith(prefix):
+                break
+            size, mode, leaf_hash = self.entries[child]
+            if stat.S_ISDIR(mode):
+                continue
+            if not leaf_hash:
+                return None
+            leaves.append((child[len(prefix):], stat.S_ISLNK(mode), leaf_hash))
+        return self.combine_hashes(leaves)
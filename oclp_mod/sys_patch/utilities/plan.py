@@ -0,0 +1,652 @@
+"""
+plan.py: Compile patchsets into an explicit plan of file operations
+
+Separates resolving a patchset (from HardwarePatchsetDetection) from executing it,
+allowing the plan to be reviewed and diffed against a root volume (ie. '--dry_run'),
+serialised, or compiled against a fake root tree on other platforms.
+
+Usage:
+>>> plan = PatchPlanCompiler(source_files_path, mount_location, mount_location_data).compile(patchset)
+>>> for line in plan.describe(diff=True).split("\n"):
+...     logging.info(line)
+>>> PatchPlanExecutor(plan).execute()
+"""
+
+import os
+import copy
+import filecmp
+import logging
+import plistlib
+import subprocess
+
+from enum        import StrEnum
+from pathlib     import Path
+from dataclasses import dataclass, asdict
+
+from .files import install_new_file, remove_file
+from .payload_index import PatcherSupportPkgIndex
+
+from ..patchsets.base import PatchType, DynamicPatchset
+
+from ...support import subprocess_wrapper
+
+
+PLAN_VERSION:     int = 1
+MANIFEST_VERSION: int = 2 # 2: hash_path() hashes directories over their leaves' hashes
+
+
+class PatchOperationType(StrEnum):
+    """
+    Type of file operation
+    """
+    REMOVE  = "Remove"
+    INSTALL = "Install"
+    MERGE   = "Merge"
+    EXECUTE = "Execute"
+
+
+class PatchOperationStatus(StrEnum):
+    """
+    Result of diffing an operation against a root volume
+    """
+    ADDED     = "+"
+    MODIFIED  = "~"
+    UNCHANGED = "="
+    REMOVED   = "-"
+    SKIPPED   = "!"
+    EXECUTE   = "$"
+    PENDING   = "?" # Source pending dynamic resolution (ie. MetallibSupportPkg not yet downloaded)
+
+
+@dataclass
+class PatchOperation:
+    """
+    Single operation of a patch plan
+
+    'patch_directory' is the directory key in the patchset (ie. /System/Library/Extensions),
+    'destination_folder' the resolved folder on the mounted volume.
+    Empty strings are used for unset fields, allowing plans to be stored as plists.
+    """
+    patchset:           str
+    type:               PatchOperationType
+    patch_type:         PatchType
+    patch_directory:    str  = ""
+    file_name:          str  = ""
+    source_folder:      str  = ""
+    destination_folder: str  = ""
+    mode:               str  = "755"
+    owner:              str  = "root:wheel"
+    is_directory:       bool = False
+    expected_hash:      str  = ""
+    volume:             str  = ""     # "System" or "Data"
+    volume_path:        str  = ""     # Destination relative to its volume root, used as the manifest key
+    auxkc:              bool = False  # Kext relocated to the Auxiliary KC, patched during execution
+    command:            str  = ""     # PatchOperationType.EXECUTE only
+    as_root:            bool = False  # PatchOperationType.EXECUTE only
+
+
+    @property
+    def source(self) -> str:
+        if not self.source_folder:
+            return ""
+        return f"{self.source_folder}/{self.file_name}"
+
+
+    @property
+    def destination(self) -> str:
+        return f"{self.destination_folder}/{self.file_name}"
+
+
+    @property
+    def is_kernel_extension(self) -> bool:
+        return self.file_name.endswith(".kext")
+
+
+def load_manifest(oclp_plist_data: dict) -> dict:
+    """
+    Read the content manifest from a patchset plist (see PatchPlan.manifest())
+
+    Returns:
+        dict: Volume path -> manifest entry, empty if missing or of another version
+    """
+    manifest = oclp_plist_data.get("Manifest")
+    if not isinstance(manifest, dict) or manifest.get("Version") != MANIFEST_VERSION:
+        return {}
+    return manifest.get("Files", {})
+
+
+def hash_path(path: str) -> str:
+    """
+    Generate a SHA-256 of a file or directory
+
+    Files are hashed by their contents, symlinks by their target, directories
+    over their sorted leaves. Matches the hashes of PatcherSupportPkgIndex,
+    so sources can be hashed without reading the payload.
+
+    Returns:
+        str: Hex digest, empty string if the path does not exist
+    """
+    path = Path(path)
+    if not path.exists() and not path.is_symlink():
+        return ""
+
+    if not path.is_dir() or path.is_symlink():
+        return PatcherSupportPkgIndex.hash_leaf(path)
+
+    leaves = []
+    for root, dirs, files in os.walk(path):
+        for name in files + [d for d in dirs if Path(root, d).is_symlink()]:
+            file = Path(root, name)
+            leaves.append((str(file.relative_to(path)), file.is_symlink(), PatcherSupportPkgIndex.hash_leaf(file)))
+    return PatcherSupportPkgIndex.combine_hashes(leaves)
+
+
+def is_merged(source: str, destination: str) -> bool:
+    """
+    Check whether every file of source is present and identical in destination
+
+    Used for PatchType.MERGE_*, where the destination may hold additional files
+    """
+    source = Path(source)
+    destination = Path(destination)
+    if not destination.exists():
+        return False
+
+    for root, dirs, files in os.walk(source):
+        for name in files + [d for d in dirs if Path(root, d).is_symlink()]:
+            source_file = Path(root, name)
+            destination_file = destination / source_file.relative_to(source)
+            if source_file.is_symlink():
+                if not destination_file.is_symlink() or os.readlink(source_file) != os.readlink(destination_file):
+                    return False
+                continue
+            if destination_file.is_symlink() or not destination_file.is_file():
+                return False
+            if not filecmp.cmp(source_file, destination_file, shallow=False):
+                return False
+
+    return True
+
+
+class PatchPlan:
+    """
+    Ordered list of operations compiled from a patchset
+
+    Parameters:
+        operations (list): PatchOperation entries, in execution order
+        patchset   (dict): Patchset with AuxKC relocations applied, for writing to the root volume
+    """
+
+    def __init__(self, operations: list = None, patchset: dict = None) -> None:
+        self.operations: list = operations or []
+        self.patchset:   dict = patchset or {}
+
+        self.needs_kmutil_exemptions:   bool = False
+        self.needs_to_open_preferences: bool = False
+
+
+    @property
+    def patchsets(self) -> list:
+        """
+        Names of patchsets in the plan, in execution order
+        """
+        return list(dict.fromkeys(operation.patchset for operation in self.operations))
+
+
+    def operations_for(self, patchset: str) -> list:
+        return [operation for operation in self.operations if operation.patchset == patchset]
+
+
+    def manifest(self) -> dict:
+        """
+        Generate the content manifest of installed files, stored in the patchset plist
+
+        Format:
+            Version: MANIFEST_VERSION
+            Files:
+                <volume path>: {Volume, Patchset, Type, Hash}
+        """
+        files = {}
+        for operation in self.operations:
+            if operation.type not in [PatchOperationType.INSTALL, PatchOperationType.MERGE]:
+                continue
+            files[operation.volume_path] = {
+                "Volume":   operation.volume,
+                "Patchset": operation.patchset,
+                "Type":     operation.type.value,
+                "Hash":     operation.expected_hash,
+            }
+        return {
+            "Version": MANIFEST_VERSION,
+            "Files":   files,
+        }
+
+
+    def to_dict(self) -> dict:
+        return {
+            "Version":                   PLAN_VERSION,
+            "Needs Kmutil Exemptions":   self.needs_kmutil_exemptions,
+            "Needs To Open Preferences": self.needs_to_open_preferences,
+            "Operations":                [asdict(operation) for operation in self.operations],
+        }
+
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "PatchPlan":
+        if data.get("Version") != PLAN_VERSION:
+            raise Exception(f"不支持的补丁计划版本: {data.get('Version')}")
+
+        operations = []
+        for entry in data["Operations"]:
+            entry = dict(entry)
+            entry["type"]       = PatchOperationType(entry["type"])
+            entry["patch_type"] = PatchType(entry["patch_type"])
+            operations.append(PatchOperation(**entry))
+
+        plan = cls(operations)
+        plan.needs_kmutil_exemptions   = data["Needs Kmutil Exemptions"]
+        plan.needs_to_open_preferences = data["Needs To Open Preferences"]
+        return plan
+
+
+    def write(self, path: str) -> None:
+        with open(path, "wb") as f:
+            plistlib.dump(self.to_dict(), f, sort_keys=False)
+
+
+    @classmethod
+    def load(cls, path: str) -> "PatchPlan":
+        with open(path, "rb") as f:
+            return cls.from_dict(plistlib.load(f))
+
+
+    def diff(self) -> list:
+        """
+        Compare operations against the current state of their destination
+
+        Returns:
+            list: (PatchOperationStatus, PatchOperation) for each operation
+        """
+        results = []
+        for operation in self.operations:
+            if operation.type == PatchOperationType.EXECUTE:
+                status = PatchOperationStatus.EXECUTE
+            elif operation.type == PatchOperationType.REMOVE:
+                status = PatchOperationStatus.REMOVED if Path(operation.destination).exists() else PatchOperationStatus.SKIPPED
+            elif not operation.source_folder:
+                # Content is unknown until resolved, don't guess against the destination
+                status = PatchOperationStatus.PENDING
+            elif not Path(operation.destination_folder).exists():
+                # Matches install_new_file(), which skips missing destination folders
+                status = PatchOperationStatus.SKIPPED
+            elif not Path(operation.destination).exists():
+                status = PatchOperationStatus.ADDED
+            elif operation.type == PatchOperationType.INSTALL and operation.expected_hash and operation.expected_hash == hash_path(operation.destination):
+                status = PatchOperationStatus.UNCHANGED
+            else:
+                status = PatchOperationStatus.MODIFIED
+            results.append((status, operation))
+        return results
+
+
+    def describe(self, diff: bool = False) -> str:
+        """
+        Generate a human readable summary of the plan
+
+        Parameters:
+            diff (bool): Include the status of each operation against the current root volume
+        """
+        entries = self.diff() if diff else [(None, operation) for operation in self.operations]
+
+        output = f"补丁计划: {len(self.patchsets)} 个补丁集, {len(self.operations)} 个操作\n"
+        if diff:
+            output += "  (+ 新增, ~ 修改, = 未更改, - 删除, ! 跳过, $ 执行, ? 待动态解析)\n"
+        current_patchset = None
+        for status, operation in entries:
+            if operation.patchset != current_patchset:
+                current_patchset = operation.patchset
+                output += f"- {current_patchset}\n"
+            prefix = f"{status.value} " if status else ""
+            if operation.type == PatchOperationType.EXECUTE:
+                output += f"  {prefix}{operation.type.value}{' (root)' if operation.as_root else ''}: {operation.command}\n"
+            elif operation.type == PatchOperationType.REMOVE:
+                output += f"  {prefix}{operation.type.value}: {operation.destination}\n"
+            elif not operation.source_folder:
+                output += f"  {prefix}{operation.type.value}: {operation.file_name} (待动态解析) -> {operation.destination}\n"
+            else:
+                output += f"  {prefix}{operation.type.value}: {operation.source} -> {operation.destination}\n"
+
+        if diff:
+            counts = {}
+            for status, _ in entries:
+                counts[status] = counts.get(status, 0) + 1
+            output += "合计: " + ", ".join(f"{status.value} {count}" for status, count in counts.items())
+
+        return output.rstrip("\n")
+
+
+class PatchPlanCompiler:
+    """
+    Compile a patchset into a PatchPlan
+
+    Only reads from the source and destination trees, no changes are made.
+
+    Parameters:
+        source_files_path   (str):  Root of PatcherSupportPkg binaries
+        mount_location      (str):  Root of the system volume ("" for the booted volume)
+        mount_location_data (str):  Root of the data volume ("" for the booted volume)
+        kc_support          (KernelCacheSupport): Used to resolve AuxKC relocations, none if not provided
+        hash_sources        (bool): Generate expected hashes for installed files
+        index               (PatcherSupportPkgIndex): Index of the payload, used instead of the filesystem if provided
+    """
+
+    def __init__(self, source_files_path: str, mount_location: str, mount_location_data: str, kc_support = None, hash_sources: bool = True, index = None) -> None:
+        self.source_files_path   = str(source_files_path)
+        self.mount_location      = str(mount_location)
+        self.mount_location_data = str(mount_location_data)
+        self.kc_support          = kc_support
+        self.hash_sources        = hash_sources
+        self.index               = index
+
+
+    def _is_dir(self, path: Path) -> bool:
+        if self.index:
+            return self.index.is_dir(path)
+        return path.is_dir()
+
+
+    def _hash_source(self, path: Path) -> str:
+        """
+        Hash from the payload index if available, avoids reading sources from the mounted disk image
+        """
+        if self.index:
+            source_hash = self.index.hash(path)
+            if source_hash:
+                return source_hash
+        return hash_path(path)
+
+
+    def _resolve_source_folder(self, source: str, install_patch_directory: str) -> str:
+        """
+        Resolve the source folder of a file, empty string if pending dynamic resolution
+        """
+        try:
+            if source in DynamicPatchset:
+                return ""
+        except TypeError:
+            pass
+
+        source_folder_path = source + install_patch_directory
+        # 检查是否从根目录源
+        if not source.startswith("/"):
+            source_folder_path = self.source_files_path + "/" + source_folder_path
+        return source_folder_path
+
+
+    def compile(self, patchset: dict) -> PatchPlan:
+        """
+        Compile patchset into plan
+
+        Parameters:
+            patchset (dict): Patchset to compile (generated by HardwarePatchsetDetection)
+
+        Returns:
+            PatchPlan: Compiled plan
+        """
+        plan = PatchPlan(patchset=copy.deepcopy(patchset))
+
+        for patch in patchset:
+            for method_remove in [PatchType.REMOVE_SYSTEM_VOLUME, PatchType.REMOVE_DATA_VOLUME]:
+                if method_remove not in patchset[patch]:
+                    continue
+                volume = "System" if method_remove == PatchType.REMOVE_SYSTEM_VOLUME else "Data"
+                root = self.mount_location if volume == "System" else self.mount_location_data
+                for remove_patch_directory in patchset[patch][method_remove]:
+                    for remove_patch_file in patchset[patch][method_remove][remove_patch_directory]:
+                        plan.operations.append(PatchOperation(
+                            patchset=patch,
+                            type=PatchOperationType.REMOVE,
+                            patch_type=method_remove,
+                            patch_directory=remove_patch_directory,
+                            file_name=remove_patch_file,
+                            destination_folder=root + remove_patch_directory,
+                            volume=volume,
+                            volume_path=f"{remove_patch_directory}/{remove_patch_file}",
+                        ))
+
+            for method_install in [PatchType.OVERWRITE_SYSTEM_VOLUME, PatchType.OVERWRITE_DATA_VOLUME, PatchType.MERGE_SYSTEM_VOLUME, PatchType.MERGE_DATA_VOLUME]:
+                if method_install not in patchset[patch]:
+                    continue
+
+                for install_patch_directory in patchset[patch][method_install]:
+                    for install_file in patchset[patch][method_install][install_patch_directory]:
+                        source = patchset[patch][method_install][install_patch_directory][install_file]
+                        source_folder_path = self._resolve_source_folder(source, install_patch_directory)
+
+                        if method_install in [PatchType.OVERWRITE_SYSTEM_VOLUME, PatchType.MERGE_SYSTEM_VOLUME]:
+                            volume = "System"
+                            destination_folder_path = self.mount_location + install_patch_directory
+                        else:
+                            volume = "Data"
+                            if install_patch_directory == "/Library/Extensions":
+                                plan.needs_kmutil_exemptions = True
+                                if self.kc_support and self.kc_support.check_kexts_needs_authentication(install_file) is True:
+                                    plan.needs_to_open_preferences = True
+                            destination_folder_path = self.mount_location_data + install_patch_directory
+
+                        auxkc = False
+                        if self.kc_support:
+                            updated_destination_folder_path = self.kc_support.auxkc_destination(install_file, install_patch_directory, destination_folder_path)
+                            if updated_destination_folder_path != destination_folder_path:
+                                auxkc = True
+                                if self.kc_support.check_kexts_needs_authentication(install_file) is True:
+                                    plan.needs_to_open_preferences = True
+
+                                # 更新补丁集以反映新的目标文件夹路径
+                                relocated = plan.patchset[patch][method_install]
+                                relocated.setdefault(updated_destination_folder_path, {})[install_file] = relocated[install_patch_directory].pop(install_file)
+                                destination_folder_path = updated_destination_folder_path
+                                volume = "Data"
+
+                        root = self.mount_location if volume == "System" else self.mount_location_data
+
+                        source_path = Path(source_folder_path, install_file) if source_folder_path else None
+                        plan.operations.append(PatchOperation(
+                            patchset=patch,
+                            type=PatchOperationType.MERGE if method_install in [PatchType.MERGE_SYSTEM_VOLUME, PatchType.MERGE_DATA_VOLUME] else PatchOperationType.INSTALL,
+                            patch_type=method_install,
+                            patch_directory=install_patch_directory,
+                            file_name=install_file,
+                            source_folder=source_folder_path,
+                            destination_folder=destination_folder_path,
+                            is_directory=self._is_dir(source_path) if source_path else False,
+                            expected_hash=self._hash_source(source_path) if source_path and self.hash_sources else "",
+                            volume=volume,
+                            volume_path=f"{destination_folder_path[len(root):]}/{install_file}",
+                            auxkc=auxkc,
+                        ))
+
+            if PatchType.EXECUTE in patchset[patch]:
+                for process in patchset[patch][PatchType.EXECUTE]:
+                    plan.operations.append(PatchOperation(
+                        patchset=patch,
+                        type=PatchOperationType.EXECUTE,
+                        patch_type=PatchType.EXECUTE,
+                        command=process,
+                        as_root=patchset[patch][PatchType.EXECUTE][process] is True,
+                    ))
+
+        return plan
+
+
+class PatchPlanExecutor:
+    """
+    Execute a compiled PatchPlan
+
+    File operations of each patchset are run as a single privileged batch,
+    followed by the patchset's processes. Installs and merges whose destination
+    already matches the source are skipped, as are removals of such files.
+    Processes always run and count as changes, as their effect on the root
+    volume can't be compared.
+
+    Parameters:
+        plan              (PatchPlan):          Plan to execute
+        kc_support        (KernelCacheSupport): Used to patch kexts relocated to the AuxKC
+        previous_manifest (dict):               Manifest the booted root volume was built with (see load_manifest())
+    """
+
+    def __init__(self, plan: PatchPlan, kc_support = None, previous_manifest: dict = None) -> None:
+        self.plan              = plan
+        self.kc_support        = kc_support
+        self.previous_manifest = previous_manifest or {}
+
+        self.changed: list = []
+        self.skipped: list = []
+
+        self._modified_destinations: set = set()
+        self._unchanged_destinations: dict = {}
+
+
+    @property
+    def kernelcache_changed(self) -> bool:
+        """
+        Whether kext content differs from what the booted kernel caches were built with
+        """
+        changed = {id(operation) for operation in self.changed}
+        for operation in self.plan.operations:
+            if not operation.is_kernel_extension:
+                continue
+            if id(operation) in changed:
+                return True
+            if operation.type == PatchOperationType.REMOVE:
+                continue
+            if self.previous_manifest.get(operation.volume_path, {}).get("Hash") != operation.expected_hash:
+                return True
+        return False
+
+
+    @property
+    def root_changed(self) -> bool:
+        """
+        Whether root volume content differs from what the booted snapshot was built with
+
+        Compared against the previous manifest rather than the mounted volume, as
+        files written by an earlier run that failed before creating the snapshot
+        already match on the mounted volume
+        """
+        if not self.previous_manifest or self.changed:
+            return True
+        installs = set()
+        for operation in self.plan.operations:
+            if operation.type not in [PatchOperationType.INSTALL, PatchOperationType.MERGE]:
+                continue
+            installs.add(operation.volume_path)
+            if not operation.expected_hash:
+                return True
+            if self.previous_manifest.get(operation.volume_path, {}).get("Hash") != operation.expected_hash:
+                return True
+        for operation in self.plan.operations:
+            if operation.type != PatchOperationType.REMOVE or operation.volume_path in installs:
+                continue
+            if operation.volume_path in self.previous_manifest:
+                return True
+        return False
+
+
+    def _is_unchanged(self, operation: PatchOperation) -> bool:
+        """
+        Check whether an install's destination already matches its source
+
+        Installs are compared by their expected hash, merges file by file
+        as the destination may hold additional files
+        """
+        if operation.type not in [PatchOperationType.INSTALL, PatchOperationType.MERGE] or not operation.expected_hash:
+            return False
+        if operation.destination in self._modified_destinations:
+            return False
+        if operation.destination not in self._unchanged_destinations:
+            if operation.type == PatchOperationType.MERGE:
+                unchanged = is_merged(operation.source, operation.destination)
+            else:
+                unchanged = hash_path(operation.destination) == operation.expected_hash
+            self._unchanged_destinations[operation.destination] = unchanged
+        return self._unchanged_destinations[operation.destination]
+
+
+    def _execute_file_operation(self, operation: PatchOperation, installs: dict) -> None:
+        if operation.type == PatchOperationType.REMOVE:
+            if operation.destination in installs and self._is_unchanged(installs[operation.destination]):
+                # Reinstalled later in the plan with identical content
+                self.skipped.append(operation)
+                return
+            if Path(operation.destination).exists():
+                self.changed.append(operation)
+                self._modified_destinations.add(operation.destination)
+            remove_file(operation.destination_folder, operation.file_name)
+            return
+
+        if not operation.source_folder:
+            raise Exception(f"未解析的补丁源: {operation.file_name}")
+
+        if operation.auxkc and self.kc_support:
+            self.kc_support.add_auxkc_support(operation.file_name, operation.source_folder, operation.patch_directory, operation.destination_folder)
+            # Info.plist may have been updated, reflect what is installed
+            if operation.expected_hash:
+                operation.expected_hash = hash_path(operation.source)
+
+        if self._is_unchanged(operation):
+            logging.info(f"  - 跳过 {operation.file_name}，内容未更改")
+            self.skipped.append(operation)
+            return
+
+        if Path(operation.destination_folder).exists():
+            self.changed.append(operation)
+            self._modified_destinations.add(operation.destination)
+        install_new_file(operation.source_folder, operation.destination_folder, operation.file_name, operation.patch_type)
+
+
+    def _execute_process(self, operation: PatchOperation) -> None:
+        # 进程可能修改根卷，无法判断是否与当前快照一致，因此始终视为更改
+        self.changed.append(operation)
+
+        # 有些进程需要 sudo，然而我们不能直接在某些场景中调用 sudo
+        # 相反，如果字符串的布尔值为 True，则调用提升权限函数
+        if operation.as_root is True:
+            logging.info(f"- 以 root 运行进程:\n{operation.command}")
+            subprocess_wrapper.run_as_root_and_verify(operation.command.split(" "), stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+        else:
+            logging.info(f"- 运行进程:\n{operation.command}")
+            subprocess_wrapper.run_and_verify(operation.command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, shell=True)
+
+
+    def execute(self) -> None:
+        installs = {
+            operation.destination: operation
+            for operation in self.plan.operations
+            if operation.type == PatchOperationType.INSTALL
+        }
+
+        for patchset in self.plan.patchsets:
+            logging.info("- 安装补丁集: " + patchset)
+            operations = self.plan.operations_for(patchset)
+
+            # 删除和安装操作合并为一次特权调用执行
+            with subprocess_wrapper.PrivilegedBatch():
+                current_directory = None
+                for operation in operations:
+                    if operation.type == PatchOperationType.EXECUTE:
+                        continue
+                    if operation.patch_directory != current_directory:
+                        current_directory = operation.patch_directory
+                        if operation.type == PatchOperationType.REMOVE:
+                            logging.info("- 删除文件路径: " + current_directory)
+                        else:
+                            logging.info(f"- 处理安装路径: {current_directory}")
+                    self._execute_file_operation(operation, installs)
+
+            for operation in operations:
+                if operation.type == PatchOperationType.EXECUTE:
+                    self._execute_process(operation)
+
+        if self.skipped:
+            logging.info(f"- 跳过 {len(self.skipped)} 个内容未更改的操作")
@@ -12,6 +12,7 @@ from Cocoa import NSApp, NSApplication
 
 from .. import constants
 
+from ..support import startup_trace
 from ..sys_patch.patchsets import HardwarePatchsetDetection
 
 from ..wx_gui import (
@@ -64,7 +65,7 @@ class EntryPoint:
 
         if "--gui_patch" in sys.argv or "--gui_unpatch" in sys.argv or start_patching is True :
             entry = gui_sys_patch_start.SysPatchStartFrame
-            patches = HardwarePatchsetDetection(constants=self.constants).device_properties
+            patches = HardwarePatchsetDetection.shared(self.constants).device_properties
 
         logging.info(f"Entry point set: {entry.__name__}")
 
@@ -79,6 +80,8 @@ class EntryPoint:
             **({"patches": patches} if "--gui_patch" in sys.argv or "--gui_unpatch" in sys.argv or start_patching is True else {})
         )
 
+        startup_trace.instant("First window")
+
         atexit.register(self.OnCloseFrame)
 
         if "--gui_patch" in sys.argv or start_patching is True:
@@ -12,6 +12,7 @@ import requests
 import time
 import urllib.parse
 import hashlib
+import os
 
 from pathlib import Path
 
@@ -19,6 +20,7 @@ from .. import (
     constants,
     sucatalog
 )
+from ..sucatalog import latest
 
 from ..datasets import (
     os_data,
@@ -156,13 +158,18 @@ class macOSInstallerDownloadFrame(wx.Frame):
         def _fetch_installers():
             logging.info(f"Fetching installer catalog: {sucatalog.SeedType.DeveloperSeed.name}")
 
-            sucatalog_contents = sucatalog.CatalogURL(seed=sucatalog.SeedType.DeveloperSeed).url_contents
+            catalog_cache = sucatalog.CatalogCache()
+
+            sucatalog_contents = sucatalog.CatalogURL(seed=sucatalog.SeedType.DeveloperSeed, cache=catalog_cache).url_contents
             if sucatalog_contents is None:
                 logging.error("Failed to download Installer Catalog from Apple")
                 return
 
-            self.available_installers        = sucatalog.CatalogProducts(sucatalog_contents).products
-            self.available_installers_latest = sucatalog.CatalogProducts(sucatalog_contents).latest_products
+            catalog_products = sucatalog.CatalogProducts(sucatalog_contents, cache=catalog_cache)
+            self.available_installers        = catalog_products.products
+            self.available_installers_latest = catalog_products.latest_products
+
+            logging.info(f"Catalog cache: {catalog_cache.hits} hits, {catalog_cache.revalidations} revalidated, {catalog_cache.misses} downloaded")
 
 
         thread = threading.Thread(target=_fetch_installers)
@@ -224,62 +231,17 @@ class macOSInstallerDownloadFrame(wx.Frame):
                 else:
                     logging.info(f"请求失败，状态码: {response.status_code}")
 
-                dmg_number=[]
-                dmg_build=[]
                 dmgdata_all=dmgdata
-                maxnx=[]
                 dmgdata=dmgdata['dmgFiles'][::-1]
                 for i in range(len(dmgdata)):
-                    #self.kdk_data[i].pop("kernel_versions")
                     dmgdata[i]['releaseDate']=((dmgdata[i]['releaseDate']).split("T"))[0]
-                for i in range(len(dmgdata)):
-                    data=dmgdata[i]["build"][:2]
-                    data2=dmgdata[i]["build"]
-                    dmg_number.append(data)
-                    dmg_build.append(data2)
-                #print(kdk_data_number)
-                #dmg_number=dmg_number[::-1]
-                #dmg_build=dmg_build[::-1]
-                for i in range(4):
-                    maxn=dmg_number[0]
-                    while True:
-                        dmg_number.pop(0)
-                        if len(dmg_number)==0 or dmg_number[0]<maxn :
-                            break
-                    maxnx.append(maxn)
-                #print(kdk_data[0]['build'])
-                i=0
-                fl=[0,0,0,0]
+
+                # 每个大版本只保留最新的构建, 仅显示最新的 4 个大版本
+                newest = latest.group_latest(dmgdata, group=lambda dmg: dmg["build"][:2], key=lambda dmg: latest.parse_build(dmg["build"]))
+                majors = sorted(newest, reverse=True)[:4]
                 model={
-                    "dmgFiles":[]
+                    "dmgFiles": [newest[major] for major in sorted(majors)]
                 }
-                latest=[]
-                while True:
-                    if maxnx[0] == dmgdata[i]["build"][:2] and fl[0]==0:
-                        latest.append(dmgdata[i])
-                        fl[0]=1
-                        #print(kdk_data_latest)
-                        i+=1
-                    if  maxnx[1] == dmgdata[i]["build"][:2]and fl[1]==0:
-                        latest.append(dmgdata[i])
-                        fl[1]=1
-                        i+=1
-                    if  maxnx[2] == dmgdata[i]["build"][:2]and fl[2]==0:
-                        latest.append(dmgdata[i])
-                        fl[2]=1
-                        i+=1
-                    if  maxnx[3] == dmgdata[i]["build"][:2]and fl[3]==0:
-                        latest.append(dmgdata[i])
-                        fl[3]=1
-                        i+=1
-                    if i==len(dmgdata)-1:
-                        break
-                    else:
-                        i+=1
-                        continue
-                #self.kdk_data_full=self.kdk_data
-                latest=latest[::-1]
-                model["dmgFiles"]=latest
                 self.latest_dmgs=model
 
             except requests.exceptions.RequestException as e:
@@ -714,7 +676,13 @@ class macOSInstallerDownloadFrame(wx.Frame):
 
             self.frame_modal.Close()
 
-            download_obj = network_handler.DownloadObject(selected_installer['InstallAssistant']['URL'], self.constants.payload_path / "InstallAssistant.pkg")
+            # Fetch the chunklist up front, so chunks are verified while downloading
+            chunk_obj = None
+            chunklist_stream = network_handler.NetworkUtilities().get(selected_installer['InstallAssistant']['IntegrityDataURL']).content
+            if chunklist_stream:
+                chunk_obj = integrity_verification.ChunklistVerification(self.constants.payload_path / Path("InstallAssistant.pkg"), chunklist_stream)
+
+            download_obj = network_handler.DownloadObject(selected_installer['InstallAssistant']['URL'], self.constants.payload_path / "InstallAssistant.pkg", chunklist=chunk_obj)
 
             gui_download.DownloadFrame(
                 self,
@@ -729,12 +697,14 @@ class macOSInstallerDownloadFrame(wx.Frame):
                 self.on_return_to_main_menu()
                 return
 
-            self._validate_installer(selected_installer['InstallAssistant']['IntegrityDataURL'])
+            self._validate_installer(selected_installer['InstallAssistant']['IntegrityDataURL'], chunk_obj)
 
 
-    def _validate_installer(self, chunklist_link: str) -> None:
+    def _validate_installer(self, chunklist_link: str, chunk_obj: integrity_verification.ChunklistVerification = None) -> None:
         """
         Validate macOS installer
+
+        Skips re-reading the installer if it was already verified during download
         """
         self.SetSize((300, 200))
         for child in self.GetChildren():
@@ -758,7 +728,11 @@ class macOSInstallerDownloadFrame(wx.Frame):
         self.SetSize((-1, progress_bar.GetPosition()[1] + progress_bar.GetSize()[1] + 40))
         self.Show()
 
-        chunklist_stream = network_handler.NetworkUtilities().get(chunklist_link).content
+        if chunk_obj and chunk_obj.status == integrity_verification.ChunklistStatus.SUCCESS:
+            logging.info("macOS installer already validated during download")
+            chunklist_stream = None
+        else:
+            chunklist_stream = network_handler.NetworkUtilities().get(chunklist_link).content
         if chunklist_stream:
             logging.info("Validating macOS installer")
             utilities.disable_sleep_while_running()
@@ -768,7 +742,7 @@ class macOSInstallerDownloadFrame(wx.Frame):
                 progress_bar.SetRange(chunk_obj.total_chunks)
 
                 wx.App.Get().Yield()
-                chunk_obj.validate()
+                chunk_obj.validate(workers=os.cpu_count() or 1)
 
                 while chunk_obj.status == integrity_verification.ChunklistStatus.IN_PROGRESS:
                     progress_bar.SetValue(chunk_obj.current_chunk)
@@ -14,6 +14,7 @@ from pathlib import Path
 from .. import constants
 
 from ..sys_patch import sys_patch
+from ..sys_patch.patchsets import HardwarePatchsetDetection
 
 from ..wx_gui import (
     gui_support,
@@ -970,7 +971,7 @@ class SettingsFrame(wx.Frame):
             defaults.GenerateDefaults(self.constants.custom_model, False, self.constants)
             self.parent.build_button.Enable()
 
-
+        HardwarePatchsetDetection.invalidate()
 
         self.parent.model_label.SetLabel(f"机型: {selection}")
         self.parent.model_label.Centre(wx.HORIZONTAL)
@@ -1137,6 +1138,7 @@ Commit Information:
                             event.GetEventObject().SetValue(not event.GetEventObject().GetValue())
                             return
         if override_function is True:
+            HardwarePatchsetDetection.invalidate()
             self.settings[self._find_parent_for_key(label)][label]["override_function"](self.settings[self._find_parent_for_key(label)][label]["variable"], value, self.settings[self._find_parent_for_key(label)][label]["constants_variable"] if "constants_variable" in self.settings[self._find_parent_for_key(label)][label] else None)
             return
 
@@ -1162,6 +1164,7 @@ Commit Information:
         if tmp_value is None:
             tmp_value = "PYTHON_NONE_VALUE"
         global_settings.GlobalEnviromentSettings().write_property(f"GUI:{variable}", tmp_value)
+        HardwarePatchsetDetection.invalidate()
 
 
     def _update_global_settings(self, variable, value, global_setting = None):
@@ -1224,6 +1227,7 @@ Commit Information:
             self.constants.sip_status = False
         else:
             self.constants.custom_sip_value = hex(self.sip_value)
+        HardwarePatchsetDetection.invalidate()
 
         self.sip_configured_label.SetLabel(f"当前配置的SIP: {hex(self.sip_value)}")
 
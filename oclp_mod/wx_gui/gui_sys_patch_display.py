@@ -86,7 +86,9 @@ class SysPatchDisplayFrame(wx.Frame):
         patches: dict = {}
         def _fetch_patches(self) -> None:
             nonlocal patches
-            patches = HardwarePatchsetDetection(constants=self.constants).device_properties
+            # 每次打开时重新检测，网络等状态可能已在本次会话中改变
+            HardwarePatchsetDetection.invalidate(volatile_only=True)
+            patches = HardwarePatchsetDetection.shared(self.constants).device_properties
 
         thread = threading.Thread(target=_fetch_patches, args=(self,))
         thread.start()
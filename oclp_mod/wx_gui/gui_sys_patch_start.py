@@ -54,7 +54,7 @@ class SysPatchStartFrame(wx.Frame):
         self.Centre()
 
         if self.patches == {}:
-            self.patches = HardwarePatchsetDetection(constants=self.constants).device_properties
+            self.patches = HardwarePatchsetDetection.shared(self.constants).device_properties
 
 
     def _kdk_download(self, frame: wx.Frame = None) -> bool: